@@ -0,0 +1,80 @@
+"""Memória da base de candidatos: pd.read_parquet completo x load_parquet compacto.
+
+Gera um parquet sintético com as colunas usadas pelo /predict e colunas extras
+(como no applicants_processed.parquet) e mede, em processos separados, o RSS
+antes/depois do carregamento e o memory_usage(deep=True) do DataFrame.
+
+Uso: python benchmarks/bench_applicant_store.py [--applicants 100000] [--parquet caminho]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_applicants, random_text
+
+
+def write_parquet(path, n_rows):
+    """Parquet sintético com as colunas de predição e colunas que o /predict não usa."""
+    rng = np.random.default_rng(7)
+    applicants = make_applicants(n_rows)
+    applicants["cv_en"] = random_text(rng, n_rows, 40)
+    applicants["app_prof_titulo_profissional"] = random_text(rng, n_rows, 4)
+    applicants["app_prof_area_atuacao"] = random_text(rng, n_rows, 2)
+    applicants["app_form_instituicao_ensino_superior"] = random_text(rng, n_rows, 3)
+    applicants["infos_basicas_email"] = [f"candidato{i}@exemplo.com" for i in range(n_rows)]
+    applicants.to_parquet(path)
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def measure_child(path, loader):
+    from src.inference.applicants import load_parquet
+
+    before = rss_mb()
+    df = pd.read_parquet(path) if loader == "read_parquet" else load_parquet(path)
+    after = rss_mb()
+    print(json.dumps({
+        "rss_delta_mb": after - before,
+        "frame_mb": df.memory_usage(deep=True).sum() / 2 ** 20,
+        "columns": len(df.columns)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=100_000)
+    parser.add_argument("--parquet", help="parquet existente (padrão: gera um sintético)")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(*args.child)
+        return
+
+    path = args.parquet
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "applicants_processed.parquet")
+        write_parquet(path, args.applicants)
+
+    print(f"{'carregamento':>14} {'colunas':>8} {'RSS (MB)':>9} {'DataFrame (MB)':>15}")
+    for loader in ["read_parquet", "load_parquet"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", path, loader], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{loader:>14} {result['columns']:>8} {result['rss_delta_mb']:>9.0f} {result['frame_mb']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
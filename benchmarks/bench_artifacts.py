@@ -0,0 +1,80 @@
+"""Inicialização de um worker: joblib + parquet + features x artefatos com mmap.
+
+Para uma base sintética, mede em processos separados (cache de páginas já
+quente, como no segundo worker de um servidor) o tempo e o RSS para deixar o
+modelo e as features dos candidatos prontos:
+  - joblib: joblib.load do modelo, load_parquet e ApplicantFeatures (motor numpy);
+  - artefatos: load_artifacts do diretório exportado.
+
+Uso: python benchmarks/bench_artifacts.py [--applicants 100000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+
+from benchmarks.synthetic import make_applicants
+
+MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def measure_child(mode, directory):
+    from src.inference.applicants import load_parquet
+    from src.inference.artifacts import latest_version, load_artifacts
+    from src.inference.features import ApplicantFeatures, SplitPipeline
+
+    before = rss_mb()
+    start = time.perf_counter()
+    if mode == "joblib":
+        model = joblib.load(MODEL_PATH)
+        ApplicantFeatures(SplitPipeline(model, "numpy"), load_parquet(os.path.join(directory, "applicants.parquet")), True)
+    else:
+        load_artifacts(latest_version(os.path.join(directory, "artifacts")))
+    print(json.dumps({"seconds": time.perf_counter() - start, "rss_delta_mb": rss_mb() - before}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=100_000)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(*args.child)
+        return
+
+    from src.inference.applicants import load_parquet
+    from src.inference.artifacts import export_artifacts
+
+    directory = tempfile.mkdtemp()
+    make_applicants(args.applicants).to_parquet(os.path.join(directory, "applicants.parquet"))
+    start = time.perf_counter()
+    export_artifacts(
+        joblib.load(MODEL_PATH), load_parquet(os.path.join(directory, "applicants.parquet")),
+        os.path.join(directory, "artifacts")
+    )
+    print(f"Exportação: {time.perf_counter() - start:.1f} s")
+
+    print(f"{'inicialização':>14} {'tempo (s)':>10} {'RSS (MB)':>9}")
+    for mode in ["joblib", "artefatos"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode, directory], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>14} {result['seconds']:>10.3f} {result['rss_delta_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark do /predict/batch: vagas por segundo x tamanho do lote e pico de RSS x CHUNK_ROWS.
+
+Uso: python benchmarks/bench_batch.py [--applicants 20000] [--batch-sizes 1 4 16 64]
+                                      [--chunk-rows 10000 50000 200000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from benchmarks.synthetic import make_applicants, make_job
+
+
+def build_client(n_applicants):
+    import src.routes.prediction as prediction
+
+    applicants = make_applicants(n_applicants)
+    app = prediction.create_prediction_route(Flask(__name__), applicants)
+    return app.test_client()
+
+
+def throughput(client, batch_size):
+    vagas = [make_job(seed) for seed in range(batch_size)]
+    start = time.perf_counter()
+    response = client.post("/predict/batch", json=vagas)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_json()
+    return batch_size / elapsed
+
+
+def peak_rss_child(n_applicants, batch_size, chunk_rows):
+    """Executado em um processo novo para medir o pico de RSS de um único lote."""
+    os.environ["PREDICT_CHUNK_ROWS"] = str(chunk_rows)
+    client = build_client(n_applicants)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    throughput(client, batch_size)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"baseline_mb": baseline / 1024, "peak_mb": peak / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=20_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--chunk-rows", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--child", type=int, nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        peak_rss_child(args.applicants, *args.child)
+        return
+
+    client = build_client(args.applicants)
+    print(f"{'lote':>6} {'vagas/s':>9}")
+    for batch_size in args.batch_sizes:
+        print(f"{batch_size:>6} {throughput(client, batch_size):>9.2f}")
+
+    batch_size = max(args.batch_sizes)
+    print(f"\n{'chunk_rows':>10} {'RSS base (MB)':>14} {'pico RSS (MB)':>14}  (lote de {batch_size} vagas)")
+    for chunk_rows in args.chunk_rows:
+        output = subprocess.run(
+            [sys.executable, __file__, "--applicants", str(args.applicants), "--child", str(batch_size), str(chunk_rows)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        rss = json.loads(output.strip().splitlines()[-1])
+        print(f"{chunk_rows:>10} {rss['baseline_mb']:>14.0f} {rss['peak_mb']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark do micro-batching de requisições concorrentes do /predict.
+
+Clientes concorrentes (threads, carga fechada) pedem o top-k de vagas
+diferentes contra a mesma base. Compara a pontuação direta (uma chamada ao
+rank_vagas por requisição) com o Coalescer para janelas diferentes: vazão,
+latência p50/p99 e tamanho médio dos lotes.
+
+Uso: python benchmarks/bench_coalescer.py [--rows 20000] [--clients 16] [--requests 8]
+                                          [--windows 5 10 20] [--workers 4] [--engine sklearn]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+
+
+def run_load(submit, vagas, clients, requests_per_client):
+    """Cada cliente envia requisições em sequência; retorna a duração total e as latências (ms)."""
+    latencies = [[] for _ in range(clients)]
+
+    def client(c):
+        for r in range(requests_per_client):
+            vaga = vagas[(c * requests_per_client + r) % len(vagas)]
+            start = time.perf_counter()
+            submit([vaga])
+            latencies[c].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.concatenate(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--windows", type=float, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4, help="threads que pontuam os lotes")
+    parser.add_argument("--engine", default="sklearn", choices=["sklearn", "numpy"])
+    args = parser.parse_args()
+
+    # O motor da floresta é lido do ambiente na importação da rota
+    os.environ["PREDICT_ENGINE"] = args.engine
+    os.environ["PREDICT_RESULT_CACHE_SIZE"] = "0"
+    from benchmarks.synthetic import make_applicants, make_job
+    from src.inference.coalescer import Coalescer
+    from src.inference.reload import ServingState
+    from src.routes import prediction
+
+    state = ServingState(prediction.model, make_applicants(args.rows), "bench", "bench")
+    prediction.feature_cache.get(state.model, state.applicants)
+    vagas = [make_job(seed) for seed in range(64)]
+    params = {"top_k": args.k}
+
+    print(f"{args.rows} candidatos, {args.clients} clientes x {args.requests} requisições, motor {args.engine}")
+    print(f"{'modo':>14} {'req/s':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'lote médio':>11}")
+    elapsed, latencies = run_load(
+        lambda v: prediction.rank_vagas(v, state, **params), vagas, args.clients, args.requests
+    )
+    total = args.clients * args.requests
+    print(f"{'direto':>14} {total / elapsed:>7.1f} {np.percentile(latencies, 50):>9.0f} "
+          f"{np.percentile(latencies, 99):>9.0f} {1.0:>11.1f}")
+
+    for window in args.windows:
+        coalescer = Coalescer(
+            lambda v, s, **p: prediction.rank_vagas(v, s, **p), window, args.max_batch,
+            max_wait_ms=60_000, key=prediction.coalescing_key, workers=args.workers
+        )
+        elapsed, latencies = run_load(lambda v: coalescer.submit(v, state, **params), vagas, args.clients, args.requests)
+        print(f"{f'janela {window:g} ms':>14} {total / elapsed:>7.1f} {np.percentile(latencies, 50):>9.0f} "
+              f"{np.percentile(latencies, 99):>9.0f} {coalescer.stats()['mean_batch']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
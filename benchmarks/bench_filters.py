@@ -0,0 +1,89 @@
+"""Benchmark dos filtros por coluna categórica (bitmaps) antes da Random Forest.
+
+Mostra, para filtros de seletividade crescente, a fração da base que passa,
+o tempo do select nos bitmaps e a latência por vaga do ranqueamento só sobre
+os candidatos filtrados, comparada com a pontuação de toda a base. Por fim,
+o custo de acrescentar deltas de candidatos ao índice (ingestão incremental),
+que não depende do tamanho da base, e do select sobre os segmentos.
+
+Uso: python benchmarks/bench_filters.py [--rows 50000] [--jobs 3] [--k 5] [--delta 100] [--deltas 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.inference.batch import rank_jobs
+from src.inference.features import ApplicantFeatures, SplitPipeline
+from src.inference.filters import BitmapIndex
+
+MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+FILTER_COLUMNS = ["app_prof_nivel_profissional", "app_form_nivel_academico", "app_form_nivel_ingles", "app_form_nivel_espanhol"]
+
+FILTERS = [
+    ("nenhum", None),
+    ("inglês >= Básico", {"app_form_nivel_ingles": ["Básico", "Intermediário", "Avançado", "Fluente"]}),
+    ("inglês >= Avançado", {"app_form_nivel_ingles": ["Avançado", "Fluente"]}),
+    ("inglês >= Avançado, Sênior", {"app_form_nivel_ingles": ["Avançado", "Fluente"], "app_prof_nivel_profissional": ["Sênior"]}),
+    ("+ Pós Graduação", {
+        "app_form_nivel_ingles": ["Avançado", "Fluente"], "app_prof_nivel_profissional": ["Sênior"],
+        "app_form_nivel_academico": ["Pós Graduação Completo", "Mestrado Completo"]
+    }),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--jobs", type=int, default=3)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--delta", type=int, default=100, help="candidatos por delta ingerido")
+    parser.add_argument("--deltas", type=int, default=20)
+    args = parser.parse_args()
+
+    applicants = make_applicants(args.rows)
+    pipeline = SplitPipeline(joblib.load(MODEL_PATH))
+    features = ApplicantFeatures(pipeline, applicants)
+    start = time.perf_counter()
+    index = BitmapIndex(applicants, FILTER_COLUMNS)
+    print(f"Índice de bitmaps: {(time.perf_counter() - start) * 1000:.0f} ms para {args.rows} candidatos")
+    job_blocks = pipeline.transform_jobs([make_job(seed) for seed in range(args.jobs)])
+
+    print(f"{'filtro':>28} {'fração':>7} {'select (ms)':>12} {'ms/vaga':>9}")
+    for name, filters in FILTERS:
+        start = time.perf_counter()
+        allowed = index.select(filters) if filters else None
+        select_ms = (time.perf_counter() - start) * 1000
+        n_rows = args.rows if allowed is None else len(allowed)
+        rows_of = (lambda rows: rows) if allowed is None else (lambda rows: allowed[rows])
+
+        start = time.perf_counter()
+        for blocks in job_blocks:
+            rank_jobs(lambda jobs, rows: features.predict_proba([blocks], rows_of(rows)), 1, n_rows, args.k)
+        elapsed = (time.perf_counter() - start) * 1000 / len(job_blocks)
+        print(f"{name:>28} {n_rows / args.rows:>7.1%} {select_ms:>12.2f} {elapsed:>9.1f}")
+
+    delta = make_applicants(args.delta)
+    extended = index
+    start = time.perf_counter()
+    for _ in range(args.deltas):
+        extended = extended.extend(delta)
+    extend_ms = (time.perf_counter() - start) * 1000 / args.deltas
+    start = time.perf_counter()
+    extended.select(FILTERS[-1][1])
+    select_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    compacted = extended.compact()
+    compact_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    compacted.select(FILTERS[-1][1])
+    print(f"Ingestão de {args.deltas} deltas de {args.delta}: extend {extend_ms:.2f} ms/delta, select {select_ms:.2f} ms; "
+          f"compactados em {compact_ms:.1f} ms, select {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
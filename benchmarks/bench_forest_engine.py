@@ -0,0 +1,57 @@
+"""Benchmark do motor NumPy da Random Forest contra o predict_proba do sklearn.
+
+Compara, para a mesma base de candidatos e a mesma vaga:
+  - sklearn: RandomForestClassifier.predict_proba sobre a matriz montada;
+  - numpy (descida): ForestEngine.predict_proba sobre a mesma matriz CSR;
+  - numpy (folhas): incidência candidato x folha pré-calculada (PREDICT_ENGINE=numpy).
+
+Uso: python benchmarks/bench_forest_engine.py [--sizes 10000 50000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+import numpy as np
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.inference.features import ApplicantFeatures, SplitPipeline
+
+MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    classifier = model.named_steps["classifier"]
+    pipeline, conversion_time = timed(SplitPipeline, model, "numpy")
+    print(f"Conversão da floresta: {conversion_time * 1000:.1f} ms")
+
+    print(f"{'candidatos':>10} {'sklearn (s)':>12} {'descida (s)':>12} {'folhas (s)':>11} "
+          f"{'speedup':>8} {'max |dif|':>10} {'pré-cálculo (s)':>16}")
+    for n_rows in args.sizes:
+        features, build_time = timed(ApplicantFeatures, pipeline, make_applicants(n_rows))
+        job_blocks = pipeline.transform_jobs([make_job()])
+        matrix = pipeline.assemble(features.blocks, job_blocks[0])
+
+        expected, sklearn_time = timed(classifier.predict_proba, matrix)
+        traversal, traversal_time = timed(pipeline.engine.predict_proba, matrix)
+        leaves, leaves_time = timed(features.predict_proba, job_blocks)
+        diff = max(np.abs(traversal - expected).max(), np.abs(leaves[0] - expected).max())
+        print(f"{n_rows:>10} {sklearn_time:>12.3f} {traversal_time:>12.3f} {leaves_time:>11.3f} "
+              f"{sklearn_time / leaves_time:>7.1f}x {diff:>10.1e} {build_time:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
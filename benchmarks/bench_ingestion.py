@@ -0,0 +1,67 @@
+"""Benchmark do custo por ingestão (POST /applicants) em função do tamanho da base.
+
+Mede ingest_applicants com um candidato novo por chamada sobre bases
+realistas (benchmarks/synthetic.py) de tamanhos crescentes. O modelo é
+substituído por um objeto sem suporte ao cache de features, então o tempo
+medido é só a parte da ingestão que não depende do modelo: conferência dos IDs
+já presentes, junção da base com o delta, extensão dos bitmaps dos filtros e
+gravação do segmento. Esse custo deve acompanhar o tamanho do delta, não o da
+base; só a primeira ingestão de cada base monta o conjunto de IDs dela.
+
+Uso: python benchmarks/bench_ingestion.py [--sizes 10000 100000 1000000] [--ingestions 20]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+
+
+def record(applicant_id):
+    return {
+        "infos_basicas": {"codigo_profissional": applicant_id},
+        "cv_pt": "analista de dados python sql",
+        "informacoes_profissionais": {"conhecimentos_tecnicos": "python sql", "nivel_profissional": "Pleno"},
+        "formacao_e_idiomas": {"nivel_academico": "Ensino Superior Completo", "nivel_ingles": "Avançado"}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--ingestions", type=int, default=20)
+    args = parser.parse_args()
+
+    from unittest.mock import patch
+    from benchmarks.synthetic import make_realistic_applicants
+    from src.inference.ingestion import DeltaStore
+    from src.routes import prediction
+
+    for size in args.sizes:
+        base = make_realistic_applicants(size)
+        directory = tempfile.mkdtemp()
+        with patch.multiple(prediction, model=object(), applicants=base, DATA_VERSION="d0", cascade_model=None,
+                            served_state=None, delta_store=DeltaStore(directory, max_segments=10 ** 6)):
+            start = time.perf_counter()
+            prediction.set_serving_state(prediction.prepare_state(prediction.serving_snapshot()))
+            prepare_seconds = time.perf_counter() - start
+
+            timings = []
+            for i in range(args.ingestions):
+                start = time.perf_counter()
+                summary = prediction.ingest_applicants([record(f"novo-{i}")])
+                timings.append((time.perf_counter() - start) * 1000)
+            assert summary["total"] == size + args.ingestions
+        shutil.rmtree(directory, ignore_errors=True)
+        # A primeira ingestão monta o conjunto de IDs da base (uma vez por base carregada)
+        print(f"{size:>9} candidatos: preparo da versão {prepare_seconds:.2f}s, ingestão de 1 candidato: "
+              f"primeira {timings[0]:.1f} ms, demais p50 {np.percentile(timings[1:], 50):.1f} ms, "
+              f"máx {max(timings[1:]):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
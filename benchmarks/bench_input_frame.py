@@ -0,0 +1,55 @@
+"""Benchmark da montagem do DataFrame de entrada do /predict.
+
+Compara o loop original com iterrows com a versão vetorizada em
+src.routes.prediction.build_input_frame.
+
+Uso: python benchmarks/bench_input_frame.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.inference.schema import EXPECTED_FEATURES
+from src.routes.prediction import build_input_frame
+
+
+def legacy_input_frame(vaga_data, applicants):
+    """Implementação original com iterrows, mantida apenas para comparação."""
+    input_data = []
+    for _, applicant_row in applicants.iterrows():
+        combined_record = vaga_data.copy()
+        for feature in applicants.columns:
+            if feature in EXPECTED_FEATURES:
+                combined_record[feature] = applicant_row[feature]
+        input_data.append(combined_record)
+    return pd.DataFrame(input_data, columns=EXPECTED_FEATURES)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    vaga_data = make_job()
+    print(f"{'candidatos':>12} {'iterrows (s)':>14} {'vetorizado (s)':>15} {'speedup':>9}")
+    for n_rows in args.sizes:
+        applicants = make_applicants(n_rows)
+        legacy_df, legacy_time = timed(legacy_input_frame, vaga_data, applicants)
+        vector_df, vector_time = timed(build_input_frame, vaga_data, applicants)
+        pd.testing.assert_frame_equal(vector_df, legacy_df, check_dtype=False)
+        print(f"{n_rows:>12} {legacy_time:>14.3f} {vector_time:>15.4f} {legacy_time / vector_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark do custo da instrumentação por etapa do /predict.
+
+Mede o custo de um metrics.stage() vazio (desativado, ativado e com trace de
+debug) e a latência do /predict pelo cliente de teste do Flask com as
+métricas desativadas e ativadas, alternando as rodadas para não favorecer
+nenhum dos lados.
+
+Uso: python benchmarks/bench_metrics.py [--rows 20000] [--requests 40] [--rounds 3]
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+
+
+def stage_cost(metrics, number=200_000):
+    """Custo médio (ns) de entrar e sair de um metrics.stage(), descontada a chamada vazia."""
+    def run():
+        with metrics.stage("bench"):
+            pass
+
+    def empty():
+        pass
+    best = lambda f: min(timeit.repeat(f, number=number, repeat=3)) / number * 1e9
+    return best(run) - best(empty)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["PREDICT_RESULT_CACHE_SIZE"] = "0"
+    from flask import Flask
+    from benchmarks.synthetic import make_applicants, make_job
+    from src.inference.metrics import Metrics, metrics
+    from src.routes import prediction
+
+    probe = Metrics(enabled=False)
+    print(f"stage() desativado: {stage_cost(probe):.0f} ns")
+    probe.enabled = True
+    print(f"stage() ativado:    {stage_cost(probe):.0f} ns")
+    probe.enabled = False
+    probe.start_trace()
+    print(f"stage() com trace:  {stage_cost(probe, 20_000):.0f} ns")
+    probe.end_trace()
+
+    client = prediction.create_prediction_route(Flask(__name__), make_applicants(args.rows)).test_client()
+    vagas = [make_job(seed) for seed in range(args.requests)]
+    client.post("/predict", json=vagas[0])
+
+    latencies = {False: [], True: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            metrics.enabled = enabled
+            for vaga in vagas:
+                start = time.perf_counter()
+                client.post("/predict?k=10", json=vaga)
+                latencies[enabled].append((time.perf_counter() - start) * 1000)
+
+    for enabled, values in latencies.items():
+        print(f"métricas {'ativadas' if enabled else 'desativadas'}: p50 {np.percentile(values, 50):.2f} ms, "
+              f"média {np.mean(values):.2f} ms ({len(values)} requisições, {args.rows} candidatos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Tempo e memória do preparo dos dados de treino: script original x streaming x por entidade.
+
+Gera vagas.json, applicants.json e prospects.json sintéticos (no formato da
+Decision) e roda, em processos separados e sobre a mesma entrada,
+prepare_data (json.load + pickle), prepare_data_streaming (row groups) e
+prepare_data_entities (normalização por vaga/candidato + parquet
+particionado), medindo o tempo, o pico de RSS (VmHWM), o tamanho da saída e
+o tempo de leitura da base de treino (load_prepared / read_pickle).
+
+Uso: python benchmarks/bench_preparation.py [--applicants 50000] [--prospects-per-vaga 10] [--batch-size 10000] [--data-dir caminho]
+                                            [--report relatorio.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+
+from benchmarks.synthetic import NIVEIS_ACADEMICOS, NIVEIS_IDIOMA, NIVEIS_PROFISSIONAIS, random_text
+
+STATUS = ["Contratado pela Decision", "Não Aprovado pelo RH", "Encaminhado ao Requisitante", "Desistiu", "Recusado"]
+
+
+def write_data(data_dir, n_applicants, n_vagas, prospects_per_vaga=10):
+    rng = np.random.default_rng(3)
+    vagas = {
+        str(v): {
+            "informacoes_basicas": {"titulo_vaga": text, "cliente": "Cliente"},
+            "perfil_vaga": {
+                "nivel profissional": str(rng.choice(NIVEIS_PROFISSIONAIS)),
+                "nivel_academico": str(rng.choice(NIVEIS_ACADEMICOS)),
+                "nivel_ingles": str(rng.choice(NIVEIS_IDIOMA)),
+                "principais_atividades": activities,
+                "competencia_tecnicas_e_comportamentais": text
+            },
+            "beneficios": {"valor_venda": "-"}
+        }
+        for v, text, activities in zip(range(n_vagas), random_text(rng, n_vagas, 8), random_text(rng, n_vagas, 60))
+    }
+    cvs = random_text(rng, n_applicants, 400)
+    applicants = {
+        str(a): {
+            "infos_basicas": {"codigo_profissional": str(a), "nome": f"Candidato {a}"},
+            "informacoes_pessoais": {"data_nascimento": "01-01-1990"},
+            "informacoes_profissionais": {
+                "conhecimentos_tecnicos": skills, "nivel_profissional": str(rng.choice(NIVEIS_PROFISSIONAIS))
+            },
+            "formacao_e_idiomas": {
+                "nivel_academico": str(rng.choice(NIVEIS_ACADEMICOS)), "nivel_ingles": str(rng.choice(NIVEIS_IDIOMA))
+            },
+            "cargo_atual": {},
+            "cv_pt": cv,
+            "cv_en": ""
+        }
+        for a, cv, skills in zip(range(n_applicants), cvs, random_text(rng, n_applicants, 8))
+    }
+    prospects = {
+        str(v): {
+            "titulo": f"Vaga {v}",
+            "prospects": [
+                {"codigo": str(a), "situacao_candidado": str(rng.choice(STATUS))}
+                for a in rng.integers(0, n_applicants, prospects_per_vaga)
+            ]
+        }
+        for v in range(n_vagas)
+    }
+    for name, data in [("vagas", vagas), ("applicants", applicants), ("prospects", prospects)]:
+        with open(os.path.join(data_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def peak_rss_mb():
+    # VmHWM é do processo atual (ru_maxrss herdaria o pico do processo que gerou os dados)
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def output_mb(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 2 ** 20
+    return os.path.getsize(path) / 2 ** 20
+
+
+def measure_child(data_dir, mode, batch_size):
+    import pandas as pd
+    from src.modeltraining.data_preparation import load_prepared, prepare_data, prepare_data_entities, prepare_data_streaming
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            if mode == "in_memory":
+                output = os.path.join(data_dir, "processed_data.pkl")
+                prepare_data(data_dir, output)
+            elif mode == "streaming":
+                output = prepare_data_streaming(data_dir, batch_size=int(batch_size))
+            else:
+                output = prepare_data_entities(data_dir, batch_size=int(batch_size))
+        finally:
+            sys.stdout = stdout
+    seconds, peak = time.perf_counter() - start, peak_rss_mb()
+
+    # Leitura da base de treino como o model_training faz (com o join, no caso do preparo por entidade)
+    start = time.perf_counter()
+    df = pd.read_pickle(output) if mode == "in_memory" else load_prepared(output)
+    print(json.dumps({
+        "seconds": seconds,
+        "peak_rss_mb": peak,
+        "output_mb": output_mb(output),
+        "load_seconds": time.perf_counter() - start,
+        "rows": len(df)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=50_000)
+    parser.add_argument("--vagas", type=int, default=10_000)
+    parser.add_argument("--prospects-per-vaga", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--data-dir", help="diretório com os JSONs (padrão: gera sintéticos)")
+    parser.add_argument("--report", help="gravar o relatório em JSON neste arquivo")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(*args.child)
+        return
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp()
+        write_data(data_dir, args.applicants, args.vagas, args.prospects_per_vaga)
+    input_mb = sum(os.path.getsize(os.path.join(data_dir, f"{name}.json"))
+                   for name in ["vagas", "applicants", "prospects"]) / 2 ** 20
+    print(f"JSONs de entrada: {input_mb:.0f} MB")
+
+    report = {"input_mb": input_mb, "batch_size": args.batch_size, "results": {}}
+    print(f"{'preparo':>10} {'tempo (s)':>10} {'pico RSS (MB)':>14} {'saída (MB)':>11} {'leitura (s)':>12} {'linhas':>8}")
+    for mode in ["in_memory", "streaming", "entities"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", data_dir, mode, str(args.batch_size)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = report["results"][mode] = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>10} {result['seconds']:>10.1f} {result['peak_rss_mb']:>14.0f} {result['output_mb']:>11.0f} "
+              f"{result['load_seconds']:>12.1f} {result['rows']:>8}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
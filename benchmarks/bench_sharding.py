@@ -0,0 +1,64 @@
+"""Latência da pontuação em shards (ShardedScorer) conforme o número de processos.
+
+Para cada quantidade de workers, cria o pool uma vez e mede a mediana de
+várias rodadas de ranqueamento de uma vaga contra toda a base sintética.
+
+Uso: python benchmarks/bench_sharding.py [--applicants 200000] [--workers 1 2 4 8] [--engine numpy]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+import numpy as np
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.inference.batch import rank_jobs
+from src.inference.features import ApplicantFeatures, SplitPipeline
+from src.inference.sharding import ShardedScorer
+
+MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+
+
+def median_seconds(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--shard-rows", type=int, default=None, help="padrão: base / workers")
+    parser.add_argument("--engine", choices=["sklearn", "numpy"], default="numpy")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    features = ApplicantFeatures(SplitPipeline(model, args.engine), make_applicants(args.applicants))
+    job_blocks = features.pipeline.transform_jobs([make_job(0)])
+    print(f"{args.applicants} candidatos, motor {args.engine}, {os.cpu_count()} CPUs visíveis")
+
+    baseline = median_seconds(lambda: rank_jobs(
+        lambda jobs, rows: features.predict_proba([job_blocks[j] for j in jobs], rows),
+        1, features.n_rows, 5, chunk_rows=50_000
+    ), args.repeat)
+    print(f"{'workers':>8} {'latência (s)':>13} {'speedup':>8}")
+    print(f"{'-':>8} {baseline:>13.3f} {1.0:>8.2f}")
+
+    for workers in args.workers:
+        shard_rows = args.shard_rows or -(-args.applicants // workers)
+        scorer = ShardedScorer(features, workers, shard_rows)
+        seconds = median_seconds(lambda: scorer.rank(job_blocks, 5), args.repeat)
+        scorer.close()
+        print(f"{workers:>8} {seconds:>13.3f} {baseline / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
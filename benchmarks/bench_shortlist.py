@@ -0,0 +1,57 @@
+"""Benchmark da pré-seleção por índice invertido antes da Random Forest.
+
+Mostra a latência por vaga com pontuação exaustiva e com pré-seleção de M
+candidatos para bases de tamanhos diferentes, e o recall@k médio de cada M.
+
+Uso: python benchmarks/bench_shortlist.py [--sizes 10000 50000 100000] [--shortlists 200 1000 5000]
+                                          [--k 5] [--jobs 5] [--engine sklearn]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+import numpy as np
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.inference.batch import rank_jobs
+from src.inference.features import ApplicantFeatures, SplitPipeline
+from src.inference.retrieval import rank_shortlisted
+
+MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--shortlists", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--engine", default="sklearn", choices=["sklearn", "numpy"])
+    args = parser.parse_args()
+
+    pipeline = SplitPipeline(joblib.load(MODEL_PATH), args.engine)
+    job_blocks = pipeline.transform_jobs([make_job(seed) for seed in range(args.jobs)])
+
+    print(f"{'candidatos':>10} {'M':>7} {'ms/vaga':>9} {'recall@k':>9}")
+    for n_rows in args.sizes:
+        features = ApplicantFeatures(pipeline, make_applicants(n_rows), term_index=True)
+
+        start = time.perf_counter()
+        for blocks in job_blocks:
+            rank_jobs(lambda jobs, rows: features.predict_proba([blocks], rows), 1, n_rows, args.k)
+        elapsed = (time.perf_counter() - start) / len(job_blocks)
+        print(f"{n_rows:>10} {'todos':>7} {elapsed * 1000:>9.1f} {1.0:>9.2f}")
+
+        for size in args.shortlists:
+            start = time.perf_counter()
+            rank_shortlisted(features, job_blocks, args.k, size=size)
+            elapsed = (time.perf_counter() - start) / len(job_blocks)
+            _, info = rank_shortlisted(features, job_blocks, args.k, size=size, report_recall=True)
+            print(f"{n_rows:>10} {size:>7} {elapsed * 1000:>9.1f} {np.mean(info['recalls']):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Micro-benchmarks de cada etapa do /predict, de mil a um milhão de candidatos.
+
+Cada tamanho roda em um processo separado: gera a base realista
+(benchmarks/synthetic.py), monta as features dos candidatos como na
+inicialização da API e envia vagas ao /predict pelo cliente de teste do
+Flask com X-Debug-Timing: 1. As durações de cada etapa (validate, tfidf_i,
+onehot, assemble, classifier, format, serialize...) vêm do header
+Server-Timing, a mesma instrumentação exposta em /metrics. O modelo é um
+Pipeline com a estrutura do train_model treinado na base sintética (ou
+--model). Um tamanho que não cabe na memória aparece como erro no resultado.
+
+Uso: python benchmarks/bench_stages.py [--sizes 1000 10000 100000 1000000] [--jobs 5] [--k 10]
+                                       [--params "shortlist=500"] [--model modelo.joblib] [--output res.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+import numpy as np
+
+from benchmarks.report import peak_rss_mb, write_result
+
+
+def parse_server_timing(header):
+    """"validate;dur=0.1, rank;dur=2.0" -> {"validate": 0.1, "rank": 2.0} (ms)."""
+    stages = {}
+    for entry in header.split(","):
+        name, _, duration = entry.strip().partition(";dur=")
+        stages[name] = float(duration)
+    return stages
+
+
+def serving_env(directory, model_path):
+    """Ambiente da API isolado dos arquivos do projeto (artefatos, deltas, tabela e cascata)."""
+    return dict(
+        os.environ,
+        PREDICT_MODEL=model_path,
+        PREDICT_ARTIFACTS=os.path.join(directory, "artifacts"),
+        PREDICT_DELTA_PATH=os.path.join(directory, "delta"),
+        PREDICT_RANKING_TABLE=os.path.join(directory, "rankings.parquet"),
+        PREDICT_CASCADE_MODEL=os.path.join(directory, "model_lr.joblib"),
+        PREDICT_RESULT_CACHE_SIZE="0",
+        PREDICT_METRICS="1"
+    )
+
+
+def synthetic_model(directory, train_rows, trees):
+    """Treinar o Pipeline sintético e salvar no diretório; retorna o caminho."""
+    from benchmarks.synthetic import train_pipeline
+
+    start = time.perf_counter()
+    path = os.path.join(directory, "model_rf.joblib")
+    joblib.dump(train_pipeline(train_rows, n_estimators=trees), path)
+    print(f"Modelo sintético ({train_rows} linhas, {trees or 100} árvores) treinado em "
+          f"{time.perf_counter() - start:.0f}s")
+    return path
+
+
+def measure_child(size, n_jobs, k, params):
+    from contextlib import redirect_stdout
+    from flask import Flask
+    from benchmarks.synthetic import make_realistic_applicants, make_realistic_jobs
+
+    with redirect_stdout(sys.stderr):
+        from src.routes import prediction
+        applicants = make_realistic_applicants(size)
+        vagas = make_realistic_jobs(n_jobs + 1, seed=size)
+
+        start = time.perf_counter()
+        prediction.feature_cache.get(prediction.model, applicants)
+        applicant_seconds = time.perf_counter() - start
+        client = prediction.create_prediction_route(Flask(__name__), applicants).test_client()
+
+        url = f"/predict?k={k}" + (f"&{params}" if params else "")
+        headers = {"X-Debug-Timing": "1", "X-Cache-Bypass": "1"}
+        client.post(url, json=vagas[0], headers=headers)
+        timings = []
+        for vaga in vagas[1:]:
+            response = client.post(url, json=vaga, headers=headers)
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict respondeu {response.status_code}: {response.get_data(as_text=True)}")
+            timings.append(parse_server_timing(response.headers["Server-Timing"]))
+
+    names = list(dict.fromkeys(name for timing in timings for name in timing))
+    print(json.dumps({
+        "applicant_features_s": applicant_seconds,
+        "stages_ms": {name: float(np.median([timing.get(name, 0.0) for timing in timings])) for name in names},
+        "peak_rss_mb": peak_rss_mb()
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--jobs", type=int, default=5, help="vagas medidas por tamanho (mediana)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--params", default="", help="query string extra do /predict (ex.: shortlist=500)")
+    parser.add_argument("--model", help="modelo joblib (padrão: Pipeline treinado na base sintética)")
+    parser.add_argument("--train-rows", type=int, default=10_000)
+    parser.add_argument("--trees", type=int, default=None, help="árvores do modelo sintético (padrão: 100)")
+    parser.add_argument("--output", help="arquivo JSON (padrão: benchmarks/results/bench_stages-<commit>.json)")
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        size, n_jobs, k, params = args.child
+        measure_child(int(size), int(n_jobs), int(k), params)
+        return
+
+    directory = tempfile.mkdtemp()
+    model_path = os.path.abspath(args.model) if args.model else synthetic_model(directory, args.train_rows, args.trees)
+    env = serving_env(directory, model_path)
+
+    results = {}
+    for size in args.sizes:
+        process = subprocess.run(
+            [sys.executable, __file__, "--child", str(size), str(args.jobs), str(args.k), args.params],
+            capture_output=True, text=True, env=env
+        )
+        if process.returncode != 0:
+            # -9: processo encerrado pelo sistema (memória)
+            lines = process.stderr.strip().splitlines()
+            results[str(size)] = {"error": lines[-1] if lines else f"código de saída {process.returncode}"}
+            print(f"{size:>9} candidatos: erro ({results[str(size)]['error']})")
+            continue
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        results[str(size)] = result
+        stages = ", ".join(f"{name} {ms:.1f}" for name, ms in result["stages_ms"].items())
+        print(f"{size:>9} candidatos: features dos candidatos {result['applicant_features_s']:.1f}s, "
+              f"pico de RSS {result['peak_rss_mb']:.0f} MB\n{'':>11}etapas (ms): {stages}")
+
+    config = {"sizes": args.sizes, "jobs": args.jobs, "k": args.k, "params": args.params,
+              "model": args.model or f"sintético ({args.train_rows} linhas, {args.trees or 100} árvores)"}
+    write_result("bench_stages", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
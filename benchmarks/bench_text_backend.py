@@ -0,0 +1,151 @@
+"""Backends de texto do treino: TfidfVectorizer (vocabulário) x HashingTfidfVectorizer (hashing + idf denso).
+
+Gera a base de treino realista (benchmarks/synthetic.py: vocabulário de Zipf,
+textos de comprimento realista, target que cresce com os termos em comum
+entre candidato e vaga) e mede, para cada backend e em processos separados:
+pico de RSS só do fit de um vetorizador na maior coluna de texto (o que o
+backend aprende), tempo de fit do pré-processamento, pico de RSS do fit do
+pré-processamento como no train_model (inclui as matrizes de saída), vazão do
+transform (linhas/s), tamanho do pré-processamento e do pipeline salvos
+(joblib), RSS acrescida ao carregar o pré-processamento salvo e ROC AUC da
+Random Forest do train_model no conjunto de teste.
+
+Uso: python benchmarks/bench_text_backend.py [--rows 40000] [--hash-features 16384] [--output res.json]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+import pandas as pd
+
+from benchmarks.report import peak_rss_mb, write_result
+
+BACKENDS = ["tfidf", "hashing"]
+
+
+def measure_load(path):
+    """RSS acrescida ao carregar o pré-processamento salvo (módulos já importados antes da medição)."""
+    import sklearn.compose  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+    import sklearn.preprocessing  # noqa: F401
+    import src.inference.text_hashing  # noqa: F401
+
+    rss_before = peak_rss_mb()
+    preprocessor = joblib.load(path)
+    print(json.dumps({"load_rss_mb": peak_rss_mb() - rss_before, "transformers": len(preprocessor.transformers_)}))
+
+
+def measure_vectorizer(data_path, backend):
+    """Pico de RSS só do fit (aprender vocabulário/idf) de um vetorizador na maior coluna de texto (cv_pt)."""
+    from src.modeltraining.model_training import text_vectorizer
+
+    texts = pd.read_pickle(data_path)["cv_pt"].fillna("")
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    text_vectorizer(backend).fit(texts)
+    print(json.dumps({"vectorizer_fit_seconds": time.perf_counter() - start,
+                      "vectorizer_fit_rss_mb": peak_rss_mb() - rss_before}))
+
+
+def measure_child(data_path, backend):
+    from contextlib import redirect_stdout
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+    from src.modeltraining.model_training import build_preprocessor, model_heads, select_features
+
+    with redirect_stdout(io.StringIO()):
+        X, y, text_features, categorical_features = select_features(pd.read_pickle(data_path))
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+
+    rss_before = peak_rss_mb()
+    preprocessor = build_preprocessor(text_features, categorical_features, backend)
+    start = time.perf_counter()
+    Xt_train = preprocessor.fit_transform(X_train)
+    fit_seconds = time.perf_counter() - start
+    fit_rss = peak_rss_mb() - rss_before
+
+    start = time.perf_counter()
+    Xt_test = preprocessor.transform(X_test)
+    transform_rows_per_s = len(X_test) / (time.perf_counter() - start)
+
+    _, steps, _ = model_heads(1)["Random Forest"]
+    head = Pipeline(steps).fit(Xt_train, y_train)
+    auc = roc_auc_score(y_test, head.predict_proba(Xt_test)[:, 1])
+
+    sizes = {}
+    for name, obj in [("preprocessor", preprocessor), ("pipeline", Pipeline([("preprocessor", preprocessor)] + head.steps))]:
+        buffer = io.BytesIO()
+        joblib.dump(obj, buffer)
+        sizes[name] = buffer.tell() / 2 ** 20
+
+    # Memória do pré-processamento carregado, medida em outro processo como na API
+    preprocessor_path = os.path.join(os.path.dirname(data_path), f"preprocessor_{backend}.joblib")
+    joblib.dump(preprocessor, preprocessor_path)
+    output = subprocess.run([sys.executable, __file__, "--load", preprocessor_path], capture_output=True, text=True,
+                            check=True).stdout
+    load_rss = json.loads(output.strip().splitlines()[-1])["load_rss_mb"]
+    print(json.dumps({
+        "fit_seconds": fit_seconds,
+        "fit_peak_rss_mb": fit_rss,
+        "transform_rows_per_s": transform_rows_per_s,
+        "preprocessor_mb": sizes["preprocessor"],
+        "pipeline_mb": sizes["pipeline"],
+        "load_rss_mb": load_rss,
+        "features": Xt_train.shape[1],
+        "roc_auc": auc
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=40_000)
+    parser.add_argument("--hash-features", type=int, default=2 ** 14)
+    parser.add_argument("--output", help="arquivo JSON (padrão: benchmarks/results/bench_text_backend-<commit>.json)")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--load", help=argparse.SUPPRESS)
+    parser.add_argument("--vectorizer", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(*args.child)
+        return
+    if args.load:
+        measure_load(args.load)
+        return
+    if args.vectorizer:
+        measure_vectorizer(*args.vectorizer)
+        return
+
+    from benchmarks.synthetic import make_realistic_training_frame
+
+    data_path = os.path.join(tempfile.mkdtemp(), "processed_data.pkl")
+    make_realistic_training_frame(args.rows).to_pickle(data_path)
+    env = dict(os.environ, HASH_FEATURES=str(args.hash_features))
+
+    def run(*child):
+        output = subprocess.run([sys.executable, __file__, *child], capture_output=True, text=True, check=True,
+                                env=env).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    results = {}
+    print(f"{'backend':>8} {'fit cv_pt (MB)':>15} {'fit (s)':>8} {'RSS fit (MB)':>13} {'transform (linhas/s)':>21} "
+          f"{'preproc (MB)':>13} {'RSS carga (MB)':>15} {'pipeline (MB)':>14} {'features':>9} {'ROC AUC':>8}")
+    for backend in BACKENDS:
+        r = results[backend] = dict(run("--vectorizer", data_path, backend), **run("--child", data_path, backend))
+        print(f"{backend:>8} {r['vectorizer_fit_rss_mb']:>15.0f} {r['fit_seconds']:>8.1f} {r['fit_peak_rss_mb']:>13.0f} "
+              f"{r['transform_rows_per_s']:>21.0f} {r['preprocessor_mb']:>13.2f} {r['load_rss_mb']:>15.1f} "
+              f"{r['pipeline_mb']:>14.2f} {r['features']:>9} {r['roc_auc']:>8.4f}")
+
+    write_result("bench_text_backend", {"rows": args.rows, "hash_features": args.hash_features}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark do orçamento de threads da inferência com vários workers.
+
+Simula W workers do servidor (processos com fork, como o gunicorn) pontuando
+vagas ao mesmo tempo contra a mesma base, com configurações diferentes de
+threads por worker: o n_jobs salvo no modelo (-1 = todos os núcleos em cada
+worker), o orçamento automático (núcleos / workers, ver src/inference/threads.py)
+e 1 thread. Mostra vazão e latência p50/p99 por combinação; a melhor
+configuração de cada W é marcada com *.
+
+Uso: python benchmarks/bench_threads.py [--rows 20000] [--workers 1 2 4 8] [--requests 6]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import joblib
+import numpy as np
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.inference.batch import rank_jobs
+from src.inference.features import ApplicantFeatures, SplitPipeline
+from src.inference.threads import available_cpus, set_n_jobs, thread_budget
+
+MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+
+# Definidas no processo principal antes do fork
+features = None
+job_blocks = None
+
+
+def worker(threads, n_requests, barrier, results):
+    from threadpoolctl import threadpool_limits
+    set_n_jobs(features.pipeline.classifier, threads)
+    limit = None if threads == -1 else threads
+    with threadpool_limits(limits=limit):
+        barrier.wait()
+        latencies = []
+        for r in range(n_requests):
+            blocks = job_blocks[r % len(job_blocks)]
+            start = time.perf_counter()
+            rank_jobs(lambda jobs, rows: features.predict_proba([blocks], rows), 1, features.n_rows, 5)
+            latencies.append((time.perf_counter() - start) * 1000)
+    results.put(latencies)
+
+
+def run(workers, threads, n_requests):
+    context = multiprocessing.get_context("fork")
+    barrier, results = context.Barrier(workers + 1), context.Queue()
+    processes = [context.Process(target=worker, args=(threads, n_requests, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    latencies = np.concatenate([results.get() for _ in processes])
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    global features, job_blocks
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=6)
+    args = parser.parse_args()
+
+    features = ApplicantFeatures(SplitPipeline(joblib.load(MODEL_PATH)), make_applicants(args.rows))
+    job_blocks = features.pipeline.transform_jobs([make_job(seed) for seed in range(8)])
+    cpus = available_cpus()
+    print(f"{cpus} núcleos disponíveis (afinidade/cgroup), {args.rows} candidatos")
+
+    print(f"{'workers':>7} {'threads':>16} {'req/s':>7} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for workers in args.workers:
+        budget = thread_budget(workers, cpus=cpus)
+        settings = [("-1 (sem limite)", -1), (f"{budget} (orçamento)", budget)]
+        if budget != 1:
+            settings.append(("1", 1))
+        rows = [(name, *run(workers, threads, args.requests)) for name, threads in settings]
+        best = max(rows, key=lambda row: row[1])
+        for name, throughput, p50, p99 in rows:
+            mark = "*" if name == best[0] else " "
+            print(f"{workers:>7} {name:>16} {throughput:>7.1f} {p50:>9.0f} {p99:>9.0f} {mark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tempo total do treino: fluxo antigo (pré-processamento ajustado duas vezes, modelos em sequência)
+x train_model (pré-processamento ajustado uma vez, em cache, e modelos em paralelo).
+
+Gera uma base de treino sintética no formato do processed_data.pkl e mede o
+wall-clock de cada variante; train_model roda com o cache vazio e de novo com
+o cache já preenchido.
+
+Uso: python benchmarks/bench_training.py [--rows 40000] [--cores 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.synthetic import make_applicants, make_job
+from src.modeltraining.model_training import available_cores, build_preprocessor, select_features, train_model
+
+
+def make_training_frame(n_rows, seed=0):
+    """Base sintética de prospects: candidatos + vagas + target."""
+    rng = np.random.default_rng(seed)
+    df = make_applicants(n_rows, seed=seed)
+    jobs = pd.DataFrame([make_job(seed=i) for i in range(max(1, n_rows // 20))])
+    df = pd.concat([df, jobs.iloc[rng.integers(0, len(jobs), n_rows)].reset_index(drop=True)], axis=1)
+    df["ID_VAGA"] = rng.integers(0, len(jobs), n_rows).astype(str)
+    df["target"] = (rng.random(n_rows) < 0.3).astype(int)
+    return df
+
+
+def train_sequential(df):
+    """Fluxo anterior do train_model: o mesmo preprocessor dentro dos dois Pipelines, um depois do outro."""
+    X, y, text_features, categorical_features = select_features(df)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+    preprocessor = build_preprocessor(text_features, categorical_features)
+    pipeline_lr = Pipeline([
+        ('preprocessor', preprocessor),
+        ('scaler', StandardScaler(with_mean=False)),
+        ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced', C=0.1))
+    ])
+    pipeline_lr.fit(X_train, y_train)
+    pipeline_lr.predict_proba(X_test)
+    pipeline_rf = Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', max_depth=10, n_jobs=-1))
+    ])
+    pipeline_rf.fit(X_train, y_train)
+    pipeline_rf.predict_proba(X_test)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=40_000)
+    parser.add_argument("--cores", type=int, default=0, help="núcleos para o train_model (0: todos)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    data_path = os.path.join(directory, "processed_data.pkl")
+    make_training_frame(args.rows).to_pickle(data_path)
+    cache_dir = os.path.join(directory, "cache")
+    print(f"{args.rows} linhas, {args.cores or available_cores()} núcleos")
+
+    timings = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        train_sequential(pd.read_pickle(data_path))
+        timings.append(("antes (sequencial)", time.perf_counter() - start))
+        for label in ["train_model (cache vazio)", "train_model (cache cheio)"]:
+            start = time.perf_counter()
+            train_model(data_path, directory, cores=args.cores, cache_dir=cache_dir)
+            timings.append((label, time.perf_counter() - start))
+
+    for label, seconds in timings:
+        print(f"{label:>28}: {seconds:7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Teste de carga local do /predict com clientes concorrentes.
+
+Gera a base realista (benchmarks/synthetic.py) em parquet, sobe a API em
+outro processo (gunicorn com gunicorn.conf.py ou o servidor do Flask, via
+src/main.py) apontando para ela, espera o /readyz e dispara clientes
+concorrentes (carga fechada, conexões HTTP persistentes) por --duration
+segundos. Registra vazão, latências p50/p90/p99, erros e o pico de memória
+do servidor (RSS e PSS somadas dos processos) em JSON, para comparar
+commits com benchmarks/report.py.
+
+Uso: python benchmarks/load_test.py [--rows 20000] [--clients 8] [--duration 30] [--server gunicorn]
+                                    [--workers 2] [--k 10] [--params "shortlist=500"] [--output res.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+
+from benchmarks.bench_stages import serving_env, synthetic_model
+from benchmarks.report import peak_rss_mb, write_result
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def process_tree(pid):
+    """pid e todos os descendentes (workers do gunicorn, pool de shards)."""
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f"/proc/{parent}/task/{parent}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def memory_mb(pid):
+    """RSS e PSS (páginas compartilhadas divididas entre os processos) de um processo, em MB."""
+    values = {"Rss": 0.0, "Pss": 0.0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name = line.split(":")[0]
+                if name in values:
+                    values[name] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return values["Rss"], values["Pss"]
+
+
+class MemorySampler(threading.Thread):
+    """Amostra a memória somada dos processos do servidor e guarda os picos.
+
+    A soma das RSS conta as páginas compartilhadas (copy-on-write) uma vez por
+    worker; a soma das PSS é a memória efetivamente ocupada pelo servidor.
+    """
+
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_pss_mb = 0.0
+        self.processes = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            pids = process_tree(self.pid)
+            self.processes = max(self.processes, len(pids))
+            samples = [memory_mb(pid) for pid in pids]
+            self.peak_rss_mb = max(self.peak_rss_mb, sum(rss for rss, _ in samples))
+            self.peak_pss_mb = max(self.peak_pss_mb, sum(pss for _, pss in samples))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def start_server(kind, port, workers, env):
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    if kind == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+    else:
+        command = [sys.executable, "src/main.py"]
+    log = tempfile.NamedTemporaryFile("w+", suffix=".log", delete=False)
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT), log.name
+
+
+def wait_ready(port, process, timeout):
+    """Esperar o /readyz responder 200 (warm-up concluído)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_load(port, path, payloads, clients, duration):
+    """Cada cliente envia requisições em sequência até o fim do tempo; retorna latências (ms) e erros."""
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    stop_at = time.monotonic() + duration
+    headers = {"Content-Type": "application/json", "X-Cache-Bypass": "1"}
+
+    def client(c):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        i = c
+        while time.monotonic() < stop_at:
+            body = payloads[i % len(payloads)]
+            i += clients
+            start = time.perf_counter()
+            try:
+                connection.request("POST", path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+                ok = False
+            if ok:
+                latencies[c].append((time.perf_counter() - start) * 1000)
+            else:
+                errors[c] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.concatenate([np.array(l, dtype=float) for l in latencies]), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--server", default="gunicorn", choices=["gunicorn", "flask"])
+    parser.add_argument("--workers", type=int, default=2, help="workers do gunicorn (WEB_CONCURRENCY)")
+    parser.add_argument("--port", type=int, default=3099)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--params", default="", help="query string extra do /predict (ex.: shortlist=500)")
+    parser.add_argument("--distinct-jobs", type=int, default=50)
+    parser.add_argument("--model", help="modelo joblib (padrão: Pipeline treinado na base sintética)")
+    parser.add_argument("--train-rows", type=int, default=10_000)
+    parser.add_argument("--trees", type=int, default=None)
+    parser.add_argument("--ready-timeout", type=float, default=600)
+    parser.add_argument("--output", help="arquivo JSON (padrão: benchmarks/results/load_test-<commit>.json)")
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import make_realistic_applicants, make_realistic_jobs
+
+    directory = tempfile.mkdtemp()
+    model_path = os.path.abspath(args.model) if args.model else synthetic_model(directory, args.train_rows, args.trees)
+    applicants_path = os.path.join(directory, "applicants.parquet")
+    make_realistic_applicants(args.rows).to_parquet(applicants_path)
+    env = dict(serving_env(directory, model_path), PREDICT_APPLICANTS=applicants_path)
+    payloads = [json.dumps(vaga).encode() for vaga in make_realistic_jobs(args.distinct_jobs)]
+    path = f"/predict?k={args.k}" + (f"&{args.params}" if args.params else "")
+
+    process, log_path = start_server(args.server, args.port, args.workers, env)
+    try:
+        start = time.perf_counter()
+        if not wait_ready(args.port, process, args.ready_timeout):
+            with open(log_path) as f:
+                print(f.read()[-3000:])
+            sys.exit("Servidor não ficou pronto (/readyz).")
+        startup_seconds = time.perf_counter() - start
+        print(f"Servidor {args.server} pronto em {startup_seconds:.1f}s ({args.rows} candidatos)")
+
+        sampler = MemorySampler(process.pid)
+        sampler.start()
+        elapsed, latencies, errors = run_load(args.port, path, payloads, args.clients, args.duration)
+        sampler.stop()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    results = {
+        "requests": int(len(latencies)),
+        "errors": errors,
+        "duration_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p90_ms": float(np.percentile(latencies, 90)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        "max_ms": float(latencies.max()) if len(latencies) else None,
+        "startup_s": startup_seconds,
+        "server_peak_rss_mb": sampler.peak_rss_mb,
+        "server_peak_pss_mb": sampler.peak_pss_mb,
+        "server_processes": sampler.processes,
+        "client_peak_rss_mb": peak_rss_mb()
+    }
+    print(f"{results['requests']} requisições ({errors} erros) em {elapsed:.1f}s: "
+          f"{results['throughput_rps']:.1f} req/s, p50 {results['p50_ms']:.0f} ms, p99 {results['p99_ms']:.0f} ms, "
+          f"pico de memória do servidor {sampler.peak_rss_mb:.0f} MB RSS / {sampler.peak_pss_mb:.0f} MB PSS "
+          f"({sampler.processes} processos)")
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "port", "ready_timeout")}
+    write_result("load_test", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
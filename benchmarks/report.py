@@ -0,0 +1,123 @@
+"""Resultados dos benchmarks em JSON e comparação entre dois commits.
+
+bench_stages.py e load_test.py gravam um JSON com o commit, o ambiente, a
+configuração e os resultados. Para comparar duas execuções (ex.: antes e
+depois de uma mudança):
+
+Uso: python benchmarks/report.py <antes.json> <depois.json>
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit():
+    """Commit atual (com + se houver alterações não commitadas), ou None fora de um repositório git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return commit + ("+" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import numpy
+    import sklearn
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count()
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "cpus": cpus,
+        "machine": platform.machine()
+    }
+
+
+def peak_rss_mb(pid="self"):
+    """Pico de memória residente (VmHWM) de um processo, em MB."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def write_result(benchmark, config, results, path=None):
+    """Gravar o resultado (padrão: benchmarks/results/<benchmark>-<commit>.json) e retornar o caminho."""
+    commit = git_commit()
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{benchmark}-{commit or time.strftime('%Y%m%d-%H%M%S')}.json")
+    document = {
+        "benchmark": benchmark,
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "config": config,
+        "results": results
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    print(f"Resultado salvo em {path}")
+    return path
+
+
+def flatten(values, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, só com os valores numéricos."""
+    flat = {}
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(before, after):
+    """Linhas (métrica, antes, depois, variação %) para as métricas presentes nos dois resultados."""
+    old, new = flatten(before["results"]), flatten(after["results"])
+    rows = []
+    for name in sorted(old.keys() & new.keys()):
+        change = (new[name] - old[name]) / old[name] * 100 if old[name] else float("nan")
+        rows.append((name, old[name], new[name], change))
+    return rows
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        before = json.load(f)
+    with open(sys.argv[2]) as f:
+        after = json.load(f)
+    if before["benchmark"] != after["benchmark"]:
+        print(f"Benchmarks diferentes: {before['benchmark']} x {after['benchmark']}")
+        sys.exit(1)
+    if before["config"] != after["config"]:
+        print("Aviso: configurações diferentes entre as execuções.")
+    print(f"{before['benchmark']}: {before['commit']} -> {after['commit']}")
+    width = max([len(row[0]) for row in compare(before, after)] + [7])
+    print(f"{'métrica':<{width}} {'antes':>12} {'depois':>12} {'variação':>9}")
+    for name, old, new, change in compare(before, after):
+        variation = "" if change != change else f"{change:+.1f}%"
+        print(f"{name:<{width}} {old:>12.3f} {new:>12.3f} {variation:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+# Vocabulário simples para gerar textos em português
+PALAVRAS = [
+    "python", "java", "sql", "dados", "análise", "desenvolvimento", "sistemas", "projetos",
+    "gestão", "equipe", "cliente", "suporte", "infraestrutura", "cloud", "aws", "azure",
+    "sap", "financeiro", "contabilidade", "vendas", "requisitos", "testes", "automação",
+    "redes", "segurança", "banco", "experiência", "conhecimento", "inglês", "liderança",
+]
+
+NIVEIS_PROFISSIONAIS = ["Analista", "Pleno", "Sênior", "Júnior", "Especialista", "Estagiário", ""]
+NIVEIS_ACADEMICOS = ["Ensino Superior Completo", "Ensino Superior Incompleto", "Pós Graduação Completo",
+                     "Ensino Médio Completo", "Ensino Técnico Completo", "Mestrado Completo", ""]
+NIVEIS_IDIOMA = ["Nenhum", "Básico", "Intermediário", "Avançado", "Fluente", ""]
+
+
+def random_text(rng, n_rows, n_words):
+    words = rng.choice(PALAVRAS, size=(n_rows, n_words))
+    return [" ".join(row) for row in words]
+
+
+def make_applicants(n_rows, seed=42, cv_words=40, skills_words=8):
+    """Gerar uma base sintética de candidatos no formato do parquet processado."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ID_APPLICANT": np.arange(n_rows).astype(str),
+        "cv_pt": random_text(rng, n_rows, cv_words),
+        "app_prof_conhecimentos_tecnicos": random_text(rng, n_rows, skills_words),
+        "app_prof_nivel_profissional": rng.choice(NIVEIS_PROFISSIONAIS, size=n_rows),
+        "app_form_nivel_academico": rng.choice(NIVEIS_ACADEMICOS, size=n_rows),
+        "app_form_nivel_ingles": rng.choice(NIVEIS_IDIOMA, size=n_rows),
+        "app_form_nivel_espanhol": rng.choice(NIVEIS_IDIOMA, size=n_rows),
+    })
+
+
+def make_job(seed=0):
+    """Gerar o payload de uma vaga sintética."""
+    rng = np.random.default_rng(seed)
+    return {
+        "vaga_principais_atividades": random_text(rng, 1, 30)[0],
+        "vaga_competencia_tecnicas_e_comportamentais": random_text(rng, 1, 20)[0],
+        "vaga_nivel profissional": str(rng.choice(NIVEIS_PROFISSIONAIS[:-1])),
+        "vaga_nivel_academico": str(rng.choice(NIVEIS_ACADEMICOS[:-1])),
+        "vaga_nivel_ingles": str(rng.choice(NIVEIS_IDIOMA[:-1])),
+        "vaga_nivel_espanhol": str(rng.choice(NIVEIS_IDIOMA[:-1])),
+        "vaga_local_trabalho": "2000",
+        "vaga_vaga_especifica_para_pcd": "Não",
+    }
+
+
+# --- Base realista: textos com comprimento e vocabulário próximos dos reais ---
+
+# Palavras mais frequentes dos textos (ficam no topo da distribuição de Zipf)
+PALAVRAS_FUNCIONAIS = [
+    "de", "a", "o", "que", "e", "do", "da", "em", "um", "para", "com", "não", "uma", "os", "no", "se", "na",
+    "por", "mais", "as", "dos", "como", "mas", "ao", "das", "à", "seu", "sua", "ou", "nos", "já", "também",
+]
+SILABAS = ["ca", "de", "ti", "mo", "ra", "ve", "lu", "pre", "sis", "ção", "men", "to", "da", "cli", "ser",
+           "ges", "pro", "con", "tra", "gen", "nal", "ri", "que", "dor", "ção", "tes", "an", "li", "se", "ma"]
+
+# Comprimentos (palavras) aproximados de cada texto: mediana e dispersão de uma lognormal,
+# fração de textos vazios e limite superior
+COMPRIMENTOS = {
+    "cv_pt": (300, 0.8, 0.08, 3000),
+    "app_prof_conhecimentos_tecnicos": (12, 0.9, 0.3, 200),
+    "vaga_principais_atividades": (90, 0.6, 0.02, 800),
+    "vaga_competencia_tecnicas_e_comportamentais": (60, 0.6, 0.05, 600),
+}
+
+# Valores das colunas categóricas de EXPECTED_FEATURES (categorias vistas pelo OneHotEncoder do modelo)
+CATEGORIAS = {
+    "vaga_nivel profissional": ["Analista", "Assistente", "Auxiliar", "Coordenador", "Especialista", "Gerente",
+                                "Júnior", "Líder", "Pleno", "Supervisor", "Sênior"],
+    "vaga_nivel_academico": ["Ensino Médio Completo", "Ensino Médio Incompleto", "Ensino Superior Completo",
+                             "Ensino Superior Cursando", "Ensino Superior Incompleto", "Ensino Técnico Completo",
+                             "Ensino Técnico Cursando", "Pós Graduação Completo"],
+    "vaga_nivel_ingles": ["Avançado", "Básico", "Fluente", "Intermediário", "Nenhum", "Técnico"],
+    "vaga_nivel_espanhol": ["Avançado", "Básico", "Fluente", "Intermediário", "Nenhum", "Técnico", ""],
+    "vaga_local_trabalho": ["1000", "2000"],
+    "vaga_vaga_especifica_para_pcd": ["Não", "Sim", ""],
+    "app_prof_nivel_profissional": ["Analista", "Especialista", "Estagiário", "Pleno", "Sênior", ""],
+    "app_form_nivel_academico": ["Doutorado Cursando", "Doutorado Incompleto", "Ensino Fundamental Cursando",
+                                 "Ensino Médio Completo", "Ensino Médio Incompleto", "Ensino Superior Completo",
+                                 "Ensino Superior Cursando", "Ensino Superior Incompleto", "Ensino Técnico Completo",
+                                 "Ensino Técnico Cursando", "Mestrado Completo", "Pós Graduação Completo", ""],
+    "app_form_nivel_ingles": NIVEIS_IDIOMA,
+    "app_form_nivel_espanhol": NIVEIS_IDIOMA,
+}
+
+
+def vocabulary(size=8000, seed=0):
+    """Palavras funcionais, termos técnicos e pseudo-palavras, com probabilidades de Zipf (1 / rank^1.1)."""
+    rng = np.random.default_rng(seed)
+    words = PALAVRAS_FUNCIONAIS + PALAVRAS
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(SILABAS, size=rng.integers(2, 5)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    weights = 1 / np.arange(1, len(words) + 1) ** 1.1
+    return np.array(words), weights / weights.sum()
+
+
+def realistic_texts(rng, n_rows, column, words, probabilities):
+    median, sigma, empty, limit = COMPRIMENTOS[column]
+    lengths = np.minimum(rng.lognormal(np.log(median), sigma, n_rows).astype(int) + 1, limit)
+    lengths[rng.random(n_rows) < empty] = 0
+    tokens = rng.choice(words, size=int(lengths.sum()), p=probabilities)
+    return [" ".join(chunk) for chunk in np.split(tokens, np.cumsum(lengths)[:-1])]
+
+
+def realistic_categories(rng, n_rows, column):
+    values = rng.choice(np.array(CATEGORIAS[column], dtype=object), size=n_rows)
+    # Alguns nulos, tratados como "Desconhecido" na predição
+    values[rng.random(n_rows) < 0.03] = None
+    return values
+
+
+def make_realistic_applicants(n_rows, seed=42, unique_rows=50_000):
+    """Base de candidatos com textos de comprimento realista e as categorias do modelo.
+
+    Acima de unique_rows os candidatos gerados se repetem (com IDs novos): o
+    custo por linha da predição é o mesmo e a geração de 1M de CVs não domina
+    o benchmark. As strings repetidas são compartilhadas, sem cópia.
+    """
+    rng = np.random.default_rng(seed)
+    words, probabilities = vocabulary(seed=seed)
+    n_unique = min(n_rows, unique_rows)
+    columns = {
+        column: realistic_texts(rng, n_unique, column, words, probabilities)
+        for column in ["cv_pt", "app_prof_conhecimentos_tecnicos"]
+    }
+    for column in CATEGORIAS:
+        if column.startswith("app_"):
+            columns[column] = realistic_categories(rng, n_unique, column)
+    base = pd.DataFrame(columns)
+    if n_rows > n_unique:
+        base = base.iloc[np.resize(np.arange(n_unique), n_rows)].reset_index(drop=True)
+    base.insert(0, "ID_APPLICANT", np.arange(n_rows).astype(str))
+    return base
+
+
+def make_realistic_jobs(n_jobs, seed=0):
+    """Payloads de vagas com textos de comprimento realista (mesmo vocabulário dos candidatos)."""
+    rng = np.random.default_rng(seed + 1)
+    words, probabilities = vocabulary(seed=seed)
+    columns = {
+        column: realistic_texts(rng, n_jobs, column, words, probabilities)
+        for column in ["vaga_principais_atividades", "vaga_competencia_tecnicas_e_comportamentais"]
+    }
+    for column in CATEGORIAS:
+        if column.startswith("vaga_"):
+            columns[column] = [str(v) for v in rng.choice(CATEGORIAS[column], size=n_jobs)]
+    return pd.DataFrame(columns).to_dict("records")
+
+
+def make_realistic_training_frame(n_rows, seed=0, n_jobs=200):
+    """Prospects (candidato + vaga + target) em que a chance de sucesso cresce com os termos em comum."""
+    rng = np.random.default_rng(seed)
+    applicants = make_realistic_applicants(n_rows, seed=seed)
+    jobs = pd.DataFrame(make_realistic_jobs(n_jobs, seed=seed))
+    df = pd.concat([applicants, jobs.iloc[rng.integers(0, n_jobs, n_rows)].reset_index(drop=True)], axis=1)
+    df["ID_VAGA"] = rng.integers(0, n_jobs, n_rows).astype(str)
+
+    functional = set(PALAVRAS_FUNCIONAIS)
+    overlap = np.array([
+        len((set(cv.split()) | set(skills.split())) & set(f"{a} {b}".split()) - functional)
+        for cv, skills, a, b in zip(df["cv_pt"], df["app_prof_conhecimentos_tecnicos"],
+                                    df["vaga_principais_atividades"], df["vaga_competencia_tecnicas_e_comportamentais"])
+    ], dtype=float)
+    overlap += (df["app_prof_nivel_profissional"] == df["vaga_nivel profissional"]) * overlap.std()
+    logit = 2 * (overlap - overlap.mean()) / (overlap.std() or 1) - 1
+    df["target"] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df
+
+
+def train_pipeline(n_rows=10_000, seed=0, n_estimators=None):
+    """Pipeline(preprocessor, Random Forest) com a estrutura do train_model, treinado na base realista.
+
+    Mesmo build_preprocessor e mesma Random Forest de model_heads; n_estimators
+    reduz o número de árvores para treinos rápidos.
+    """
+    import io
+    from contextlib import redirect_stdout
+    from sklearn.pipeline import Pipeline
+    from src.modeltraining.model_training import build_preprocessor, model_heads, select_features
+
+    with redirect_stdout(io.StringIO()):
+        X, y, text_features, categorical_features = select_features(make_realistic_training_frame(n_rows, seed))
+    _, steps, _ = model_heads(1)["Random Forest"]
+    pipeline = Pipeline([("preprocessor", build_preprocessor(text_features, categorical_features))] + steps)
+    if n_estimators:
+        pipeline.set_params(classifier__n_estimators=n_estimators)
+    return pipeline.fit(X, y)
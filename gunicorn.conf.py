@@ -0,0 +1,47 @@
+import gc
+import os
+
+# Servidor de produção: gunicorn -c gunicorn.conf.py (executar na raiz do projeto).
+# O master carrega modelo, base de candidatos e features e faz o warm-up uma única
+# vez (preload_app); os workers são criados por fork e herdam essas páginas.
+wsgi_app = "src.app:create_app(prefork=True)"
+preload_app = True
+bind = f"0.0.0.0:{os.environ.get('PORT', 3000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+# O orçamento de threads da inferência divide os núcleos entre estes workers, e o
+# micro-batching pontua tantos lotes ao mesmo tempo quanto as threads de cada um
+os.environ.setdefault("PREDICT_SERVER_WORKERS", str(workers))
+os.environ.setdefault("PREDICT_COALESCE_WORKERS", str(threads))
+
+# Sem coletas no master enquanto a aplicação é carregada (preload_app): uma coleta escreve
+# no cabeçalho de GC de cada objeto rastreado e deixaria buracos nas páginas que os workers
+# vão compartilhar. O arquivo de configuração é importado antes do preload; when_ready roda
+# depois dele e antes do primeiro fork.
+gc.disable()
+
+
+def when_ready(server):
+    # Mover tudo o que o master alocou para a geração permanente, que as coletas
+    # (do master e dos workers) não percorrem, e voltar a coletar no master
+    gc.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    # O que o master alocou depois (ex.: antes de repor um worker) também fica fora das coletas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from src.routes import prediction
+    prediction.after_fork()
+
+
+def worker_exit(server, worker):
+    # Pool de processos e arrays em /dev/shm criados pelo worker (ex.: depois de um reload)
+    from src.routes import prediction
+    prediction.shutdown()
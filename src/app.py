@@ -0,0 +1,55 @@
+import os
+from flask import Flask, send_from_directory, jsonify
+from .routes import prediction
+from .routes.prediction import create_prediction_route
+from .routes.admin import create_admin_route
+from .routes.applicants import create_applicants_route
+from .routes.health import create_health_route
+from .routes.metrics import create_metrics_route
+
+
+def create_app(prefork=False):
+    """Montar a aplicação: carregar a base de candidatos, registrar as rotas e aquecer a predição.
+
+    Com prefork=True (gunicorn.conf.py, preload_app) a função roda uma única vez
+    no master e os workers herdam modelo, base e features por copy-on-write;
+    threads e pools de processos são criados em cada worker (prediction.after_fork).
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+
+    # Registrar a rota de prediction (carrega o parquet já processado em prediction.PARQUET_PATH)
+    app = create_prediction_route(app, prefork=prefork)
+
+    # Registrar a rota de administração (recarregamento do modelo e da base)
+    app = create_admin_route(app)
+
+    # Registrar a rota de ingestão incremental de candidatos
+    app = create_applicants_route(app)
+
+    # Registrar as rotas de liveness e readiness
+    app = create_health_route(app)
+
+    # Registrar o endpoint de métricas (Prometheus)
+    app = create_metrics_route(app)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
+        else:
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return jsonify({"message": "API de recrutamento está no ar. Use o endpoint /predict para predições."}), 200
+
+    # Uma predição antes de aceitar tráfego (/readyz responde 503 até aqui)
+    prediction.warm_up()
+
+    return app
@@ -0,0 +1,42 @@
+import pyarrow.parquet as pq
+
+from .schema import EXPECTED_FEATURES, CATEGORICAL_FEATURES_FOR_PREDICTION
+from .artifacts import ARROW_STRING_TYPES, ArtifactModel
+from .result_cache import artifact_version
+
+# Colunas da base de candidatos usadas pelo /predict
+APPLICANT_COLUMNS = ["ID_APPLICANT"] + [feature for feature in EXPECTED_FEATURES if not feature.startswith("vaga_")]
+CATEGORICAL_APPLICANT_COLUMNS = [col for col in CATEGORICAL_FEATURES_FOR_PREDICTION if col in APPLICANT_COLUMNS]
+
+
+def load_parquet(file_path, columns=APPLICANT_COLUMNS):
+    """Carregar do .parquet apenas as colunas usadas na predição, em formato compacto.
+
+    Textos ficam como string[pyarrow] e as categorias app_* como category.
+    """
+    try:
+        available = pq.read_schema(file_path).names
+        table = pq.read_table(file_path, columns=[col for col in columns if col in available])
+        df = table.to_pandas(types_mapper=ARROW_STRING_TYPES.get)
+        for col in CATEGORICAL_APPLICANT_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return df
+    except FileNotFoundError:
+        print(f"Erro: Arquivo {file_path} não encontrado.")
+        return None
+    except Exception as e:
+        print(f"Erro ao carregar {file_path}: {e}")
+        return None
+
+
+def load_applicants(file_path, model):
+    """Base de candidatos e a versão dela (usada pelo cache de resultados).
+
+    Com artefatos exportados a partir do mesmo parquet (ou sem o parquet no
+    disco), a base mapeada dos artefatos é usada e o parquet nem é lido.
+    """
+    data_version = artifact_version(file_path)
+    if isinstance(model, ArtifactModel) and data_version in (None, model.data_version):
+        return model.applicants, model.data_version
+    return load_parquet(file_path), data_version
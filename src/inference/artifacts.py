@@ -0,0 +1,256 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .features import APPLICANT, ApplicantFeatures, SplitPipeline, one_hot_segment, text_segment
+from .forest import ForestEngine
+from .ranking import to_python
+from .retrieval import TermIndex
+from .result_cache import canonical_key
+from .text_hashing import HashingTfidfVectorizer
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+APPLICANTS_FILE = "applicants.arrow"
+
+# Textos como strings do Arrow em vez de objetos Python
+ARROW_STRING_TYPES = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+
+FOREST_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots", "used_features"]
+
+
+def save_sparse(directory, name, matrix):
+    """Salvar uma matriz CSR/CSC como três .npy e devolver a descrição para o manifesto."""
+    for part in ["data", "indices", "indptr"]:
+        np.save(os.path.join(directory, f"{name}_{part}.npy"), getattr(matrix, part))
+    return {"name": name, "format": matrix.format, "shape": list(matrix.shape)}
+
+
+def load_sparse(directory, description, mmap_mode="r"):
+    parts = [np.load(os.path.join(directory, f"{description['name']}_{part}.npy"), mmap_mode=mmap_mode)
+             for part in ["data", "indices", "indptr"]]
+    matrix_class = sp.csc_matrix if description["format"] == "csc" else sp.csr_matrix
+    return matrix_class(tuple(parts), shape=tuple(description["shape"]), copy=False)
+
+
+def tfidf_params(vectorizer):
+    """Parâmetros do TfidfVectorizer em formato JSON (sem callables)."""
+    if not isinstance(vectorizer, TfidfVectorizer) or not vectorizer.use_idf:
+        raise ValueError("Exportação suporta apenas TfidfVectorizer com use_idf=True.")
+    params = vectorizer.get_params()
+    if any(callable(params[key]) for key in ["analyzer", "preprocessor", "tokenizer"]):
+        raise ValueError("TfidfVectorizer com analyzer/preprocessor/tokenizer próprios não pode ser exportado.")
+    params["dtype"] = np.dtype(params["dtype"]).name
+    params["vocabulary"] = None
+    return params
+
+
+def hashing_params(vectorizer):
+    """Parâmetros do HashingTfidfVectorizer em formato JSON (o idf_ vai em um .npy)."""
+    params = vectorizer.get_params()
+    params["dtype"] = np.dtype(params["dtype"]).name
+    params["ngram_range"] = list(params["ngram_range"])
+    return params
+
+
+def build_hashing(params, idf):
+    params = dict(params, dtype=np.dtype(params["dtype"]).type, ngram_range=tuple(params["ngram_range"]))
+    vectorizer = HashingTfidfVectorizer(**params)
+    vectorizer.idf_ = idf
+    return vectorizer
+
+
+def build_tfidf(params, terms, idf):
+    """Reconstruir o vetorizador só com vocabulário e idf (sem stop_words_ e sem pickle)."""
+    params = dict(params, dtype=np.dtype(params["dtype"]).type, ngram_range=tuple(params["ngram_range"]))
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms.tolist())}
+    vectorizer.idf_ = idf
+    return vectorizer
+
+
+def latest_version(base_dir):
+    """Diretório da última versão exportada em base_dir ou None."""
+    try:
+        with open(os.path.join(base_dir, LATEST_FILE)) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(base_dir, version)
+    return path if os.path.isfile(os.path.join(path, MANIFEST_FILE)) else None
+
+
+def export_artifacts(model, applicants, base_dir, model_version=None, data_version=None, term_index=True):
+    """Exportar modelo e base de candidatos para um novo diretório versionado.
+
+    Grava vocabulários/idf dos TF-IDF (ou parâmetros/idf do hashing),
+    categorias do one-hot, arrays da floresta (ForestEngine), os blocos de
+    features e a incidência de folhas dos candidatos em .npy e a base de
+    candidatos em Arrow. A versão só passa a ser
+    a LATEST depois de todos os arquivos gravados. Retorna o diretório criado.
+    """
+    pipeline = SplitPipeline(model, engine="numpy")
+    if pipeline.engine is None:
+        raise ValueError("Floresta não suportada pelo motor NumPy; exportação cancelada.")
+    features = ApplicantFeatures(pipeline, applicants, term_index)
+    engine = pipeline.engine
+
+    os.makedirs(base_dir, exist_ok=True)
+    staging = os.path.join(base_dir, f".staging-{os.getpid()}-{time.time_ns()}")
+    os.makedirs(staging)
+    try:
+        segments = []
+        for i, segment in enumerate(pipeline.segments):
+            description = {
+                "side": segment.side, "width": segment.width, "columns": segment.columns, "name": segment.name
+            }
+            if segment.categories is not None:
+                description["categories"] = [[to_python(v) for v in c] for c in segment.categories]
+            elif isinstance(segment.transformer, HashingTfidfVectorizer):
+                # Sem vocabulário: parâmetros do hashing e o idf_ denso
+                description["hashing"] = hashing_params(segment.transformer)
+                np.save(os.path.join(staging, f"segment_{i}_idf.npy"), segment.transformer.idf_)
+            else:
+                description["tfidf"] = tfidf_params(segment.transformer)
+                np.save(os.path.join(staging, f"segment_{i}_terms.npy"), np.asarray(segment.terms, dtype=str))
+                np.save(os.path.join(staging, f"segment_{i}_idf.npy"), segment.transformer.idf_)
+            if segment.side == APPLICANT:
+                description["applicant_block"] = save_sparse(staging, f"applicant_block_{i}", features.blocks[i])
+            segments.append(description)
+
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(staging, f"forest_{name}.npy"), getattr(engine, name))
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "model_version": model_version,
+            "data_version": data_version,
+            "n_applicants": len(applicants),
+            "classes": [to_python(c) for c in engine.classes_],
+            "max_depth": engine.max_depth,
+            "segments": segments,
+            "applicant_leaves": save_sparse(staging, "applicant_leaves", features.leaves)
+        }
+        if features.term_index is not None:
+            index = features.term_index
+            for i, term_map in index.applicant_maps.items():
+                np.save(os.path.join(staging, f"term_map_applicant_{i}.npy"), term_map)
+            for i, term_map in index.job_maps.items():
+                np.save(os.path.join(staging, f"term_map_job_{i}.npy"), term_map)
+            manifest["term_index"] = {
+                "applicant_segments": list(index.applicant_maps),
+                "job_segments": list(index.job_maps),
+                "postings": save_sparse(staging, "term_postings", index.postings)
+            }
+
+        feather.write_feather(
+            pa.Table.from_pandas(applicants, preserve_index=False),
+            os.path.join(staging, APPLICANTS_FILE), compression="uncompressed"
+        )
+
+        # Versão = data + hash do manifesto (modelo, base e layout)
+        manifest["version"] = time.strftime("%Y%m%d-%H%M%S-") + canonical_key(manifest)[:8]
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        path = os.path.join(base_dir, manifest["version"])
+        os.rename(staging, path)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    latest = os.path.join(base_dir, f".{LATEST_FILE}.tmp")
+    with open(latest, "w") as f:
+        f.write(manifest["version"])
+    os.replace(latest, os.path.join(base_dir, LATEST_FILE))
+    return path
+
+
+class ArtifactModel:
+    """Modelo servido a partir de um diretório de artefatos, sem unpickle.
+
+    Os arrays são abertos com mmap, então vários processos compartilham as
+    mesmas páginas. Tem predict_proba/classes_ como o Pipeline original e
+    expõe o SplitPipeline e as features dos candidatos já calculadas.
+    """
+
+    def __init__(self, path, manifest, split_pipeline, applicants, features):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.model_version = manifest["model_version"]
+        self.data_version = manifest["data_version"]
+        self.split_pipeline = split_pipeline
+        self.applicants = applicants
+        self.features = features
+        self.classes_ = split_pipeline.classifier.classes_
+
+    def predict_proba(self, X):
+        """Probabilidades para o DataFrame completo (vaga + candidato) já tratado."""
+        return self.split_pipeline.classifier.predict_proba(self.split_pipeline.transform(X))
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def load_artifacts(path, mmap_mode="r", term_index=True):
+    """Abrir um diretório de artefatos (uma versão) exportado por export_artifacts."""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Formato de artefatos não suportado: {manifest.get('format')}")
+
+    arrays = {name: np.load(os.path.join(path, f"forest_{name}.npy"), mmap_mode=mmap_mode) for name in FOREST_ARRAYS}
+    engine = ForestEngine(max_depth=manifest["max_depth"], classes=np.array(manifest["classes"]), **arrays)
+
+    segments, blocks = [], []
+    for i, description in enumerate(manifest["segments"]):
+        if "categories" in description:
+            categories = [np.array(c, dtype=object) for c in description["categories"]]
+            segments.append(one_hot_segment(
+                description["side"], description["columns"], categories, description.get("name")
+            ))
+        elif "hashing" in description:
+            vectorizer = build_hashing(description["hashing"], np.load(os.path.join(path, f"segment_{i}_idf.npy")))
+            segments.append(text_segment(
+                description["columns"][0], vectorizer, description["width"], description.get("name")
+            ))
+        else:
+            terms = np.load(os.path.join(path, f"segment_{i}_terms.npy"), mmap_mode=mmap_mode)
+            idf = np.load(os.path.join(path, f"segment_{i}_idf.npy"))
+            vectorizer = build_tfidf(description["tfidf"], terms, idf)
+            segments.append(text_segment(
+                description["columns"][0], vectorizer, description["width"], description.get("name")
+            ))
+        block = description.get("applicant_block")
+        blocks.append(None if block is None else load_sparse(path, block, mmap_mode))
+
+    split_pipeline = SplitPipeline.from_segments(segments, engine, engine)
+
+    index = None
+    if term_index and "term_index" in manifest:
+        description = manifest["term_index"]
+        index = TermIndex.from_arrays(
+            {i: np.load(os.path.join(path, f"term_map_applicant_{i}.npy")) for i in description["applicant_segments"]},
+            {i: np.load(os.path.join(path, f"term_map_job_{i}.npy")) for i in description["job_segments"]},
+            load_sparse(path, description["postings"], mmap_mode)
+        )
+
+    leaves = load_sparse(path, manifest["applicant_leaves"], mmap_mode)
+    features = ApplicantFeatures.from_blocks(split_pipeline, blocks, leaves, index)
+
+    table = ipc.open_file(pa.memory_map(os.path.join(path, APPLICANTS_FILE))).read_all()
+    applicants = table.to_pandas(types_mapper=ARROW_STRING_TYPES.get)
+
+    return ArtifactModel(path, manifest, split_pipeline, applicants, features)
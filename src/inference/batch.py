@@ -0,0 +1,51 @@
+import numpy as np
+
+from .ranking import top_k_indices
+
+
+class RunningTopK:
+    """Top-k de uma vaga atualizado bloco a bloco de candidatos."""
+
+    def __init__(self, top_k, min_probability=None):
+        self.top_k = top_k
+        self.min_probability = min_probability
+        self.positions = np.empty(0, dtype=np.int64)
+        self.probabilities = np.empty((0, 2))
+
+    def update(self, probabilities, offset):
+        """Juntar o top-k local do bloco (posições a partir de offset) ao acumulado.
+
+        Os blocos chegam em ordem crescente de posição, então empates continuam
+        resolvidos pela posição global do candidato.
+        """
+        local = top_k_indices(probabilities[:, 1], self.top_k, self.min_probability)
+        self.merge(local + offset, probabilities[local])
+
+    def merge(self, positions, probabilities):
+        """Juntar um top-k já calculado (ex.: de outro processo) com posições maiores que as atuais."""
+        merged_positions = np.concatenate([self.positions, positions])
+        merged = np.concatenate([self.probabilities, probabilities])
+        best = top_k_indices(merged[:, 1], self.top_k)
+        self.positions = merged_positions[best]
+        self.probabilities = merged[best]
+
+
+def rank_jobs(predict_proba, n_jobs, n_rows, top_k, min_probability=None, chunk_rows=50_000):
+    """Ranquear n_jobs vagas contra n_rows candidatos em blocos de memória limitada.
+
+    predict_proba(jobs, rows) recebe um range de vagas e um slice de candidatos
+    e devolve uma matriz de probabilidades por vaga. Cada chamada monta no máximo
+    chunk_rows linhas (vagas x candidatos), o que limita o pico de memória.
+    """
+    rows_per_chunk = max(1, min(n_rows, chunk_rows))
+    jobs_per_chunk = max(1, chunk_rows // rows_per_chunk)
+    rankings = [RunningTopK(top_k, min_probability) for _ in range(n_jobs)]
+
+    for job_start in range(0, n_jobs, jobs_per_chunk):
+        jobs = range(job_start, min(n_jobs, job_start + jobs_per_chunk))
+        for row_start in range(0, n_rows, rows_per_chunk):
+            rows = slice(row_start, min(n_rows, row_start + rows_per_chunk))
+            for job, probabilities in zip(jobs, predict_proba(jobs, rows)):
+                rankings[job].update(probabilities, row_start)
+
+    return rankings
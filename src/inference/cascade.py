@@ -0,0 +1,126 @@
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .features import APPLICANT, JOB, FeatureCache, SegmentedFeatures, SplitPipeline
+from .ranking import top_k_indices
+
+
+class LinearScorer:
+    """Regressão logística do train_model (model_lr.joblib) como pontuação linear separável.
+
+    Os escalonamentos entre o pré-processamento e o classificador são embutidos
+    nos pesos, então decision_function = candidato · w_c + vaga · w_v + b. A
+    parte do candidato é um único produto matriz esparsa x vetor por base e a
+    da vaga um produto por vaga.
+    """
+
+    def __init__(self, model):
+        if not isinstance(model, Pipeline) or len(model.steps) < 2:
+            raise ValueError("Modelo da cascata não é um Pipeline(preprocessor, ..., classifier).")
+        classifier = model.steps[-1][1]
+        coef = getattr(classifier, "coef_", None)
+        if coef is None or coef.shape[0] != 1:
+            raise ValueError("Classificador da cascata não é um modelo linear binário.")
+
+        weights, intercept = coef[0].astype(np.float64), float(classifier.intercept_[0])
+        for name, step in reversed(model.steps[1:-1]):
+            if not isinstance(step, StandardScaler):
+                raise ValueError(f"Etapa '{name}' não suportada na cascata.")
+            if step.scale_ is not None:
+                weights = weights / step.scale_
+            if step.mean_ is not None and step.with_mean:
+                intercept -= float(step.mean_ @ weights)
+
+        self.pipeline = SplitPipeline(Pipeline([model.steps[0], model.steps[-1]]))
+        self.intercept = intercept
+        offsets = np.concatenate([[0], np.cumsum([s.width for s in self.pipeline.segments])])
+        self.weights = [weights[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+    def applicant_scores(self, applicants, features=None):
+        """Parte da pontuação que só depende do candidato (com o intercepto).
+
+        Com features (ApplicantFeatures/SegmentedFeatures da floresta para os
+        mesmos candidatos) e o mesmo pré-processamento dos candidatos nos dois
+        modelos, como no train_model, os blocos já calculados são reaproveitados
+        e a base não é transformada de novo.
+        """
+        if features is not None and self.shares_applicant_segments(features.pipeline):
+            parts = features.segments if isinstance(features, SegmentedFeatures) else [features]
+            return np.concatenate([self.block_scores(part.pipeline, part.blocks, part.n_rows) for part in parts])
+        return self.block_scores(self.pipeline, self.pipeline.transform_applicants(applicants), len(applicants))
+
+    def block_scores(self, pipeline, blocks, n_rows):
+        """Pontuação a partir dos blocos de candidato de pipeline (mesma ordem dos segmentos da cascata)."""
+        applicant_blocks = iter([block for segment, block in zip(pipeline.segments, blocks) if segment.side == APPLICANT])
+        scores = np.full(n_rows, self.intercept)
+        for segment, weights in zip(self.pipeline.segments, self.weights):
+            if segment.side == APPLICANT:
+                scores += next(applicant_blocks) @ weights
+        return scores
+
+    def shares_applicant_segments(self, pipeline):
+        """True se os segmentos de candidato de pipeline produzem as mesmas colunas que os da cascata."""
+        ours = [segment for segment in self.pipeline.segments if segment.side == APPLICANT]
+        theirs = [segment for segment in pipeline.segments if segment.side == APPLICANT]
+        return len(ours) == len(theirs) and all(same_segment(a, b) for a, b in zip(ours, theirs))
+
+    def job_scores(self, vagas):
+        """Parte da pontuação de cada vaga (constante para todos os candidatos)."""
+        return [
+            sum(float((block @ weights)[0]) for segment, block, weights in zip(self.pipeline.segments, blocks, self.weights)
+                if segment.side == JOB)
+            for blocks in self.pipeline.transform_jobs(vagas)
+        ]
+
+
+def same_segment(a, b):
+    """Mesmas colunas de entrada e de saída: vocabulário, idf e parâmetros do vetorizador ou categorias."""
+    if a.columns != b.columns or a.width != b.width or (a.categories is None) != (b.categories is None):
+        return False
+    if a.categories is not None:
+        return all(np.array_equal(x, y) for x, y in zip(a.categories, b.categories))
+    if a.transformer is None or b.transformer is None or a.terms is None or b.terms is None:
+        return False
+    if type(a.transformer) is not type(b.transformer) or a.transformer.get_params() != b.transformer.get_params():
+        return False
+    idf = getattr(a.transformer, "idf_", None), getattr(b.transformer, "idf_", None)
+    return np.array_equal(a.terms, b.terms) and (idf[0] is None) == (idf[1] is None) and (
+        idf[0] is None or np.array_equal(idf[0], idf[1]))
+
+
+class CascadeScores:
+    """Pontuações lineares de uma base de candidatos, usadas para pré-selecionar os top-N da floresta."""
+
+    def __init__(self, scorer, scores):
+        self.scorer = scorer
+        self.scores = scores
+        self.n_rows = len(scores)
+
+    def extend(self, delta, features=None):
+        """Acrescentar candidatos ingeridos depois; só as linhas novas são pontuadas.
+
+        features são as ApplicantFeatures do delta já calculadas para a floresta.
+        """
+        return CascadeScores(self.scorer, np.concatenate([self.scores, self.scorer.applicant_scores(delta, features)]))
+
+    def shortlists(self, vagas, size, allowed=None):
+        """Posições (em ordem crescente) dos size candidatos de maior pontuação linear de cada vaga.
+
+        Com allowed (posições em ordem crescente), só esses candidatos concorrem.
+        """
+        positions = np.arange(self.n_rows) if allowed is None else allowed
+        scores = self.scores[positions]
+        return [np.sort(positions[top_k_indices(scores + job_score, size)]) for job_score in self.scorer.job_scores(vagas)]
+
+
+class CascadeCache(FeatureCache):
+    """Pontuações lineares por (modelo da cascata, base), com a mesma política do cache de features."""
+
+    def _build(self, model, applicants, features=None):
+        scorer = LinearScorer(model)
+        if features is not None and not scorer.shares_applicant_segments(features.pipeline):
+            # Ex.: regressão logística treinada com outro vocabulário; a base é transformada de novo
+            print("Cascata com pré-processamento dos candidatos diferente do modelo: transformando a base de novo.")
+            features = None
+        return CascadeScores(scorer, scorer.applicant_scores(applicants, features))
@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+from .metrics import metrics
+
+
+class _Request:
+    __slots__ = ("vagas", "state", "params", "key", "future", "arrived", "traced", "stages")
+
+    def __init__(self, vagas, state, params, key):
+        self.vagas = vagas
+        self.state = state
+        self.params = params
+        self.key = key
+        self.future = Future()
+        self.arrived = time.monotonic()
+        # Etapas do lote, repassadas ao trace da requisição (header de debug)
+        self.traced = metrics.tracing()
+        self.stages = []
+
+
+class Coalescer:
+    """Junta requisições concorrentes em uma única chamada de score.
+
+    score(vagas, state, **params) é o rank_vagas da rota. A primeira requisição
+    abre uma janela de window_ms; as que chegam até o fim da janela (ou até
+    max_batch requisições) e usam a mesma versão servida e os mesmos parâmetros
+    são pontuadas juntas, e cada uma recebe só os resultados das suas vagas.
+    Uma requisição que espera mais de max_wait_ms sem que o seu lote comece a
+    ser pontuado desiste dele e é pontuada na própria thread.
+
+    Uma thread monta os lotes e os entrega a um pool de workers threads (o
+    número de threads do servidor, GUNICORN_THREADS): um lote lento não
+    segura os seguintes. As etapas medidas (metrics.stage) durante o lote
+    entram no trace de cada requisição dele.
+    """
+
+    def __init__(self, score, window_ms=10, max_batch=32, max_wait_ms=100, key=None, workers=4):
+        self.score = score
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        # O limite de espera nunca é menor que a janela (senão nenhuma requisição esperaria o lote)
+        self.max_wait = max(max_wait_ms, window_ms) / 1000
+        self.key = key or (lambda state, params: (id(state), repr(sorted(params.items()))))
+        self.workers = max(1, workers)
+        self._queue = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pool = None
+        # Contadores do stats(), sempre atualizados com o _condition adquirido
+        self.batches = 0
+        self.requests = 0
+        self.timeouts = 0
+
+    def submit(self, vagas, state, **params):
+        """Resultados e informações da pré-seleção das vagas, como rank_vagas."""
+        request = _Request(vagas, state, params, self.key(state, params))
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                # Criados na primeira requisição do processo (depois do fork, nos workers do gunicorn)
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="predict-coalescer")
+                self._thread = threading.Thread(target=self._run, name="predict-coalescer", daemon=True)
+                self._thread.start()
+            self._queue.append(request)
+            self._condition.notify()
+        try:
+            return self._result(request, self.max_wait)
+        except TimeoutError:
+            if not request.future.cancel():
+                # Já está sendo pontuada em um lote
+                return self._result(request)
+        with self._condition:
+            self.timeouts += 1
+        return self.score(vagas, state, **params)
+
+    @staticmethod
+    def _result(request, timeout=None):
+        result = request.future.result(timeout=timeout)
+        metrics.extend_trace(request.stages)
+        return result
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._queue:
+                self._condition.wait()
+            deadline = self._queue[0].arrived + self.window
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+        return batch
+
+    def _run(self):
+        while True:
+            groups = {}
+            for request in self._next_batch():
+                groups.setdefault(request.key, []).append(request)
+            for group in groups.values():
+                self._pool.submit(self._score_group, group)
+
+    def _score_group(self, group):
+        # Quem desistiu enquanto o lote esperava um worker livre já foi pontuado na própria thread
+        group = [request for request in group if request.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        vagas = [vaga for request in group for vaga in request.vagas]
+        traced = any(request.traced for request in group)
+        if traced:
+            metrics.start_trace()
+        try:
+            results, info = self.score(vagas, group[0].state, **group[0].params)
+        except Exception as e:
+            for request in group:
+                request.future.set_exception(e)
+            return
+        finally:
+            stages = metrics.end_trace() if traced else []
+        with self._condition:
+            self.batches += 1
+            self.requests += len(group)
+
+        start = 0
+        for request in group:
+            stop = start + len(request.vagas)
+            # Listas por vaga (tamanhos e recall da pré-seleção) são repartidas como os resultados
+            request_info = {
+                name: values[start:stop] if isinstance(values, list) and len(values) == len(vagas) else values
+                for name, values in info.items()
+            }
+            request.stages = stages
+            request.future.set_result((results[start:stop], request_info))
+            start = stop
+
+    def stats(self):
+        with self._condition:
+            batches, requests, timeouts = self.batches, self.requests, self.timeouts
+        return {
+            "batches": batches,
+            "requests": requests,
+            "mean_batch": requests / batches if batches else 0.0,
+            "timeouts": timeouts
+        }
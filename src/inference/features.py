@@ -0,0 +1,405 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from .forest import ForestEngine
+from .metrics import metrics
+from .text_hashing import HashingTfidfVectorizer
+
+APPLICANT = "applicant"
+JOB = "job"
+
+
+def column_side(column):
+    """Colunas com prefixo vaga_ pertencem à vaga, as demais ao candidato."""
+    return JOB if column.startswith("vaga_") else APPLICANT
+
+
+def fill_categorical(series):
+    """fillna("Desconhecido") + astype(str), aceitando colunas do tipo category."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Colunas category não aceitam valores fora das categorias no fillna
+        series = series.astype(object)
+    return series.fillna("Desconhecido").astype(str)
+
+
+def broadcast_row(row, n_rows):
+    """Replicar uma matriz esparsa de uma linha em n_rows linhas (CSR)."""
+    row = row.tocsr()
+    return sp.csr_matrix(
+        (np.tile(row.data, n_rows), np.tile(row.indices, n_rows), np.arange(n_rows + 1) * row.nnz),
+        shape=(n_rows, row.shape[1])
+    )
+
+
+def one_hot(values, categories, offsets, width):
+    """One-hot manual equivalente ao OneHotEncoder(handle_unknown='ignore').
+
+    values é uma lista de arrays (um por coluna) e offsets a posição da primeira
+    categoria de cada coluna dentro do bloco de saída.
+    """
+    n_rows = len(values[0]) if values else 0
+    codes = np.full((n_rows, len(values)), -1, dtype=np.int64)
+    for j, (column_values, column_categories, offset) in enumerate(zip(values, categories, offsets)):
+        mapping = {category: offset + i for i, category in enumerate(column_categories)}
+        codes[:, j] = pd.Series(column_values, dtype=object).map(mapping).fillna(-1).to_numpy(dtype=np.int64)
+
+    known = codes >= 0
+    indptr = np.concatenate([[0], np.cumsum(known.sum(axis=1))])
+    indices = codes[known].astype(np.int32)
+    return sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n_rows, width))
+
+
+class Segment:
+    """Bloco contíguo de colunas de saída do ColumnTransformer."""
+
+    def __init__(self, side, width, columns, transform, terms=None, transformer=None, categories=None, name=None):
+        self.side = side
+        self.width = width
+        self.columns = columns
+        self.transform = transform
+        self.terms = terms  # vocabulário das colunas de saída (segmentos de texto)
+        self.transformer = transformer  # vetorizador já treinado (segmentos de texto)
+        self.categories = categories  # categorias de cada coluna (segmentos one-hot)
+        self.name = name  # nome do transformador no ColumnTransformer (tfidf_0, onehot, ...)
+
+
+def text_segment(column, transformer, width, name=None):
+    return Segment(
+        column_side(column), width, [column],
+        lambda df, t=transformer, c=column: t.transform(df[c]),
+        terms=transformer.get_feature_names_out()
+        if hasattr(transformer, "vocabulary_") or isinstance(transformer, HashingTfidfVectorizer) else None,
+        transformer=transformer, name=name
+    )
+
+
+def one_hot_segment(side, columns, categories, name=None):
+    offsets = np.concatenate([[0], np.cumsum([len(c) for c in categories])])
+    return Segment(
+        side, int(offsets[-1]), columns,
+        lambda df, g=columns, c=categories, o=offsets: one_hot(
+            [df[col].to_numpy() for col in g], c, o[:-1], int(o[-1])
+        ),
+        categories=categories, name=name
+    )
+
+
+class SplitPipeline:
+    """Separa o pré-processamento do pipeline em blocos de candidato e de vaga.
+
+    A ordem dos segmentos é a mesma da saída do ColumnTransformer, então a
+    matriz montada em assemble() é coluna a coluna igual a preprocessor.transform.
+    Com engine="numpy" a floresta é convertida uma vez para o ForestEngine.
+    """
+
+    def __init__(self, model, engine="sklearn"):
+        if not isinstance(model, Pipeline) or len(model.steps) != 2:
+            raise ValueError("Modelo não é um Pipeline(preprocessor, classifier).")
+        preprocessor = model.steps[0][1]
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError("O primeiro passo do pipeline não é um ColumnTransformer.")
+
+        self.classifier = model.steps[-1][1]
+        self.segments = []
+
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            if name == "remainder" or transformer == "passthrough":
+                raise ValueError("ColumnTransformer com remainder/passthrough não suportado.")
+            output = preprocessor.output_indices_[name]
+            if isinstance(columns, str):
+                self.segments.append(text_segment(columns, transformer, output.stop - output.start, name))
+            elif isinstance(transformer, OneHotEncoder):
+                self._add_one_hot_segments(transformer, list(columns), name)
+            else:
+                raise ValueError(f"Transformador '{name}' não suportado para cache de features.")
+
+        self._index_segments()
+
+        self.engine = None
+        if engine == "numpy":
+            try:
+                self.engine = ForestEngine.from_forest(self.classifier)
+            except ValueError as e:
+                print(f"Motor NumPy indisponível, usando o classificador do sklearn: {e}")
+
+    @classmethod
+    def from_segments(cls, segments, classifier, engine=None):
+        """Montar a partir de segmentos já prontos (ex.: lidos do diretório de artefatos)."""
+        pipeline = cls.__new__(cls)
+        pipeline.classifier = classifier
+        pipeline.segments = segments
+        pipeline.engine = engine
+        pipeline._index_segments()
+        return pipeline
+
+    def _index_segments(self):
+        self.text_columns = [c for s in self.segments if s.categories is None for c in s.columns]
+        self.categorical_columns = [c for s in self.segments if s.categories is not None for c in s.columns]
+        self.applicant_columns = [c for s in self.segments if s.side == APPLICANT for c in s.columns]
+        self.job_columns = [c for s in self.segments if s.side == JOB for c in s.columns]
+        self.job_features = np.concatenate([np.full(s.width, s.side == JOB) for s in self.segments])
+
+    def _add_one_hot_segments(self, encoder, columns, name=None):
+        """Quebrar o OneHotEncoder em segmentos contíguos de um mesmo lado."""
+        if encoder.drop is not None or encoder.handle_unknown != "ignore" or getattr(encoder, "_infrequent_enabled", False):
+            raise ValueError("OneHotEncoder com drop/infrequent não suportado.")
+
+        start = 0
+        while start < len(columns):
+            side = column_side(columns[start])
+            stop = start
+            while stop < len(columns) and column_side(columns[stop]) == side:
+                stop += 1
+            self.segments.append(one_hot_segment(side, columns[start:stop], encoder.categories_[start:stop], name))
+            start = stop
+
+    def normalize(self, df, columns):
+        """Mesmo tratamento de nulos aplicado pela rota antes do modelo."""
+        df = df[columns].copy()
+        for col in columns:
+            if col in self.text_columns:
+                df[col] = df[col].fillna("")
+            else:
+                df[col] = fill_categorical(df[col])
+        return df
+
+    def transform_side(self, df, side):
+        """Transformar apenas os segmentos de um lado. Os demais ficam como None."""
+        return [segment.transform(df) if segment.side == side else None for segment in self.segments]
+
+    def transform_applicants(self, applicants):
+        missing = [c for c in self.applicant_columns if c not in applicants.columns]
+        if missing:
+            raise ValueError(f"Colunas ausentes na base de candidatos: {missing}")
+        return self.transform_side(self.normalize(applicants, self.applicant_columns), APPLICANT)
+
+    def transform_jobs(self, vagas):
+        """Transformar várias vagas de uma vez e devolver os blocos de cada uma."""
+        jobs_df = pd.DataFrame([{col: vaga.get(col, np.nan) for col in self.job_columns} for vaga in vagas])
+        jobs_df = self.normalize(jobs_df, self.job_columns)
+        # Mesmo que transform_side, com uma etapa medida por transformador (tfidf_i, onehot)
+        blocks = []
+        for i, segment in enumerate(self.segments):
+            if segment.side != JOB:
+                blocks.append(None)
+                continue
+            with metrics.stage(segment.name or f"segment_{i}"):
+                blocks.append(segment.transform(jobs_df))
+        return [[None if b is None else b[i:i + 1] for b in blocks] for i in range(len(vagas))]
+
+    def transform_job(self, vaga_data):
+        return self.transform_jobs([vaga_data])[0]
+
+    def assemble(self, applicant_blocks, job_blocks, rows=None):
+        """Concatenar os blocos dos candidatos com a linha da vaga replicada."""
+        blocks = []
+        for segment, applicant_block, job_block in zip(self.segments, applicant_blocks, job_blocks):
+            if segment.side == APPLICANT:
+                blocks.append(applicant_block if rows is None else applicant_block[rows])
+        n_rows = blocks[0].shape[0] if blocks else 0
+
+        blocks = iter(blocks)
+        ordered = [
+            next(blocks) if segment.side == APPLICANT else broadcast_row(job_block, n_rows)
+            for segment, job_block in zip(self.segments, job_blocks)
+        ]
+        return sp.hstack(ordered, format="csr")
+
+    def transform(self, df):
+        """Matriz completa (equivalente a preprocessor.transform) para um DataFrame já normalizado."""
+        return sp.hstack([segment.transform(df) for segment in self.segments], format="csr")
+
+    def side_matrix(self, blocks, side):
+        """Layout completo de colunas com apenas os segmentos de um lado preenchidos."""
+        n_rows = next(b.shape[0] for s, b in zip(self.segments, blocks) if s.side == side)
+        return sp.hstack([
+            block if segment.side == side else sp.csr_matrix((n_rows, segment.width))
+            for segment, block in zip(self.segments, blocks)
+        ], format="csr")
+
+
+class ApplicantFeatures:
+    """Bloco esparso dos candidatos, calculado uma única vez por base."""
+
+    def __init__(self, pipeline, applicants, term_index=False):
+        self.pipeline = pipeline
+        self.n_rows = len(applicants)
+        self.blocks = pipeline.transform_applicants(applicants)
+
+        # Índice invertido para a pré-seleção de candidatos (src/inference/retrieval.py)
+        self.term_index = None
+        if term_index:
+            from .retrieval import TermIndex
+            try:
+                self.term_index = TermIndex(pipeline, self.blocks)
+            except ValueError as e:
+                print(f"Índice invertido indisponível: {e}")
+
+        # Folhas da floresta compatíveis com cada candidato (motor NumPy)
+        self.leaves = None
+        if pipeline.engine is not None:
+            self.leaves = pipeline.engine.applicant_leaves(
+                pipeline.side_matrix(self.blocks, APPLICANT), pipeline.job_features
+            )
+
+    @classmethod
+    def from_blocks(cls, pipeline, blocks, leaves=None, term_index=None):
+        """Reaproveitar blocos já calculados (ex.: mapeados do diretório de artefatos)."""
+        features = cls.__new__(cls)
+        features.pipeline = pipeline
+        features.blocks = blocks
+        features.n_rows = next(b.shape[0] for b in blocks if b is not None)
+        features.leaves = leaves
+        features.term_index = term_index
+        return features
+
+    def build_matrix(self, vaga_data, rows=None):
+        """Matriz de features (candidatos x vaga) pronta para o classificador."""
+        job_blocks = self.pipeline.transform_job(vaga_data)
+        return self.pipeline.assemble(self.blocks, job_blocks, rows)
+
+    def predict_proba(self, job_blocks, rows=None):
+        """Probabilidades de várias vagas (já transformadas) em uma única chamada."""
+        if self.leaves is not None:
+            engine = self.pipeline.engine
+            incidence = self.leaves if rows is None else self.leaves[rows]
+            with metrics.stage("classifier"):
+                job_masks = [
+                    engine.job_leaves(self.pipeline.side_matrix(blocks, JOB), self.pipeline.job_features)
+                    for blocks in job_blocks
+                ]
+                return engine.leaf_proba(incidence, job_masks)
+
+        with metrics.stage("assemble"):
+            matrix = sp.vstack([self.pipeline.assemble(self.blocks, blocks, rows) for blocks in job_blocks], format="csr")
+        with metrics.stage("classifier"):
+            probabilities = self.pipeline.classifier.predict_proba(matrix)
+        return np.split(probabilities, len(job_blocks))
+
+
+class SegmentedFeatures:
+    """Features da base original seguida de segmentos delta (candidatos ingeridos depois).
+
+    Tem a mesma interface usada no ranqueamento que ApplicantFeatures: as linhas
+    pedidas são repartidas entre os segmentos e as probabilidades voltam na ordem
+    original. Acrescentar um segmento não recalcula nem copia os anteriores.
+    """
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.pipeline = segments[0].pipeline
+        self.offsets = np.concatenate([[0], np.cumsum([segment.n_rows for segment in segments])])
+        self.n_rows = int(self.offsets[-1])
+        self.blocks = None
+        self.leaves = None
+
+        self.term_index = None
+        if all(segment.term_index is not None for segment in segments):
+            from .retrieval import SegmentedTermIndex
+            self.term_index = SegmentedTermIndex([segment.term_index for segment in segments], self.offsets[:-1])
+
+    @classmethod
+    def extend(cls, features, delta):
+        base = features.segments if isinstance(features, SegmentedFeatures) else [features]
+        return cls(base + [delta])
+
+    def compact(self):
+        """Juntar os segmentos delta em um só (custo proporcional aos deltas, não à base)."""
+        if len(self.segments) <= 2:
+            return self
+        deltas = self.segments[1:]
+        blocks = [
+            None if block is None else sp.vstack([d.blocks[i] for d in deltas], format="csr")
+            for i, block in enumerate(deltas[0].blocks)
+        ]
+        leaves = None if deltas[0].leaves is None else sp.vstack([d.leaves for d in deltas], format="csr")
+        term_index = None
+        if deltas[0].term_index is not None:
+            from .retrieval import TermIndex
+            term_index = TermIndex(self.pipeline, blocks)
+        return SegmentedFeatures([self.segments[0], ApplicantFeatures.from_blocks(self.pipeline, blocks, leaves, term_index)])
+
+    def predict_proba(self, job_blocks, rows=None):
+        positions = np.arange(self.n_rows)[rows if rows is not None else slice(None)]
+        segment_ids = np.searchsorted(self.offsets[1:], positions, side="right")
+        n_classes = len(self.pipeline.classifier.classes_)
+        probabilities = [np.empty((len(positions), n_classes)) for _ in job_blocks]
+        for i, segment in enumerate(self.segments):
+            selected = segment_ids == i
+            if not selected.any():
+                continue
+            local = positions[selected] - self.offsets[i]
+            if np.all(np.diff(local) == 1):
+                local = slice(int(local[0]), int(local[-1]) + 1)
+            for output, segment_probabilities in zip(probabilities, segment.predict_proba(job_blocks, local)):
+                output[selected] = segment_probabilities
+        return probabilities
+
+
+class FeatureCache:
+    """Mantém as features dos candidatos enquanto o modelo e a base não mudam.
+
+    Guarda as max_entries combinações (modelo, base) mais recentes e evita
+    recalcular as features de uma base já vista. A API guarda as features de
+    cada versão servida na própria versão (ServingState.features), então uma
+    entrada descartada daqui não afeta as requisições em andamento.
+    """
+
+    def __init__(self, engine="sklearn", term_index=False, max_entries=2):
+        self.engine = engine
+        self.term_index = term_index
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = []  # (modelo, base, features), a mais recente por último
+
+    def get(self, model, applicants, **build_args):
+        """Retorna ApplicantFeatures ou None quando o modelo não permite o cache.
+
+        build_args vão para _build (ex.: as features da floresta no CascadeCache).
+        """
+        if model is None or applicants is None:
+            return None
+        with self._lock:
+            for i, (cached_model, cached_applicants, features) in enumerate(self._entries):
+                if cached_model is model and cached_applicants is applicants:
+                    self._entries.append(self._entries.pop(i))
+                    return features
+
+        # Calculado fora do lock para não bloquear as requisições da versão atual
+        try:
+            features = self._build(model, applicants, **build_args)
+        except ValueError as e:
+            print(f"Cache de features indisponível: {e}")
+            features = None
+        with self._lock:
+            self._entries.append((model, applicants, features))
+            del self._entries[:-self.max_entries]
+        return features
+
+    def put(self, model, applicants, features):
+        """Registrar features montadas fora do cache (ex.: base + segmentos delta)."""
+        with self._lock:
+            self._entries = [e for e in self._entries if e[0] is not model or e[1] is not applicants]
+            self._entries.append((model, applicants, features))
+            del self._entries[:-self.max_entries]
+
+    def _build(self, model, applicants):
+        from .artifacts import ArtifactModel
+        if isinstance(model, ArtifactModel):
+            # Artefatos já trazem as features da base exportada
+            if applicants is model.applicants:
+                return model.features
+            return ApplicantFeatures(model.split_pipeline, applicants, self.term_index)
+        return ApplicantFeatures(SplitPipeline(model, self.engine), applicants, self.term_index)
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
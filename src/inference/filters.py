@@ -0,0 +1,167 @@
+import threading
+
+import numpy as np
+
+from .features import fill_categorical
+
+# Níveis em ordem crescente, para os filtros de nível mínimo (<coluna>_min=<nível>)
+IDIOMA_LEVELS = ["Nenhum", "Básico", "Intermediário", "Avançado", "Fluente"]
+ACADEMIC_LEVELS = [
+    "Ensino Fundamental Incompleto", "Ensino Fundamental Cursando", "Ensino Fundamental Completo",
+    "Ensino Médio Incompleto", "Ensino Médio Cursando", "Ensino Médio Completo",
+    "Ensino Técnico Incompleto", "Ensino Técnico Cursando", "Ensino Técnico Completo",
+    "Ensino Superior Incompleto", "Ensino Superior Cursando", "Ensino Superior Completo",
+    "Pós Graduação Incompleto", "Pós Graduação Cursando", "Pós Graduação Completo",
+    "Mestrado Incompleto", "Mestrado Cursando", "Mestrado Completo",
+    "Doutorado Incompleto", "Doutorado Cursando", "Doutorado Completo"
+]
+ORDERED_LEVELS = {
+    "app_form_nivel_ingles": IDIOMA_LEVELS,
+    "app_form_nivel_espanhol": IDIOMA_LEVELS,
+    "app_form_nivel_academico": ACADEMIC_LEVELS
+}
+
+
+def parse_filters(args, columns):
+    """Filtros da query string sobre as colunas categóricas dos candidatos.
+
+    <coluna>=v1,v2 aceita os valores listados e <coluna>_min=nível aceita o nível
+    e os acima dele (colunas de ORDERED_LEVELS). Vários filtros se combinam com E.
+    Retorna {coluna: [valores aceitos]} ou None sem filtros.
+    """
+    filters = {}
+    for column in columns:
+        allowed = None
+        if args.get(column):
+            allowed = {value.strip() for value in args.get(column).split(",") if value.strip()}
+        minimum = args.get(f"{column}_min")
+        if minimum:
+            levels = ORDERED_LEVELS.get(column)
+            if levels is None:
+                raise ValueError(f"Coluna {column} não tem níveis ordenados para o filtro {column}_min.")
+            if minimum not in levels:
+                raise ValueError(f"Nível '{minimum}' inválido para {column}_min. Use um de: {levels}")
+            above = set(levels[levels.index(minimum):])
+            allowed = above if allowed is None else allowed & above
+        if allowed is not None:
+            filters[column] = sorted(allowed)
+    return filters or None
+
+
+class BitmapIndex:
+    """Bitmaps (np.packbits) dos candidatos de cada valor das colunas categóricas.
+
+    Montado uma única vez por base: um filtro vira OU dos bitmaps dos valores
+    aceitos de cada coluna e E entre as colunas, sem tocar no DataFrame.
+    Valores nulos ficam como "Desconhecido", igual ao tratamento da predição.
+    """
+
+    def __init__(self, applicants, columns):
+        self.n_rows = len(applicants)
+        self.bitmaps = {}
+        for column in columns:
+            values = self._values(applicants, column)
+            categories, codes = np.unique(values, return_inverse=True)
+            self.bitmaps[column] = {category: np.packbits(codes == i) for i, category in enumerate(categories)}
+
+    @staticmethod
+    def _values(applicants, column):
+        if column not in applicants.columns:
+            return np.full(len(applicants), "Desconhecido", dtype=object)
+        return fill_categorical(applicants[column]).to_numpy(dtype=object)
+
+    def extend(self, delta):
+        """Índice da base com os candidatos de delta no fim (ingestão incremental).
+
+        Os bitmaps anteriores não são copiados: o delta ganha um índice próprio,
+        então o custo acompanha o tamanho do delta (SegmentedBitmapIndex).
+        """
+        return SegmentedBitmapIndex([self, BitmapIndex(delta, list(self.bitmaps))])
+
+    @classmethod
+    def concat(cls, indexes):
+        """Um índice com as linhas de indexes em sequência (custo proporcional às linhas juntadas)."""
+        index = cls.__new__(cls)
+        index.n_rows = sum(part.n_rows for part in indexes)
+        index.bitmaps = {}
+        for column in indexes[0].bitmaps:
+            categories = set().union(*(part.bitmaps[column] for part in indexes))
+            index.bitmaps[column] = {
+                category: np.packbits(np.concatenate([
+                    np.unpackbits(part.bitmaps[column][category], count=part.n_rows)
+                    if category in part.bitmaps[column] else np.zeros(part.n_rows, dtype=np.uint8)
+                    for part in indexes
+                ]))
+                for category in categories
+            }
+        return index
+
+    def select(self, filters):
+        """Posições (em ordem crescente) dos candidatos que atendem a todos os filtros."""
+        selected = np.full((self.n_rows + 7) // 8, 0xFF, dtype=np.uint8)
+        for column, allowed in filters.items():
+            bitmaps = self.bitmaps.get(column, {})
+            matches = np.zeros_like(selected)
+            for value in allowed:
+                if value in bitmaps:
+                    matches |= bitmaps[value]
+            selected &= matches
+        return np.flatnonzero(np.unpackbits(selected, count=self.n_rows))
+
+
+class SegmentedBitmapIndex:
+    """Índice da base original seguida de segmentos delta, com a interface de BitmapIndex.
+
+    Como em SegmentedFeatures, acrescentar um segmento não copia os anteriores;
+    select junta as posições selecionadas em cada segmento.
+    """
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.offsets = np.concatenate([[0], np.cumsum([segment.n_rows for segment in segments])])
+        self.n_rows = int(self.offsets[-1])
+
+    def extend(self, delta):
+        return SegmentedBitmapIndex(self.segments + [BitmapIndex(delta, list(self.segments[0].bitmaps))])
+
+    def compact(self):
+        """Juntar os segmentos delta em um só (custo proporcional aos deltas, não à base)."""
+        if len(self.segments) <= 2:
+            return self
+        return SegmentedBitmapIndex([self.segments[0], BitmapIndex.concat(self.segments[1:])])
+
+    def select(self, filters):
+        return np.concatenate([
+            segment.select(filters) + offset for segment, offset in zip(self.segments, self.offsets[:-1])
+        ])
+
+
+class FilterCache:
+    """Índices de filtro das max_entries bases mais recentes (a servida e a que está sendo recarregada)."""
+
+    def __init__(self, columns, max_entries=2):
+        self.columns = columns
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = []  # (base, índice), a mais recente por último
+
+    def get(self, applicants):
+        if applicants is None:
+            return None
+        with self._lock:
+            for cached_applicants, index in self._entries:
+                if cached_applicants is applicants:
+                    return index
+        index = BitmapIndex(applicants, self.columns)
+        self.put(applicants, index)
+        return index
+
+    def put(self, applicants, index):
+        with self._lock:
+            self._entries = [e for e in self._entries if e[0] is not applicants]
+            self._entries.append((applicants, index))
+            del self._entries[:-self.max_entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
@@ -0,0 +1,183 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestClassifier
+
+
+class ForestEngine:
+    """Random Forest achatada em arrays NumPy contíguos para inferência vetorizada.
+
+    Todas as árvores ficam em um único conjunto de arrays (feature, threshold,
+    filhos e probabilidades das folhas). As folhas apontam para si mesmas, então
+    max_depth passos de descida levam todas as amostras até uma folha.
+
+    Além da descida completa (predict_proba), o motor separa os caminhos entre
+    nós que testam features do candidato e nós que testam features da vaga:
+    applicant_leaves() calcula uma única vez, para cada candidato, as folhas
+    compatíveis com as features dele, e job_leaves() faz o mesmo para a vaga.
+    A folha real de cada árvore é a única compatível com os dois lados, então a
+    probabilidade vira uma soma dos valores das folhas (leaf_proba).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, used_features,
+                 chunk_rows=4096):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.used_features = used_features
+        self.chunk_rows = chunk_rows
+
+        nodes = np.arange(len(feature))
+        self.is_leaf = left == nodes
+        self.leaf_nodes = np.flatnonzero(self.is_leaf)
+        self.leaf_index = np.full(len(feature), -1, dtype=np.int32)
+        self.leaf_index[self.leaf_nodes] = np.arange(len(self.leaf_nodes), dtype=np.int32)
+        self.leaf_value = np.ascontiguousarray(value[self.leaf_nodes])
+
+    @classmethod
+    def from_forest(cls, forest, chunk_rows=4096):
+        """Conversão única de um RandomForestClassifier já treinado."""
+        if not isinstance(forest, RandomForestClassifier) or forest.n_outputs_ != 1:
+            raise ValueError("Motor NumPy suporta apenas RandomForestClassifier com uma saída.")
+
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        used_features = np.unique(np.concatenate([t.feature[t.children_left >= 0] for t in trees]))
+        local_index = np.zeros(forest.n_features_in_, dtype=np.int32)
+        local_index[used_features] = np.arange(len(used_features), dtype=np.int32)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            nodes = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left < 0
+            features.append(np.where(is_leaf, 0, local_index[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(is_leaf, nodes, tree.children_right + offset))
+
+            # Mesma normalização de DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int32),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int32),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(t.max_depth for t in trees),
+            classes=forest.classes_,
+            used_features=used_features.astype(np.int32),
+            chunk_rows=chunk_rows
+        )
+
+    def _dense(self, X):
+        # Só as colunas usadas por alguma árvore, em float32 como no sklearn
+        return np.ascontiguousarray(X[:, self.used_features].toarray(), dtype=np.float32)
+
+    def _predict_chunk(self, X):
+        dense = self._dense(X).ravel()
+        n_rows = X.shape[0]
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * len(self.used_features))[:, None]
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+
+        for _ in range(self.max_depth):
+            x = dense.take(row_offsets + self.feature.take(nodes))
+            nodes = np.where(x <= self.threshold.take(nodes), self.left.take(nodes), self.right.take(nodes))
+
+        return self.value[nodes].sum(axis=1) / len(self.roots)
+
+    def predict_proba(self, X):
+        """Probabilidades médias das árvores para uma matriz esparsa CSR."""
+        X = X.tocsr()
+        if X.shape[0] == 0:
+            return np.empty((0, len(self.classes_)))
+        return np.concatenate([
+            self._predict_chunk(X[start:start + self.chunk_rows])
+            for start in range(0, X.shape[0], self.chunk_rows)
+        ])
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def _reachable_leaves(self, X, follow):
+        """Folhas alcançáveis por linha seguindo só os nós marcados em follow.
+
+        Nos demais nós internos os dois filhos são visitados. Retorna pares
+        (linha, índice da folha).
+        """
+        dense = self._dense(X)
+        n_used = dense.shape[1]
+        dense = dense.ravel()
+        rows = np.repeat(np.arange(X.shape[0], dtype=np.int64), len(self.roots))
+        nodes = np.tile(self.roots, X.shape[0])
+        out_rows, out_leaves = [], []
+
+        while len(rows):
+            leaf = self.is_leaf[nodes]
+            out_rows.append(rows[leaf])
+            out_leaves.append(self.leaf_index[nodes[leaf]])
+            rows, nodes = rows[~leaf], nodes[~leaf]
+
+            followed = follow[nodes]
+            rows_f, nodes_f = rows[followed], nodes[followed]
+            x = dense.take(rows_f * n_used + self.feature[nodes_f])
+            nodes_f = np.where(x <= self.threshold[nodes_f], self.left[nodes_f], self.right[nodes_f])
+            rows_b, nodes_b = rows[~followed], nodes[~followed]
+
+            rows = np.concatenate([rows_f, rows_b, rows_b])
+            nodes = np.concatenate([nodes_f, self.left[nodes_b], self.right[nodes_b]])
+
+        return np.concatenate(out_rows), np.concatenate(out_leaves)
+
+    def job_nodes(self, job_features):
+        """Nós internos cujo teste usa uma feature da vaga (máscara global de features)."""
+        return ~self.is_leaf & job_features[self.used_features[self.feature]]
+
+    def applicant_leaves(self, X, job_features):
+        """Incidência candidato x folha, calculada uma vez para a base de candidatos.
+
+        X tem o layout completo de colunas (as colunas da vaga são ignoradas).
+        Retorna uma CSR de uns (float64, para o produto esparso não converter a
+        matriz a cada requisição) com as folhas em ordem de árvore em cada linha.
+        """
+        follow = ~self.is_leaf & ~self.job_nodes(job_features)
+        blocks = []
+        for start in range(0, X.shape[0], self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            rows, leaves = self._reachable_leaves(chunk, follow)
+            block = sp.csr_matrix(
+                (np.ones(len(rows)), (rows, leaves)), shape=(chunk.shape[0], len(self.leaf_nodes))
+            )
+            block.sort_indices()
+            blocks.append(block)
+        if not blocks:
+            return sp.csr_matrix((0, len(self.leaf_nodes)))
+        return sp.vstack(blocks, format="csr")
+
+    def job_leaves(self, job_row, job_features):
+        """Máscara das folhas compatíveis com as features de uma vaga (linha 1 x D)."""
+        _, leaves = self._reachable_leaves(job_row, self.job_nodes(job_features))
+        mask = np.zeros(len(self.leaf_nodes), dtype=bool)
+        mask[leaves] = True
+        return mask
+
+    def leaf_proba(self, incidence, job_masks):
+        """Probabilidades de várias vagas a partir da incidência dos candidatos.
+
+        Uma única multiplicação esparsa (candidatos x folhas) @ (folhas x 2 vagas).
+        """
+        n_classes = len(self.classes_)
+        weights = np.hstack([self.leaf_value * mask[:, None] for mask in job_masks])
+        proba = incidence @ weights / len(self.roots)
+        return [proba[:, i * n_classes:(i + 1) * n_classes] for i in range(len(job_masks))]
@@ -0,0 +1,184 @@
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .applicants import APPLICANT_COLUMNS, load_parquet
+
+# Seções aninhadas do applicants.json e o prefixo das colunas (como em data_preparation.prepare_data)
+APPLICANT_SECTIONS = {"informacoes_profissionais": "app_prof_", "formacao_e_idiomas": "app_form_"}
+
+
+def flatten_applicants(records):
+    """Achatar candidatos no formato do applicants.json nas colunas da base processada.
+
+    records pode ser o dicionário {código: candidato} do applicants.json ou uma
+    lista de candidatos. O ID_APPLICANT vem de infos_basicas.codigo_profissional,
+    como no prepare_data, e na falta dele da chave do dicionário.
+    """
+    if isinstance(records, dict):
+        records = [dict(record, ID_APPLICANT_raw=key) for key, record in records.items()]
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError("Envie uma lista de candidatos ou um objeto {código: candidato}.")
+    if not records:
+        return pd.DataFrame(columns=APPLICANT_COLUMNS)
+
+    ids = []
+    for i, record in enumerate(records):
+        infos_basicas = record.get("infos_basicas") if isinstance(record.get("infos_basicas"), dict) else {}
+        applicant_id = infos_basicas.get("codigo_profissional") or record.get("ID_APPLICANT") or record.get("ID_APPLICANT_raw")
+        if applicant_id is None:
+            raise ValueError(f"Candidato {i}: infos_basicas.codigo_profissional ausente.")
+        ids.append(str(applicant_id))
+
+    df = pd.DataFrame({"ID_APPLICANT": ids, "cv_pt": [record.get("cv_pt") for record in records]})
+    for section, prefix in APPLICANT_SECTIONS.items():
+        expanded = pd.json_normalize([record.get(section) or {} for record in records])
+        expanded.columns = [f"{prefix}{col}" for col in expanded.columns]
+        df = pd.concat([df, expanded], axis=1)
+
+    # Um mesmo candidato enviado mais de uma vez: vale o último
+    df = df.drop_duplicates("ID_APPLICANT", keep="last")
+    return df.reindex(columns=APPLICANT_COLUMNS).reset_index(drop=True)
+
+
+def concat_applicants(base, delta):
+    """Acrescentar candidatos à base mantendo os dtypes compactos (category, string[pyarrow])."""
+    delta = delta.reindex(columns=base.columns)
+    for col in base.columns:
+        dtype = base[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            new_categories = pd.Index(delta[col].dropna().unique()).difference(dtype.categories)
+            if len(new_categories):
+                base = base.assign(**{col: base[col].cat.add_categories(new_categories)})
+                dtype = base[col].dtype
+        delta[col] = delta[col].astype(object).astype(dtype)
+    return pd.concat([base, delta], ignore_index=True)
+
+
+class SegmentedApplicants:
+    """Base de candidatos seguida de segmentos delta, sem copiar a base a cada ingestão.
+
+    Features, bitmaps e pontuações da cascata já são montados por segmento;
+    da base combinada a predição só lê o tamanho e os IDs das posições
+    selecionadas. frame() junta tudo (caminho sem cache de features).
+    """
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.offsets = np.concatenate([[0], np.cumsum([len(segment) for segment in segments])])
+
+    @classmethod
+    def extend(cls, applicants, delta):
+        base = applicants.segments if isinstance(applicants, SegmentedApplicants) else [applicants]
+        return cls(base + [delta])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def compact(self):
+        """Juntar os segmentos delta em um só (custo proporcional aos deltas, não à base)."""
+        if len(self.segments) <= 2:
+            return self
+        deltas = self.segments[1]
+        for segment in self.segments[2:]:
+            deltas = concat_applicants(deltas, segment)
+        return SegmentedApplicants([self.segments[0], deltas])
+
+    def ids(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        segment_ids = np.searchsorted(self.offsets[1:], positions, side="right")
+        ids = np.empty(len(positions), dtype=object)
+        for i, segment in enumerate(self.segments):
+            selected = segment_ids == i
+            if selected.any():
+                ids[selected] = segment["ID_APPLICANT"].iloc[positions[selected] - self.offsets[i]].to_numpy()
+        return ids
+
+    def frame(self):
+        combined = self.segments[0]
+        for segment in self.segments[1:]:
+            combined = concat_applicants(combined, segment)
+        return combined
+
+
+def applicant_ids(applicants, positions):
+    """IDs dos candidatos nas posições (da base, ou da base + deltas)."""
+    if isinstance(applicants, SegmentedApplicants):
+        return applicants.ids(positions)
+    return applicants["ID_APPLICANT"].iloc[positions].to_numpy()
+
+
+class ApplicantIds:
+    """IDs (como texto) dos candidatos de uma versão, para a ingestão ignorar os que já estão na base.
+
+    O conjunto da base é montado uma vez; cada ingestão acrescenta só os IDs
+    novos ao conjunto dos deltas, que é pequeno.
+    """
+
+    def __init__(self, base, deltas=frozenset()):
+        self.base = base
+        self.deltas = deltas
+
+    @classmethod
+    def from_applicants(cls, applicants):
+        segments = applicants.segments if isinstance(applicants, SegmentedApplicants) else [applicants]
+        return cls(frozenset().union(*(segment["ID_APPLICANT"].astype(str) for segment in segments)))
+
+    def known(self, ids):
+        """Máscara dos ids que já estão na versão."""
+        return np.array([i in self.base or i in self.deltas for i in ids], dtype=bool)
+
+    def extend(self, ids):
+        return ApplicantIds(self.base, self.deltas | frozenset(ids))
+
+
+class DeltaStore:
+    """Segmentos delta de candidatos em parquet, gravados ao lado da base processada.
+
+    Cada ingestão grava um arquivo novo (delta-<ns>.parquet) de forma atômica;
+    compact() junta os arquivos em um só. Candidatos repetidos entre arquivos
+    (ex.: compactação interrompida) ficam só uma vez na leitura.
+    """
+
+    def __init__(self, directory, max_segments=8):
+        self.directory = directory
+        self.max_segments = max_segments
+
+    def files(self):
+        return sorted(glob.glob(os.path.join(self.directory, "delta-*.parquet")))
+
+    def needs_compaction(self):
+        return len(self.files()) > self.max_segments
+
+    def load(self):
+        """Todos os deltas em um DataFrame (ou None se não houver)."""
+        frames = [df for df in (load_parquet(path) for path in self.files()) if df is not None and len(df)]
+        if not frames:
+            return None
+        delta = frames[0]
+        for frame in frames[1:]:
+            delta = concat_applicants(delta, frame)
+        return delta.drop_duplicates("ID_APPLICANT", keep="first").reset_index(drop=True)
+
+    def _write(self, df, path):
+        temporary = os.path.join(self.directory, f".{os.path.basename(path)}.tmp")
+        df.to_parquet(temporary, index=False)
+        os.replace(temporary, path)
+
+    def append(self, df):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"delta-{time.time_ns()}.parquet")
+        self._write(df, path)
+        return path
+
+    def compact(self):
+        """Juntar os arquivos delta no último deles (custo proporcional aos deltas)."""
+        files = self.files()
+        if len(files) <= 1:
+            return
+        self._write(self.load(), files[-1])
+        for path in files[:-1]:
+            os.remove(path)
@@ -0,0 +1,180 @@
+import threading
+import time
+from contextlib import nullcontext
+
+# Limites dos buckets dos histogramas de duração (segundos)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NO_TIMER = nullcontext()
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Contador monotônico por combinação de labels, no formato texto do Prometheus."""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *values):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    """Histograma cumulativo (buckets, soma e contagem) por combinação de labels."""
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [contagens por bucket (+Inf no fim), soma]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *values):
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), values + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Métricas da predição: duração por etapa e por requisição, requisições e candidatos pontuados.
+
+    Desativado, stage() devolve um contexto vazio e os contadores não são
+    atualizados. Com um trace aberto na thread (start_trace, header de debug)
+    as etapas também são anotadas para a resposta, mesmo com as métricas
+    desativadas. Etapas executadas em outros processos (shards) não entram no
+    trace da requisição; as de outras threads entram quando quem as executa as
+    repassa com extend_trace (ex.: lotes do micro-batching).
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.stages = Histogram("predict_stage_seconds", "Duração de cada etapa da predição.", ("stage",), buckets)
+        self.latency = Histogram("predict_request_seconds", "Duração das requisições de predição.", ("route",), buckets)
+        self.requests = Counter("predict_requests_total", "Requisições de predição por rota e status.",
+                                ("route", "status"))
+        self.candidates = Counter("predict_candidates_total", "Pares vaga x candidato pontuados.")
+        self._local = threading.local()
+
+    def stage(self, name):
+        """Contexto que mede uma etapa (ex.: with metrics.stage("tfidf_0"): ...)."""
+        if not self.enabled and getattr(self._local, "trace", None) is None:
+            return _NO_TIMER
+        return _StageTimer(self, name)
+
+    def record_stage(self, name, seconds):
+        if self.enabled:
+            self.stages.observe(seconds, name)
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.append((name, seconds))
+
+    def start_trace(self):
+        self._local.trace = []
+
+    def tracing(self):
+        """Se há um trace aberto na thread."""
+        return getattr(self._local, "trace", None) is not None
+
+    def extend_trace(self, stages):
+        """Anotar no trace da thread etapas medidas em outra thread."""
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.extend(stages)
+
+    def end_trace(self):
+        """Etapas anotadas na thread desde start_trace, em ordem de término."""
+        trace = getattr(self._local, "trace", None)
+        self._local.trace = None
+        return trace or []
+
+    def observe_request(self, route, status, seconds):
+        if self.enabled:
+            self.latency.observe(seconds, route)
+            self.requests.inc(1, route, str(status))
+
+    def count_candidates(self, pairs):
+        if self.enabled:
+            self.candidates.inc(pairs)
+
+    def render(self, collected=()):
+        """Texto de exposição do Prometheus.
+
+        collected são valores lidos na hora da coleta, como (nome, tipo, ajuda, valor)
+        (ex.: contadores do cache de resultados, tamanho da base servida).
+        """
+        lines = []
+        for metric in (self.stages, self.latency, self.requests, self.candidates):
+            lines.extend(metric.render())
+        for name, kind, help, value in collected:
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {float(value)}"])
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(trace):
+    """Etapas no formato do header Server-Timing (ms), somando as repetições (ex.: um classifier por bloco)."""
+    totals = {}
+    for name, seconds in trace:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items())
+
+
+# Instância do processo. A API ativa com PREDICT_METRICS (src/routes/prediction.py);
+# scripts de treino e benchmarks usam o mesmo código sem medir nada.
+metrics = Metrics()
@@ -0,0 +1,48 @@
+import numpy as np
+
+DEFAULT_TOP_K = 5
+
+
+def top_k_indices(scores, k, min_probability=None):
+    """Posições dos k maiores scores em ordem decrescente, em O(n).
+
+    Empates são resolvidos pela posição (menor primeiro), igual ao sorted()
+    estável usado antes, para que o resultado não mude.
+    """
+    scores = np.asarray(scores)
+    candidates = np.arange(len(scores)) if min_probability is None else np.flatnonzero(scores >= min_probability)
+    values = scores[candidates]
+
+    if k < len(candidates):
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(candidates))
+
+    order = np.lexsort((selected, -values[selected]))
+    return candidates[selected[order]]
+
+
+def to_python(value):
+    """Converter escalares numpy para tipos serializáveis em JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def format_matches(positions, probabilities, classes, applicant_ids):
+    """Montar a resposta apenas para os candidatos selecionados.
+
+    probabilities tem uma linha por posição selecionada, na mesma ordem.
+    """
+    labels = np.asarray(classes).take(np.argmax(probabilities, axis=1)) if len(positions) else []
+    return [
+        {
+            "index": int(i),
+            "applicant_index": to_python(applicant_ids[i]),  # ID do candidato na posição i da base
+            "prediction": int(label),
+            "probability_no_match": float(proba[0]),
+            "probability_match": float(proba[1])
+        }
+        for i, label, proba in zip(positions, labels, probabilities)
+    ]
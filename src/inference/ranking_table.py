@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .batch import RunningTopK, rank_jobs
+from .ranking import format_matches
+
+# Chave dos metadados do parquet com as versões e o tamanho da tabela
+METADATA_KEY = b"ranking_table"
+
+TABLE_SCHEMA = pa.schema([
+    ("ID_VAGA", pa.string()),
+    ("job_digest", pa.string()),
+    ("rank", pa.int32()),
+    ("position", pa.int64()),
+    ("ID_APPLICANT", pa.string()),
+    ("probability_no_match", pa.float64()),
+    ("probability_match", pa.float64())
+])
+
+
+def applicant_digest(applicant_ids):
+    """Hash dos IDs da base, na ordem: detecta se a base antiga é prefixo da atual."""
+    digest = hashlib.sha256()
+    for applicant_id in applicant_ids:
+        digest.update(str(applicant_id).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+class RankingTable:
+    """Top-K pré-calculado de cada vaga do catálogo, lido do parquet do precompute_rankings.
+
+    As respostas de cada vaga são montadas uma única vez na leitura; servir uma
+    vaga conhecida é um acesso ao dicionário pelo ID e um recorte da lista.
+    """
+
+    def __init__(self, metadata, jobs):
+        self.metadata = metadata
+        self.model_version = metadata.get("model_version")
+        self.data_version = metadata.get("data_version")
+        self.top_k = metadata["top_k"]
+        self.n_applicants = metadata["n_applicants"]
+        self.jobs = jobs  # ID_VAGA -> (digest, posições, probabilidades, IDs dos candidatos)
+        classes = metadata.get("classes", [0, 1])
+        self.responses = {
+            job_id: (digest, format_matches(positions, probabilities, classes, dict(zip(positions, ids))))
+            for job_id, (digest, positions, probabilities, ids) in jobs.items()
+        }
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def usable(self, model_version, data_version):
+        """A tabela só vale para o mesmo modelo e a mesma base (incluindo os deltas)."""
+        return self.model_version == model_version and self.data_version == data_version
+
+    def matches(self, job_id, digest=None, top_k=None, min_probability=None):
+        """Top-k da vaga ou None se ela não está na tabela (ou mudou desde o cálculo)."""
+        entry = self.responses.get(str(job_id))
+        if entry is None or (digest is not None and entry[0] != digest):
+            return None
+        matches = entry[1][:top_k or self.top_k]
+        if min_probability is not None:
+            matches = [match for match in matches if match["probability_match"] >= min_probability]
+        return matches
+
+
+def load_ranking_table(path):
+    """Ler a tabela de rankings. Retorna None se o arquivo não existe ou é inválido."""
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pq.read_table(path)
+        metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        df = table.to_pandas()
+    except Exception as e:
+        print(f"Erro ao carregar a tabela de rankings de {path}: {e}")
+        return None
+
+    jobs = {}
+    for job_id, group in df.groupby("ID_VAGA", sort=False):
+        group = group.sort_values("rank")
+        jobs[job_id] = (
+            group["job_digest"].iloc[0],
+            group["position"].to_numpy(),
+            group[["probability_no_match", "probability_match"]].to_numpy(),
+            group["ID_APPLICANT"].to_numpy()
+        )
+    return RankingTable(metadata, jobs)
+
+
+def write_ranking_table(path, jobs, metadata):
+    """Gravar a tabela (arquivo temporário + rename, para o servidor nunca ler um arquivo parcial)."""
+    columns = {name: [] for name in TABLE_SCHEMA.names}
+    for job_id, (digest, positions, probabilities, ids) in jobs.items():
+        columns["ID_VAGA"] += [job_id] * len(positions)
+        columns["job_digest"] += [digest] * len(positions)
+        columns["rank"] += list(range(len(positions)))
+        columns["position"] += positions.tolist()
+        columns["ID_APPLICANT"] += [str(applicant_id) for applicant_id in ids]
+        columns["probability_no_match"] += probabilities[:, 0].tolist()
+        columns["probability_match"] += probabilities[:, 1].tolist()
+
+    schema = TABLE_SCHEMA.with_metadata({METADATA_KEY: json.dumps(metadata)})
+    temporary = f"{path}.tmp"
+    pq.write_table(pa.table(columns, schema=schema), temporary)
+    os.replace(temporary, path)
+
+
+def rank_rows(features, job_blocks, top_k, start, chunk_rows=50_000):
+    """Top-k de cada vaga só nas linhas [start, n_rows) da base (candidatos novos)."""
+    rankings = rank_jobs(
+        lambda jobs, rows: features.predict_proba(
+            [job_blocks[j] for j in jobs], slice(start + rows.start, start + rows.stop)
+        ),
+        len(job_blocks), features.n_rows - start, top_k, chunk_rows=chunk_rows
+    )
+    for ranking in rankings:
+        ranking.positions = ranking.positions + start
+    return rankings
+
+
+def update_rankings(previous, catalogue, features, applicant_ids, top_k, rank_all, model_version=None,
+                    chunk_rows=50_000):
+    """Top-K de cada vaga do catálogo {ID_VAGA: (digest, campos da vaga)}.
+
+    Reaproveita a tabela anterior (RankingTable ou None) quando o modelo é o
+    mesmo e a base anterior é prefixo da atual: vagas já calculadas só pontuam
+    os candidatos novos e juntam o resultado ao top-K guardado; vagas novas ou
+    alteradas pontuam a base inteira com rank_all(job_blocks). Vagas que saíram
+    do catálogo saem da tabela. Retorna as vagas e um resumo.
+    """
+    n_rows, n_old = features.n_rows, 0
+    reusable = {}
+    if previous is not None and previous.model_version == model_version and previous.top_k >= top_k:
+        n_old = previous.n_applicants
+        if n_old <= n_rows and applicant_digest(applicant_ids[:n_old]) == previous.metadata["applicant_digest"]:
+            reusable = {
+                job_id: entry for job_id, entry in previous.jobs.items()
+                if job_id in catalogue and catalogue[job_id][0] == entry[0]
+            }
+
+    full = [job_id for job_id in catalogue if job_id not in reusable]
+    jobs = {}
+
+    if full:
+        job_blocks = features.pipeline.transform_jobs([catalogue[job_id][1] for job_id in full])
+        for job_id, ranking in zip(full, rank_all(job_blocks)):
+            jobs[job_id] = (catalogue[job_id][0], ranking.positions, ranking.probabilities)
+
+    if reusable and n_old < n_rows:
+        # Top-K dos candidatos antigos ∪ top-K dos novos contém o top-K da base atual
+        job_blocks = features.pipeline.transform_jobs([catalogue[job_id][1] for job_id in reusable])
+        for job_id, ranking in zip(reusable, rank_rows(features, job_blocks, top_k, n_old, chunk_rows)):
+            digest, positions, probabilities, _ = reusable[job_id]
+            merged = RunningTopK(top_k)
+            merged.merge(positions[:top_k], probabilities[:top_k])
+            merged.merge(ranking.positions, ranking.probabilities)
+            jobs[job_id] = (digest, merged.positions, merged.probabilities)
+    else:
+        for job_id, (digest, positions, probabilities, _) in reusable.items():
+            jobs[job_id] = (digest, positions[:top_k], probabilities[:top_k])
+
+    ids = np.asarray(applicant_ids)
+    jobs = {job_id: (digest, positions, probabilities, ids[positions]) for job_id, (digest, positions, probabilities) in jobs.items()}
+    summary = {
+        "full": len(full),
+        "incremental": len(reusable) if n_old < n_rows else 0,
+        "reused": len(reusable) if n_old == n_rows else 0
+    }
+    return jobs, summary
+
+
+def table_metadata(top_k, applicant_ids, classes, model_version, data_version):
+    return {
+        "top_k": top_k,
+        "n_applicants": len(applicant_ids),
+        "applicant_digest": applicant_digest(applicant_ids),
+        "classes": [np.asarray(c).item() for c in classes],
+        "model_version": model_version,
+        "data_version": data_version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
@@ -0,0 +1,125 @@
+import copy
+import threading
+import time
+import traceback
+
+
+class ServingState:
+    """Versão servida: modelo, base de candidatos e derivados usados juntos por uma requisição.
+
+    Os derivados da base (features, bitmaps dos filtros, pontuações da cascata)
+    ficam na própria versão: uma requisição que começou antes de um reload
+    continua com eles, sem depender do que ainda está em algum cache.
+    """
+
+    def __init__(self, model, applicants, model_version=None, data_version=None, features=None, shard_scorer=None,
+                 cascade_model=None, ranking_table=None, filters=None, cascade_scores=None, applicant_ids=None,
+                 shared_arrays=None):
+        self.model = model
+        self.applicants = applicants
+        self.model_version = model_version
+        self.data_version = data_version
+        self.features = features
+        self.shard_scorer = shard_scorer
+        self.cascade_model = cascade_model
+        self.ranking_table = ranking_table
+        self.filters = filters
+        self.cascade_scores = cascade_scores
+        self.applicant_ids = applicant_ids  # IDs já presentes (ingestion.ApplicantIds), montados na primeira ingestão
+        self.shared_arrays = shared_arrays  # arrays dos candidatos mapeados no master (sharding.SharedArrays)
+
+    def replace(self, **changes):
+        """Cópia rasa com alguns campos trocados (a versão original não muda)."""
+        state = copy.copy(self)
+        for name, value in changes.items():
+            setattr(state, name, value)
+        return state
+
+
+class Reloader:
+    """Recarregamento em segundo plano com troca atômica da versão servida.
+
+    load() monta a versão nova (lenta: arquivos e features) sem afetar as
+    requisições; swap(state) só troca as referências. Com interval > 0 uma
+    thread compara fingerprint() (versões dos arquivos) a cada interval
+    segundos e recarrega quando muda. load e swap rodam sob lock, que pode ser
+    compartilhado com outras rotinas que também trocam a versão servida.
+    """
+
+    def __init__(self, load, swap, fingerprint=None, interval=0, lock=None):
+        self.load = load
+        self.swap = swap
+        self.fingerprint = fingerprint
+        self.interval = interval
+        # Lock compartilhado com outras escritas da versão servida (ex.: ingestão de candidatos)
+        self.write_lock = lock or threading.Lock()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+        self._last_fingerprint = None
+        self.reloads = 0
+        self.last_reload = None
+        self.last_error = None
+
+    @property
+    def reloading(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self, wait=False):
+        """Iniciar um recarregamento. Retorna False se já houver um em andamento."""
+        with self._lock:
+            if self.reloading:
+                return False
+            self._thread = threading.Thread(target=self._run, name="reload", daemon=True)
+            self._thread.start()
+        if wait:
+            self._thread.join()
+        return True
+
+    def _run(self):
+        try:
+            fingerprint = self.fingerprint() if self.fingerprint is not None else None
+            with self.write_lock:
+                self.swap(self.load())
+            self._last_fingerprint = fingerprint
+            self.reloads += 1
+            self.last_reload = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self.last_error = None
+        except Exception as e:
+            print(f"Erro ao recarregar modelo/base de candidatos: {e}")
+            traceback.print_exc()
+            self.last_error = str(e)
+
+    def start_watch(self):
+        """Observar os arquivos (polling) a partir do estado atual."""
+        if self.interval <= 0 or self.fingerprint is None or self._watcher is not None:
+            return
+        self._last_fingerprint = self.fingerprint()
+        self._watcher = threading.Thread(target=self._watch, name="reload-watch", daemon=True)
+        self._watcher.start()
+
+    def after_fork(self):
+        """Esquecer as threads do processo pai: depois do fork elas não existem no filho."""
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                changed = self.fingerprint() != self._last_fingerprint
+            except Exception as e:
+                print(f"Erro ao verificar os arquivos do modelo: {e}")
+                continue
+            if changed:
+                print("Arquivos do modelo/base alterados; recarregando.")
+                self.trigger(wait=True)
+
+    def status(self):
+        return {
+            "reloading": self.reloading,
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def artifact_version(path):
+    """Versão de um arquivo (modelo, parquet) a partir do mtime e do tamanho."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def canonical_key(fields, *versions):
+    """Hash estável dos campos já normalizados da vaga e das versões do modelo/base."""
+    payload = json.dumps([fields, versions], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Cache LRU com expiração (TTL) dos resultados de ranqueamento por vaga.
+
+    Fica vinculado às versões do modelo e da base de candidatos em uso: quando
+    alguma delas muda (reload, ingestão de candidatos), o cache é esvaziado.
+    Publicar outra versão do estado com as mesmas versões (ex.: compactar os
+    segmentos delta) mantém os resultados. Todas as
+    operações usam um lock, então pode ser usado por um servidor com threads.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._scope = ()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def bind(self, *versions):
+        """Esvaziar o cache se alguma das versões (modelo, base) mudou desde a última chamada."""
+        with self._lock:
+            if versions != self._scope:
+                self._entries.clear()
+                self._scope = versions
+
+    def get(self, key):
+        """Valor em cache ou None (ausente ou expirado)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and self.clock() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scope = ()
@@ -0,0 +1,161 @@
+import numpy as np
+import scipy.sparse as sp
+
+from .features import APPLICANT, JOB
+from .ranking import top_k_indices
+
+
+def select_top(candidates, scores, size, allowed=None):
+    """Posições (em ordem crescente) dos size candidatos de maior score, opcionalmente só entre allowed."""
+    if allowed is not None:
+        keep = np.isin(candidates, allowed)
+        candidates, scores = candidates[keep], scores[keep]
+    return np.sort(candidates[top_k_indices(scores, size)])
+
+
+class TermIndex:
+    """Índice invertido termo -> candidatos sobre o TF-IDF dos textos dos candidatos.
+
+    Os vocabulários de cv_pt e app_prof_conhecimentos_tecnicos formam o espaço de
+    termos; os textos da vaga são projetados nesse espaço pelos termos em comum.
+    A matriz fica em CSC, então cada coluna é a lista de candidatos de um termo.
+    """
+
+    def __init__(self, pipeline, applicant_blocks):
+        term_ids = {}
+        applicant_text = [i for i, s in enumerate(pipeline.segments) if s.side == APPLICANT and s.terms is not None]
+        job_text = [i for i, s in enumerate(pipeline.segments) if s.side == JOB and s.terms is not None]
+        if not applicant_text or not job_text:
+            raise ValueError("Pipeline sem segmentos de texto de candidato e de vaga.")
+
+        self.applicant_maps = {}
+        for i in applicant_text:
+            self.applicant_maps[i] = np.array([term_ids.setdefault(t, len(term_ids)) for t in pipeline.segments[i].terms])
+        self.job_maps = {i: np.array([term_ids.get(t, -1) for t in pipeline.segments[i].terms]) for i in job_text}
+        self.n_terms = len(term_ids)
+
+        n_rows = applicant_blocks[applicant_text[0]].shape[0]
+        matrix = sp.csr_matrix((n_rows, self.n_terms))
+        for i, term_map in self.applicant_maps.items():
+            block = applicant_blocks[i]
+            matrix = matrix + sp.csr_matrix((block.data, term_map[block.indices], block.indptr), shape=matrix.shape)
+        self.postings = matrix.tocsc()
+        self.postings.sort_indices()
+
+    @classmethod
+    def from_arrays(cls, applicant_maps, job_maps, postings):
+        """Índice já montado (ex.: mapeado do diretório de artefatos)."""
+        index = cls.__new__(cls)
+        index.applicant_maps = applicant_maps
+        index.job_maps = job_maps
+        index.n_terms = postings.shape[1]
+        index.postings = postings
+        return index
+
+    def query(self, job_blocks):
+        """Termos da vaga no espaço do índice e os respectivos pesos."""
+        weights = np.zeros(self.n_terms)
+        for i, term_map in self.job_maps.items():
+            row = job_blocks[i]
+            terms = term_map[row.indices]
+            known = terms >= 0
+            np.add.at(weights, terms[known], row.data[known])
+        terms = np.flatnonzero(weights)
+        return terms, weights[terms]
+
+    def scores(self, job_blocks):
+        """Candidatos com algum termo em comum com a vaga e o produto escalar de cada um.
+
+        O custo é proporcional às listas dos termos da vaga, não ao tamanho da base.
+        """
+        terms, weights = self.query(job_blocks)
+        starts, stops = self.postings.indptr[terms], self.postings.indptr[terms + 1]
+        lengths = stops - starts
+        if lengths.sum() == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        positions = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+        rows = self.postings.indices[positions]
+        contributions = self.postings.data[positions] * np.repeat(weights, lengths)
+
+        candidates, inverse = np.unique(rows, return_inverse=True)
+        return candidates, np.bincount(inverse, weights=contributions)
+
+    def shortlist(self, job_blocks, size, allowed=None):
+        """Até size candidatos com maior produto escalar com a vaga, em ordem de posição.
+
+        Candidatos sem nenhum termo em comum não entram na lista. Com allowed
+        (posições em ordem crescente), só esses candidatos são considerados.
+        """
+        return select_top(*self.scores(job_blocks), size, allowed)
+
+
+class SegmentedTermIndex:
+    """Índices invertidos de vários segmentos da base (base + deltas) vistos como um só."""
+
+    def __init__(self, indexes, offsets):
+        self.indexes = indexes
+        self.offsets = offsets
+
+    def scores(self, job_blocks):
+        results = [index.scores(job_blocks) for index in self.indexes]
+        candidates = np.concatenate([c + offset for (c, _), offset in zip(results, self.offsets)])
+        return candidates.astype(np.int64), np.concatenate([s for _, s in results])
+
+    def shortlist(self, job_blocks, size, allowed=None):
+        return select_top(*self.scores(job_blocks), size, allowed)
+
+
+def pad_subset(subset, count, n_rows, allowed=None):
+    """Completar a pré-seleção (em ordem crescente) até count posições com as primeiras ainda fora dela.
+
+    Só as primeiras len(subset) + count posições candidatas são examinadas.
+    """
+    missing = count - len(subset)
+    if missing <= 0:
+        return subset
+    head = np.arange(min(n_rows, len(subset) + count)) if allowed is None else np.asarray(allowed)[:len(subset) + count]
+    return np.union1d(subset, np.setdiff1d(head, subset, assume_unique=True)[:missing])
+
+
+def rank_shortlisted(features, job_blocks, top_k, min_probability=None, size=1000, chunk_rows=50_000,
+                     report_recall=False, subsets=None, allowed=None):
+    """Ranquear cada vaga apenas sobre a pré-seleção do índice invertido.
+
+    subsets são pré-seleções já calculadas por outro critério (uma por vaga,
+    em ordem crescente de posição, ex.: a cascata linear). Com allowed (filtros
+    por coluna), a pré-seleção e o top-k exaustivo do recall ficam restritos a
+    essas posições. O índice invertido seleciona pelo menos top_k candidatos; se
+    menos de top_k tiverem algum termo em comum com a vaga (ou a pré-seleção
+    recebida for menor), a lista é completada com as primeiras posições
+    restantes, para a resposta não vir menor que a do ranking exaustivo sem
+    pontuar a base inteira.
+    Retorna os rankings (posições na base completa) e, por vaga, o tamanho da
+    pré-seleção e, se report_recall, a fração do top-k exaustivo recuperada.
+    """
+    from .batch import rank_jobs
+
+    n_allowed = features.n_rows if allowed is None else len(allowed)
+    rankings, sizes, recalls = [], [], []
+    for i, blocks in enumerate(job_blocks):
+        subset = features.term_index.shortlist(blocks, max(size, top_k), allowed) if subsets is None else subsets[i]
+        subset = pad_subset(subset, min(top_k, n_allowed), features.n_rows, allowed)
+        ranking = rank_jobs(
+            lambda jobs, rows: features.predict_proba([blocks], subset[rows]),
+            1, len(subset), top_k, min_probability, chunk_rows
+        )[0]
+        ranking.positions = subset[ranking.positions]
+        rankings.append(ranking)
+        sizes.append(len(subset))
+
+        if report_recall:
+            rows_of = (lambda rows: rows) if allowed is None else (lambda rows: allowed[rows])
+            exhaustive = rank_jobs(
+                lambda jobs, rows: features.predict_proba([blocks], rows_of(rows)),
+                1, features.n_rows if allowed is None else len(allowed), top_k, min_probability, chunk_rows
+            )[0]
+            expected = set(rows_of(exhaustive.positions).tolist())
+            found = expected & set(ranking.positions.tolist())
+            recalls.append(len(found) / len(expected) if expected else 1.0)
+
+    return rankings, {"shortlist_sizes": sizes, "recalls": recalls}
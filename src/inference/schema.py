@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+
+# Colunas esperadas pelo modelo e caminhos dos arquivos servidos pela API.
+# Sem efeitos colaterais: os scripts de src/modeltraining e os módulos de
+# src/inference importam daqui sem carregar o modelo da rota de predição.
+
+# Modelo treinado (src/modeltraining/model_training.py)
+MODEL_PATH = os.environ.get("PREDICT_MODEL", "./src/modeltraining/model_rf.joblib")
+
+# Base de candidatos já processada
+PARQUET_PATH = os.environ.get("PREDICT_APPLICANTS", "./src/data/applicants_processed.parquet")
+
+# Artefatos exportados por src/modeltraining/export_artifacts.py (abertos com mmap)
+ARTIFACTS_PATH = os.environ.get("PREDICT_ARTIFACTS", "./src/modeltraining/artifacts")
+
+# Regressão logística do train_model usada como primeiro estágio da cascata (?cascade=N)
+CASCADE_MODEL_PATH = os.environ.get("PREDICT_CASCADE_MODEL", "./src/modeltraining/model_lr.joblib")
+
+# Top-K pré-calculado das vagas do catálogo (src/modeltraining/precompute_rankings.py)
+RANKING_TABLE_PATH = os.environ.get("PREDICT_RANKING_TABLE", "./src/modeltraining/rankings.parquet")
+
+# Lista de features esperadas pelo modelo
+EXPECTED_FEATURES = [
+    "cv_pt", # Text
+    "vaga_principais_atividades", # Text
+    "vaga_competencia_tecnicas_e_comportamentais", # Text
+    "app_prof_conhecimentos_tecnicos", # Text
+    "vaga_nivel profissional", # Categorical
+    "vaga_nivel_academico", # Categorical
+    "vaga_nivel_ingles", # Categorical
+    "vaga_nivel_espanhol", # Categorical
+    "vaga_local_trabalho", # Categorical
+    "vaga_vaga_especifica_para_pcd", # Categorical
+    "app_prof_nivel_profissional", # Categorical
+    "app_form_nivel_academico", # Categorical
+    "app_form_nivel_ingles", # Categorical
+    "app_form_nivel_espanhol" # Categorical
+]
+
+TEXT_FEATURES_FOR_PREDICTION = [
+    "cv_pt",
+    "vaga_principais_atividades",
+    "vaga_competencia_tecnicas_e_comportamentais",
+    "app_prof_conhecimentos_tecnicos"
+]
+
+CATEGORICAL_FEATURES_FOR_PREDICTION = [
+    "vaga_nivel profissional", "vaga_nivel_academico", "vaga_nivel_ingles", "vaga_nivel_espanhol",
+    "vaga_local_trabalho", "vaga_vaga_especifica_para_pcd",
+    "app_prof_nivel_profissional",
+    "app_form_nivel_academico", "app_form_nivel_ingles", "app_form_nivel_espanhol"
+]
+
+
+def job_fields(vaga_data):
+    """Campos da vaga usados pelo modelo, com o mesmo tratamento de nulos da predição."""
+    fields = {}
+    for feature in EXPECTED_FEATURES:
+        if feature.startswith("vaga_"):
+            value = vaga_data.get(feature)
+            if pd.api.types.is_scalar(value) and pd.isna(value):
+                value = "" if feature in TEXT_FEATURES_FOR_PREDICTION else "Desconhecido"
+            elif feature in CATEGORICAL_FEATURES_FOR_PREDICTION:
+                value = str(value)
+            fields[feature] = value
+    return fields
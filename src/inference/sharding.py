@@ -0,0 +1,140 @@
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .artifacts import load_sparse, save_sparse
+from .batch import RunningTopK, rank_jobs
+from .features import ApplicantFeatures, Segment, SplitPipeline
+
+# Estado de cada processo do pool (features montadas sobre os arquivos mapeados)
+_worker_features = None
+
+
+def _init_worker(directory, blocks, leaves, skeleton, classifier, engine):
+    global _worker_features
+    if hasattr(classifier, "n_jobs"):
+        # O paralelismo vem dos processos; a floresta do sklearn não abre threads extras
+        classifier.n_jobs = 1
+    segments = [Segment(side, width, columns, None) for side, width, columns in skeleton]
+    pipeline = SplitPipeline.from_segments(segments, classifier, engine)
+    _worker_features = ApplicantFeatures.from_blocks(
+        pipeline,
+        [None if block is None else load_sparse(directory, block) for block in blocks],
+        None if leaves is None else load_sparse(directory, leaves)
+    )
+
+
+def _score_shard(job_blocks, start, stop, top_k, min_probability, chunk_rows):
+    """Top-k local de cada vaga nas linhas [start, stop) da base (executado no worker)."""
+    features = _worker_features
+    rankings = rank_jobs(
+        lambda jobs, rows: features.predict_proba(
+            [job_blocks[j] for j in jobs], slice(start + rows.start, start + rows.stop)
+        ),
+        len(job_blocks), stop - start, top_k, min_probability, chunk_rows
+    )
+    return [(ranking.positions + start, ranking.probabilities) for ranking in rankings]
+
+
+class SharedArrays:
+    """Blocos de features e incidência de folhas dos candidatos em arquivos mapeados.
+
+    Com artefatos, reaproveita os .npy já mapeados. Sem eles, grava os arrays em
+    um diretório em /dev/shm e passa features a usar as versões mapeadas. Criado
+    no master do gunicorn antes do fork, os workers herdam o mapeamento e abrem
+    só o pool (as páginas ficam compartilhadas entre todos). O diretório é
+    removido por close() ou na saída do processo, e só pelo processo que o criou:
+    um worker que sai não apaga o que o master compartilha.
+    """
+
+    def __init__(self, features, artifacts=None):
+        self.features = features
+        self._owner = None
+        if artifacts is not None and features is artifacts.features:
+            self.path = artifacts.path
+            self.blocks = [segment.get("applicant_block") for segment in artifacts.manifest["segments"]]
+            self.leaves = artifacts.manifest["applicant_leaves"]
+            return
+        self.path = tempfile.mkdtemp(prefix="predict-shards-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        self._owner = os.getpid()
+        atexit.register(self.close)
+        self.blocks, self.leaves = self._share(features, self.path)
+
+    @staticmethod
+    def _share(features, directory):
+        """Gravar os arrays dos candidatos no diretório e passar a usar as versões mapeadas."""
+        blocks = [
+            None if block is None else save_sparse(directory, f"applicant_block_{i}", block)
+            for i, block in enumerate(features.blocks)
+        ]
+        leaves = None if features.leaves is None else save_sparse(directory, "applicant_leaves", features.leaves)
+        features.blocks = [None if block is None else load_sparse(directory, block) for block in blocks]
+        if leaves is not None:
+            features.leaves = load_sparse(directory, leaves)
+        return blocks, leaves
+
+    def close(self):
+        if self._owner == os.getpid():
+            shutil.rmtree(self.path, ignore_errors=True)
+            atexit.unregister(self.close)
+            self._owner = None
+
+
+class ShardedScorer:
+    """Pontuação da base de candidatos dividida em shards num pool de processos persistente.
+
+    Os blocos de features e a incidência de folhas ficam em arquivos mapeados
+    (SharedArrays); o processo principal e os workers leem as mesmas páginas,
+    sem cópias. Cada shard devolve o top-k local e o processo principal junta
+    os resultados. Sem shared (ou com shared de outras features) o próprio
+    scorer grava os arrays e os remove em close().
+
+    Com start_method="fork" (padrão) o pool deve ser criado na inicialização,
+    antes do servidor abrir threads: um fork com threads rodando pode deixar nos
+    filhos locks que estavam presos. Depois disso (ex.: reload em segundo plano)
+    use "forkserver": os workers saem de um processo sem threads e recebem o
+    classificador serializado.
+    """
+
+    def __init__(self, features, workers, shard_rows=100_000, artifacts=None, start_method="fork", shared=None):
+        self.features = features
+        self.shard_rows = max(1, shard_rows)
+        self._shared = None
+        if shared is None or shared.features is not features:
+            shared = self._shared = SharedArrays(features, artifacts)
+
+        pipeline = features.pipeline
+        skeleton = [(segment.side, segment.width, segment.columns) for segment in pipeline.segments]
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(shared.path, shared.blocks, shared.leaves, skeleton, pipeline.classifier, pipeline.engine)
+        )
+        # Criar os workers (com fork, todos no primeiro submit) e validar o initializer já aqui
+        self.pool.submit(int).result()
+
+    def rank(self, job_blocks, top_k, min_probability=None, chunk_rows=50_000):
+        """Mesmo resultado de rank_jobs sobre a base inteira, com os shards em paralelo."""
+        futures = [
+            self.pool.submit(
+                _score_shard, job_blocks, start, min(self.features.n_rows, start + self.shard_rows),
+                top_k, min_probability, chunk_rows
+            )
+            for start in range(0, self.features.n_rows, self.shard_rows)
+        ]
+        rankings = [RunningTopK(top_k, min_probability) for _ in job_blocks]
+        # Shards em ordem crescente de posição: empates continuam resolvidos pela posição
+        for future in futures:
+            for ranking, (positions, probabilities) in zip(rankings, future.result()):
+                ranking.merge(positions, probabilities)
+        return rankings
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
@@ -0,0 +1,140 @@
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# Mesmo padrão de tokens do TfidfVectorizer
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+class HashingTfidfVectorizer(TransformerMixin, BaseEstimator):
+    """TF-IDF sobre o hashing dos termos, sem vocabulário aprendido.
+
+    O fit só conta em quantos documentos cada bucket aparece e guarda o idf_
+    como um array denso de n_features posições. Os textos são processados em
+    blocos de chunk_size (em paralelo com n_jobs): o fit guarda só as contagens
+    por bucket, então a memória não cresce com a base nem com o vocabulário, e
+    o transform monta a saída bloco a bloco (pico de memória ~ saída + um
+    bloco). O transform não depende de estado além do idf_ e dá o mesmo
+    resultado com qualquer divisão em blocos. Pesos, suavização do idf e
+    normalização seguem o TfidfVectorizer; a saída é float32 por padrão, o
+    tipo que a Random Forest usa internamente.
+    """
+
+    def __init__(self, n_features=2 ** 14, ngram_range=(1, 2), lowercase=True, strip_accents=None,
+                 token_pattern=TOKEN_PATTERN, norm="l2", smooth_idf=True, sublinear_tf=False,
+                 dtype=np.float32, n_jobs=1, chunk_size=20_000):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents
+        self.token_pattern = token_pattern
+        self.norm = norm
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+
+    def hasher(self):
+        return HashingVectorizer(
+            n_features=self.n_features, ngram_range=tuple(self.ngram_range), lowercase=self.lowercase,
+            strip_accents=self.strip_accents, token_pattern=self.token_pattern,
+            alternate_sign=False, norm=None, dtype=self.dtype
+        )
+
+    def term_frequencies(self, documents):
+        """Contagens por bucket (CSR) de cada bloco de chunk_size textos, na ordem, geradas sob demanda."""
+        hasher = self.hasher()
+        documents = list(documents)
+        chunks = [documents[i:i + self.chunk_size] for i in range(0, len(documents), self.chunk_size)] or [[]]
+        if self.n_jobs == 1 or len(chunks) == 1:
+            return (hasher.transform(chunk) for chunk in chunks)
+        return Parallel(n_jobs=self.n_jobs, return_as="generator")(delayed(hasher.transform)(chunk) for chunk in chunks)
+
+    def fit(self, X, y=None):
+        # Só as contagens de documentos por bucket ficam em memória entre os blocos
+        n_documents, document_frequency = 0, np.zeros(self.n_features, dtype=np.int64)
+        for counts in self.term_frequencies(X):
+            n_documents += counts.shape[0]
+            document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self._fit_idf(n_documents, document_frequency)
+        return self
+
+    def fit_transform(self, X, y=None):
+        # Reaproveita as contagens do fit em vez de aplicar o hashing duas vezes
+        blocks = list(self.term_frequencies(X))
+        document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        for counts in blocks:
+            document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self._fit_idf(sum(counts.shape[0] for counts in blocks), document_frequency)
+        for counts in blocks:
+            self._weight(counts)
+        return self._join(blocks)
+
+    def _fit_idf(self, n_documents, document_frequency):
+        n_documents += int(self.smooth_idf)
+        document_frequency = document_frequency + int(self.smooth_idf)
+        self.idf_ = (np.log(n_documents / document_frequency) + 1).astype(self.dtype)
+
+    def transform(self, X):
+        return self._join([self._weight(counts) for counts in self.term_frequencies(X)])
+
+    def _join(self, blocks):
+        """Empilhar os blocos CSR copiando cada um para arrays alocados uma vez.
+
+        np.empty só ocupa memória ao ser escrito e cada bloco é liberado depois
+        de copiado, então o pico fica perto do tamanho da saída (sp.vstack
+        manteria os blocos e a saída inteiros ao mesmo tempo).
+        """
+        n_rows = sum(block.shape[0] for block in blocks)
+        nnz = sum(block.nnz for block in blocks)
+        data = np.empty(nnz, dtype=self.dtype)
+        indices = np.empty(nnz, dtype=np.int32)
+        indptr = np.zeros(n_rows + 1, dtype=np.int64 if nnz > np.iinfo(np.int32).max else np.int32)
+        row = offset = 0
+        for i in range(len(blocks)):
+            block, blocks[i] = blocks[i], None
+            data[offset:offset + block.nnz] = block.data
+            indices[offset:offset + block.nnz] = block.indices
+            indptr[row + 1:row + block.shape[0] + 1] = block.indptr[1:] + offset
+            row, offset = row + block.shape[0], offset + block.nnz
+        return sp.csr_matrix((data, indices, indptr), shape=(n_rows, self.n_features))
+
+    def _weight(self, matrix):
+        """Pesos idf e normalização aplicados no próprio bloco."""
+        if self.sublinear_tf:
+            np.log(matrix.data, matrix.data)
+            matrix.data += 1
+        matrix.data *= self.idf_[matrix.indices]
+        if self.norm:
+            normalize(matrix, norm=self.norm, copy=False)
+        return matrix
+
+    def __getstate__(self):
+        # Buckets que não apareceram no fit têm todos o mesmo idf: salvar só os demais
+        state = dict(super().__getstate__())
+        idf = state.pop("idf_", None)
+        if idf is not None:
+            empty = idf.max()
+            buckets = np.flatnonzero(idf != empty).astype(np.int32)
+            if 2 * len(buckets) < len(idf):
+                state["_sparse_idf"] = (len(idf), empty, buckets, idf[buckets])
+            else:
+                state["idf_"] = idf
+        return state
+
+    def __setstate__(self, state):
+        sparse_idf = state.pop("_sparse_idf", None)
+        if sparse_idf is not None:
+            size, empty, buckets, values = sparse_idf
+            idf = np.full(size, empty, dtype=values.dtype)
+            idf[buckets] = values
+            state["idf_"] = idf
+        super().__setstate__(state)
+
+    def get_feature_names_out(self, input_features=None):
+        """Nomes dos buckets; textos com o mesmo n_features compartilham o espaço de termos."""
+        return np.array([f"hash{self.n_features}_{i}" for i in range(self.n_features)], dtype=object)
@@ -0,0 +1,105 @@
+import math
+import os
+
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def cgroup_cpu_limit(cpu_max=CGROUP_V2_CPU_MAX, quota_path=CGROUP_V1_QUOTA, period_path=CGROUP_V1_PERIOD):
+    """Limite de CPU do container (quota / período do cgroup v2 ou v1), ou None sem limite."""
+    try:
+        with open(cpu_max) as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(quota_path) as f:
+            quota = int(f.read())
+        with open(period_path) as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus():
+    """Núcleos que o processo pode usar: afinidade de CPU limitada pela quota do cgroup."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.floor(limit)))
+    return max(1, cpus)
+
+
+def thread_budget(workers=1, threads=0, cpus=None):
+    """Threads de inferência por worker: threads se definido (> 0), senão os núcleos divididos entre os workers."""
+    if threads > 0:
+        return threads
+    cpus = available_cpus() if cpus is None else cpus
+    return max(1, cpus // max(1, workers))
+
+
+def set_n_jobs(estimator, n_jobs):
+    """Sobrescrever n_jobs do estimador carregado (pipeline, ColumnTransformer, floresta, vetorizadores).
+
+    Modelos treinados com n_jobs=-1 abririam uma thread por núcleo em cada
+    predict_proba de cada worker. Retorna quantos estimadores foram alterados.
+    """
+    changed = 0
+    if hasattr(estimator, "split_pipeline"):
+        # ArtifactModel: a floresta fica no SplitPipeline
+        return set_n_jobs(estimator.split_pipeline.classifier, n_jobs) + sum(
+            set_n_jobs(segment.transformer, n_jobs) for segment in estimator.split_pipeline.segments
+            if segment.transformer is not None
+        )
+    if hasattr(estimator, "n_jobs"):
+        estimator.n_jobs = n_jobs
+        changed += 1
+    if isinstance(estimator, Pipeline):
+        changed += sum(set_n_jobs(step, n_jobs) for _, step in estimator.steps if step not in (None, "passthrough"))
+    elif isinstance(estimator, ColumnTransformer):
+        changed += sum(
+            set_n_jobs(transformer, n_jobs) for _, transformer, _ in getattr(estimator, "transformers_", [])
+            if transformer not in ("drop", "passthrough")
+        )
+    return changed
+
+
+class ThreadBudget:
+    """Orçamento de threads da inferência em um worker do servidor.
+
+    apply() limita os pools nativos (BLAS/OpenMP) com o threadpoolctl para o
+    processo inteiro e configure(model) ajusta o n_jobs de cada modelo carregado.
+    """
+
+    def __init__(self, workers=1, threads=0):
+        self.workers = workers
+        self.cpus = available_cpus()
+        self.threads = thread_budget(workers, threads, self.cpus)
+        self._limiter = None
+
+    def apply(self):
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            print("threadpoolctl não instalado; pools nativos sem limite.")
+            return
+        self._limiter = threadpool_limits(limits=self.threads)
+
+    def configure(self, model):
+        if model is not None:
+            set_n_jobs(model, self.threads)
+        return model
+
+    def status(self):
+        return {"cpus": self.cpus, "workers": self.workers, "threads_per_worker": self.threads}
@@ -1,5 +1,39 @@
+import argparse
+import glob
 import json
+import os
+import shutil
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Linhas por row group no preparo em streaming (limita o pico de memória)
+PREP_BATCH_SIZE = int(os.environ.get("PREP_BATCH_SIZE", 10_000))
+# Linhas por arquivo do parquet particionado do preparo por entidade
+PREP_PART_ROWS = int(os.environ.get("PREP_PART_ROWS", 250_000))
+# Bloco lido do arquivo a cada vez pelo leitor incremental de JSON
+JSON_CHUNK_SIZE = 1 << 20
+
+POSITIVE_STATUS = ['Contratado pela Decision', 'Aprovado', 'Proposta Aceita', 'Contratado como Hunting', 'Documentação PJ', 'Documentação Cooperado', 'Documentação CLT']
+NEGATIVE_STATUS = ['Não Aprovado pelo Requisitante', 'Não Aprovado pelo Cliente', 'Não Aprovado pelo RH', 'Recusado', 'Desistiu', 'Desistiu da Contratação', 'Sem interesse nesta vaga']
+
+# Seções expandidas em colunas (registro a registro) e o prefixo de cada uma
+VAGA_SECTIONS = {'perfil_vaga': 'vaga_'}
+APPLICANT_SECTIONS = {'informacoes_profissionais': 'app_prof_', 'formacao_e_idiomas': 'app_form_'}
+PROSPECT_COLUMNS = ['ID_VAGA', 'ID_APPLICANT', 'situacao_candidado', 'titulo_vaga_prospect']
+# Colunas gravadas como dictionary (category no pandas) no parquet
+CATEGORICAL_COLUMNS = [
+    'situacao_candidado', 'vaga_nivel profissional', 'vaga_nivel_academico', 'vaga_nivel_ingles',
+    'vaga_nivel_espanhol', 'vaga_areas_atuacao', 'vaga_local_trabalho', 'vaga_vaga_especifica_para_pcd',
+    'app_prof_nivel_profissional', 'app_prof_area_atuacao', 'app_form_nivel_academico',
+    'app_form_nivel_ingles', 'app_form_nivel_espanhol'
+]
+
+
+def as_dict(value):
+    return value if isinstance(value, dict) else {}
 
 def load_json_to_df(file_path):
     try:
@@ -16,13 +50,13 @@ def load_json_to_df(file_path):
         print(f"Erro ao carregar {file_path}: {e}")
         return None
 
-def prepare_data():
+def prepare_data(data_dir='../data', output_path=None):
     print("Iniciando o carregamento dos dados...")
-    vagas_df = load_json_to_df('../data/vagas.json')
-    applicants_df = load_json_to_df('../data/applicants.json')
+    vagas_df = load_json_to_df(os.path.join(data_dir, 'vagas.json'))
+    applicants_df = load_json_to_df(os.path.join(data_dir, 'applicants.json'))
 
     try:
-        with open('../data/prospects.json', 'r', encoding='utf-8') as f:
+        with open(os.path.join(data_dir, 'prospects.json'), 'r', encoding='utf-8') as f:
             prospects_data = json.load(f)
     except FileNotFoundError:
         print("Erro: Arquivo ./data/prospects.json não encontrado.")
@@ -76,8 +110,8 @@ def prepare_data():
     print(f"Tamanho após merge com applicants: {len(merged_df)} linhas.")
 
     # Definir target
-    positive_status = ['Contratado pela Decision', 'Aprovado', 'Proposta Aceita', 'Contratado como Hunting', 'Documentação PJ', 'Documentação Cooperado', 'Documentação CLT']
-    negative_status = ['Não Aprovado pelo Requisitante', 'Não Aprovado pelo Cliente', 'Não Aprovado pelo RH', 'Recusado', 'Desistiu', 'Desistiu da Contratação', 'Sem interesse nesta vaga']
+    positive_status = POSITIVE_STATUS
+    negative_status = NEGATIVE_STATUS
 
     merged_df['target'] = merged_df['situacao_candidado'].apply(
         lambda x: 1 if x in positive_status else (0 if x in negative_status else pd.NA)
@@ -86,6 +120,8 @@ def prepare_data():
     # Remover linhas onde o target for nulo
     initial_rows = len(merged_df)
     merged_df.dropna(subset=['target'], inplace=True)
+    # Índice contínuo: os json_normalize abaixo são concatenados pela posição
+    merged_df.reset_index(drop=True, inplace=True)
     merged_df['target'] = merged_df['target'].astype(int)
     rows_after_target_definition = len(merged_df)
     print(f"{initial_rows - rows_after_target_definition} linhas removidas devido a status de candidato não mapeados para target binário.")
@@ -99,7 +135,7 @@ def prepare_data():
     # Expandir dicts em colunas separadas
     if 'perfil_vaga' in merged_df.columns:
         try:
-            perfil_vaga_expanded = pd.json_normalize(merged_df['perfil_vaga'].fillna({}))
+            perfil_vaga_expanded = pd.json_normalize(merged_df['perfil_vaga'].apply(as_dict).tolist())
             perfil_vaga_expanded.columns = [f"vaga_{col}" for col in perfil_vaga_expanded.columns]
             merged_df = pd.concat([merged_df.drop(columns=['perfil_vaga']), perfil_vaga_expanded], axis=1)
         except Exception as e:
@@ -107,7 +143,7 @@ def prepare_data():
 
     if 'informacoes_profissionais' in merged_df.columns:
         try:
-            info_prof_expanded = pd.json_normalize(merged_df['informacoes_profissionais'].fillna({}))
+            info_prof_expanded = pd.json_normalize(merged_df['informacoes_profissionais'].apply(as_dict).tolist())
             info_prof_expanded.columns = [f"app_prof_{col}" for col in info_prof_expanded.columns]
             merged_df = pd.concat([merged_df.drop(columns=['informacoes_profissionais']), info_prof_expanded], axis=1)
         except Exception as e:
@@ -115,19 +151,361 @@ def prepare_data():
 
     if 'formacao_e_idiomas' in merged_df.columns:
         try:
-            form_idiomas_expanded = pd.json_normalize(merged_df['formacao_e_idiomas'].fillna({}))
+            form_idiomas_expanded = pd.json_normalize(merged_df['formacao_e_idiomas'].apply(as_dict).tolist())
             form_idiomas_expanded.columns = [f"app_form_{col}" for col in form_idiomas_expanded.columns]
             merged_df = pd.concat([merged_df.drop(columns=['formacao_e_idiomas']), form_idiomas_expanded], axis=1)
         except Exception as e:
             print(f"Erro ao normalizar 'formacao_e_idiomas': {e}")
     # Salvar o DataFrame processado em pickle
-    output_path = '../data/processed_data.pkl'
+    output_path = output_path or os.path.join(data_dir, 'processed_data.pkl')
     merged_df.to_pickle(output_path)
     print(f"Dados processados e salvos em {output_path}")
     print(f"Shape do DataFrame salvo: {merged_df.shape}")
     print(f"Algumas colunas do DataFrame salvo: {merged_df.columns.tolist()[:20]}...")
 
 
+def iter_json_object(file_path, chunk_size=JSON_CHUNK_SIZE):
+    """Pares (chave, valor) do objeto JSON no topo do arquivo, sem carregar o arquivo inteiro.
+
+    O arquivo é lido em blocos de chunk_size caracteres; em memória ficam só o
+    bloco atual e o registro que está sendo decodificado.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof = '', 0, False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        def next_char():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if eof:
+                    raise ValueError(f"{file_path}: fim inesperado do arquivo JSON.")
+                fill()
+
+        def expect(chars):
+            nonlocal pos
+            char = next_char()
+            if char not in chars:
+                raise ValueError(f"{file_path}: esperado {chars!r}, encontrado {char!r}.")
+            pos += 1
+            return char
+
+        def decode():
+            nonlocal pos
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # Valor encostado no fim do bloco pode estar truncado (ex.: número)
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        expect('{')
+        if next_char() == '}':
+            return
+        while True:
+            key = decode()
+            expect(':')
+            yield key, decode()
+            if expect(',}') == '}':
+                return
+
+
+def iter_prospects(file_path):
+    """Prospects achatados ([ID_VAGA, ID_APPLICANT, situação, título], target) com target definido."""
+    for vaga_id, data in iter_json_object(file_path):
+        for prospect_info in data.get('prospects', []):
+            situacao = prospect_info.get('situacao_candidado')
+            if situacao in POSITIVE_STATUS:
+                target = 1
+            elif situacao in NEGATIVE_STATUS:
+                target = 0
+            else:
+                continue
+            yield [vaga_id, prospect_info.get('codigo'), situacao, data.get('titulo')], target
+
+
+def flat_keys(record, prefix=''):
+    """Colunas geradas por pd.json_normalize para um registro (chaves aninhadas com '.')."""
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            yield from flat_keys(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}"
+
+
+def as_text(value):
+    """Valor de coluna texto no parquet: dicts/listas viram JSON e os demais str."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def flatten_batch(rows, columns, sections, schema):
+    """Row group do parquet: colunas simples + seções expandidas com json_normalize."""
+    df = pd.DataFrame([row[0] for row in rows], columns=columns)
+    for i, (section, prefix, section_columns) in enumerate(sections):
+        expanded = pd.json_normalize([row[i + 1] for row in rows])
+        expanded.columns = [f"{prefix}{col}" for col in expanded.columns]
+        df = pd.concat([df, expanded.reindex(columns=section_columns)], axis=1)
+    for col in df.columns:
+        if col != 'target':
+            df[col] = df[col].map(as_text, na_action='ignore')
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def prepare_data_streaming(data_dir='../data', output_path=None, batch_size=PREP_BATCH_SIZE):
+    """Preparo da base de treino em streaming, gravando o parquet em row groups.
+
+    Gera as mesmas linhas e colunas do processed_data.pkl de prepare_data (as
+    colunas com dicionários não expandidos ficam como JSON em texto). O
+    applicants.json, o maior arquivo, é lido duas vezes registro a registro:
+    a primeira só descobre as colunas das seções e a segunda grava as linhas
+    em blocos de batch_size. Ficam em memória só as vagas e os prospects com
+    target definido. A ordem das linhas segue o applicants.json (prospects sem
+    candidato ficam no fim).
+    """
+    output_path = output_path or os.path.join(data_dir, 'processed_data.parquet')
+    print("Iniciando o preparo em streaming dos dados...")
+
+    # Prospects com target definido, agrupados pelo candidato
+    prospects = {}
+    n_prospects = 0
+    for prospect, target in iter_prospects(os.path.join(data_dir, 'prospects.json')):
+        prospects.setdefault(prospect[1], []).append((prospect, target))
+        n_prospects += 1
+    print(f"Prospects lidos: {n_prospects} com target definido.")
+
+    # Vagas usadas pelos prospects: colunas simples e perfil_vaga
+    used_vagas = {prospect[0] for rows in prospects.values() for prospect, _ in rows}
+    vagas = {}
+    vaga_columns, vaga_section_columns = {}, {section: {} for section in VAGA_SECTIONS}
+    for vaga_id, vaga in iter_json_object(os.path.join(data_dir, 'vagas.json')):
+        vaga_columns.update(dict.fromkeys(key for key in vaga if key not in VAGA_SECTIONS))
+        if vaga_id not in used_vagas:
+            continue
+        vagas[vaga_id] = vaga
+        for section, keys in vaga_section_columns.items():
+            keys.update(dict.fromkeys(flat_keys(as_dict(vaga.get(section)))))
+
+    # 1ª passada nos candidatos: só as colunas
+    applicants_path = os.path.join(data_dir, 'applicants.json')
+    applicant_columns = {'ID_APPLICANT_raw': None}
+    applicant_section_columns = {section: {} for section in APPLICANT_SECTIONS}
+    for _, applicant in iter_json_object(applicants_path):
+        applicant_columns.update(dict.fromkeys(
+            'infos_basicas_applicant' if key == 'infos_basicas' else key
+            for key in applicant if key not in APPLICANT_SECTIONS
+        ))
+        if as_dict(applicant.get('infos_basicas')).get('codigo_profissional') in prospects:
+            for section, keys in applicant_section_columns.items():
+                keys.update(dict.fromkeys(flat_keys(as_dict(applicant.get(section)))))
+
+    columns = PROSPECT_COLUMNS + list(vaga_columns) + list(applicant_columns) + ['target']
+    sections = [(section, prefix, [f"{prefix}{col}" for col in vaga_section_columns[section]])
+                for section, prefix in VAGA_SECTIONS.items()]
+    sections += [(section, prefix, [f"{prefix}{col}" for col in applicant_section_columns[section]])
+                 for section, prefix in APPLICANT_SECTIONS.items()]
+    schema = pa.schema(
+        [(col, pa.int64() if col == 'target' else pa.string()) for col in columns]
+        + [(col, pa.string()) for _, _, section_columns in sections for col in section_columns]
+    )
+
+    def rows_for(applicant_id, applicant):
+        applicant_values = {}
+        if applicant is not None:
+            applicant_values['ID_APPLICANT_raw'] = applicant_id
+            for key, value in applicant.items():
+                if key not in APPLICANT_SECTIONS:
+                    applicant_values['infos_basicas_applicant' if key == 'infos_basicas' else key] = value
+            applicant_id = as_dict(applicant.get('infos_basicas')).get('codigo_profissional')
+        for prospect, target in prospects.get(applicant_id, []):
+            vaga = vagas.get(prospect[0], {})
+            values = dict(zip(PROSPECT_COLUMNS, prospect), target=target, **applicant_values)
+            values.update((key, value) for key, value in vaga.items() if key not in VAGA_SECTIONS)
+            yield (
+                values,
+                *(as_dict(vaga.get(section)) for section in VAGA_SECTIONS),
+                *(as_dict((applicant or {}).get(section)) for section in APPLICANT_SECTIONS)
+            )
+
+    def applicant_rows():
+        # 2ª passada: candidatos com prospects; depois os prospects sem candidato no arquivo
+        seen = set()
+        for applicant_id, applicant in iter_json_object(applicants_path):
+            seen.add(as_dict(applicant.get('infos_basicas')).get('codigo_profissional'))
+            yield from rows_for(applicant_id, applicant)
+        for applicant_id in prospects:
+            if applicant_id not in seen:
+                yield from rows_for(applicant_id, None)
+
+    staging = f"{output_path}.tmp"
+    n_rows, batch = 0, []
+    with pq.ParquetWriter(staging, schema) as writer:
+        for row in applicant_rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(flatten_batch(batch, columns, sections, schema))
+                n_rows += len(batch)
+                batch = []
+        if batch or not n_rows:
+            writer.write_table(flatten_batch(batch, columns, sections, schema))
+            n_rows += len(batch)
+    os.replace(staging, output_path)
+
+    print(f"Dados processados e salvos em {output_path}")
+    print(f"Shape do parquet salvo: ({n_rows}, {len(schema)})")
+    return output_path
+
+
+
+def load_entities(file_path, sections, id_of, renames=None, keep=None):
+    """Uma linha por registro do JSON, com as seções expandidas uma única vez por entidade.
+
+    id_of(chave, registro) dá o ID usado no join; com keep, só os registros
+    cujo ID está em keep são mantidos. Dicts não expandidos viram JSON em texto.
+    """
+    renames = renames or {}
+    rows, expanded = [], {section: [] for section in sections}
+    for key, record in iter_json_object(file_path):
+        entity_id = id_of(key, record)
+        if keep is not None and entity_id not in keep:
+            continue
+        row = {renames.get(col, col): as_text(value) for col, value in record.items() if col not in sections}
+        rows.append((entity_id, key, row))
+        for section in sections:
+            expanded[section].append(as_dict(record.get(section)))
+
+    df = pd.DataFrame([row for _, _, row in rows])
+    df.insert(0, '__id', [entity_id for entity_id, _, _ in rows])
+    df.insert(1, '__key', [key for _, key, _ in rows])
+    for section, prefix in sections.items():
+        normalized = pd.json_normalize(expanded[section])
+        normalized.columns = [f"{prefix}{col}" for col in normalized.columns]
+        df = pd.concat([df, normalized.map(as_text, na_action='ignore')], axis=1)
+    return df
+
+
+def prepared_schema(columns):
+    """Tipos explícitos do parquet: target int8, categóricas como dictionary e o resto texto."""
+    fields = []
+    for col in columns:
+        if col == 'target':
+            fields.append((col, pa.int8()))
+        elif col in CATEGORICAL_COLUMNS:
+            fields.append((col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append((col, pa.string()))
+    return pa.schema(fields)
+
+
+def prepare_data_entities(data_dir='../data', output_dir=None, part_rows=PREP_PART_ROWS, batch_size=PREP_BATCH_SIZE):
+    """Preparo com cada vaga e cada candidato normalizados uma única vez.
+
+    Vagas e candidatos (só os citados nos prospects com target) viram tabelas
+    com uma linha por entidade, gravadas sem repetição ao lado dos prospects:
+    output_dir/{prospects,vagas,applicants}/part-NNNNN.parquet, em partes de até
+    part_rows linhas (row groups de batch_size) e com tipos explícitos (ver
+    prepared_schema). O join pelo ID fica para o final, em load_prepared, que
+    devolve as mesmas linhas, na mesma ordem, do processed_data.pkl.
+    """
+    output_dir = output_dir or os.path.join(data_dir, 'processed_data')
+    print("Iniciando o preparo por entidade dos dados...")
+
+    prospects = list(iter_prospects(os.path.join(data_dir, 'prospects.json')))
+    prospects_df = pd.DataFrame([prospect for prospect, _ in prospects], columns=PROSPECT_COLUMNS)
+    prospects_df['target'] = np.array([target for _, target in prospects], dtype='int8')
+    print(f"Prospects lidos: {len(prospects_df)} com target definido.")
+
+    vagas = load_entities(
+        os.path.join(data_dir, 'vagas.json'), VAGA_SECTIONS, lambda key, record: key,
+        keep=set(prospects_df['ID_VAGA'])
+    )
+    vagas = vagas.drop(columns='__key').rename(columns={'__id': 'ID_VAGA'})
+    applicants = load_entities(
+        os.path.join(data_dir, 'applicants.json'), APPLICANT_SECTIONS,
+        lambda key, record: as_dict(record.get('infos_basicas')).get('codigo_profissional'),
+        renames={'infos_basicas': 'infos_basicas_applicant'}, keep=set(prospects_df['ID_APPLICANT'])
+    )
+    applicants = applicants.rename(columns={'__id': 'ID_APPLICANT', '__key': 'ID_APPLICANT_raw'})
+    print(f"Entidades normalizadas: {len(vagas)} vagas e {len(applicants)} candidatos.")
+
+    staging = f"{output_dir}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    for name, df in [('prospects', prospects_df), ('vagas', vagas), ('applicants', applicants)]:
+        write_parts(df, os.path.join(staging, name), part_rows, batch_size)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(staging, output_dir)
+
+    print(f"Dados processados e salvos em {output_dir}")
+    return output_dir
+
+
+def write_parts(df, directory, part_rows=PREP_PART_ROWS, batch_size=PREP_BATCH_SIZE):
+    """Gravar df em part-NNNNN.parquet de até part_rows linhas (row groups de batch_size)."""
+    os.makedirs(directory)
+    schema = prepared_schema(df.columns)
+    for part, start in enumerate(range(0, max(len(df), 1), part_rows)):
+        with pq.ParquetWriter(os.path.join(directory, f"part-{part:05d}.parquet"), schema) as writer:
+            stop = min(start + part_rows, len(df))
+            for batch_start in range(start, max(stop, start + 1), batch_size):
+                batch = df.iloc[batch_start:min(batch_start + batch_size, stop)]
+                writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+
+
+def read_parts(directory):
+    files = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+    return pa.concat_tables([pq.read_table(file) for file in files]).to_pandas()
+
+
+def load_prepared(path):
+    """Base de treino no formato do processed_data.pkl a partir da saída dos preparos em parquet.
+
+    Para o diretório do prepare_data_entities, o join de prospects, vagas e
+    candidatos pelo ID acontece aqui (left join, na ordem dos prospects).
+    """
+    if not os.path.isdir(path):
+        return pq.read_table(path).to_pandas()
+
+    prospects = read_parts(os.path.join(path, 'prospects'))
+    vagas = read_parts(os.path.join(path, 'vagas'))
+    applicants = read_parts(os.path.join(path, 'applicants'))
+    merged_df = prospects.merge(vagas, on='ID_VAGA', how='left').merge(applicants, on='ID_APPLICANT', how='left')
+
+    # Mesma ordem de colunas do prepare_data: colunas simples, target e depois as seções expandidas
+    expanded = tuple(VAGA_SECTIONS.values()) + tuple(APPLICANT_SECTIONS.values())
+    order = [col for col in merged_df.columns if col != 'target' and not col.startswith(expanded)] + ['target']
+    order += [col for prefix in expanded for col in merged_df.columns if col.startswith(prefix)]
+    return merged_df[order]
+
+
 if __name__ == '__main__':
-    prepare_data()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['entities', 'streaming', 'in-memory'], default='entities',
+                        help='entities: vagas/candidatos normalizados uma vez (padrão); streaming: memória limitada '
+                             'por --batch-size; in-memory: preparo original gerando o processed_data.pkl')
+    parser.add_argument('--batch-size', type=int, default=PREP_BATCH_SIZE, help='linhas por row group no preparo em streaming')
+    args = parser.parse_args()
+    if args.mode == 'in-memory':
+        prepare_data()
+    elif args.mode == 'streaming':
+        prepare_data_streaming(batch_size=args.batch_size)
+    else:
+        prepare_data_entities()
 
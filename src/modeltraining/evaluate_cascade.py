@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+import time
+import joblib
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.inference.schema import CASCADE_MODEL_PATH, EXPECTED_FEATURES, MODEL_PATH, PARQUET_PATH
+from src.inference.applicants import load_parquet
+from src.inference.batch import rank_jobs
+from src.inference.cascade import CascadeCache
+from src.inference.features import ApplicantFeatures, SplitPipeline
+from src.inference.retrieval import rank_shortlisted
+from src.modeltraining.model_training import load_training_data
+
+
+def sample_vagas(data_path, n_jobs, seed=42):
+    """Vagas distintas da base de treino, no formato do payload do /predict."""
+    df = load_training_data(data_path)
+    if df is None:
+        return []
+    columns = [feature for feature in EXPECTED_FEATURES if feature.startswith("vaga_")]
+    vagas = df.drop_duplicates("ID_VAGA" if "ID_VAGA" in df.columns else columns)[columns]
+    return vagas.sample(min(n_jobs, len(vagas)), random_state=seed).to_dict("records")
+
+
+def evaluate(features, cascade_scores, vagas, sizes, top_k):
+    """Comparar o top-k da cascata com a pontuação exaustiva da floresta para cada N.
+
+    Retorna, por N, a fração de vagas com top-k diferente (conjunto ou ordem), o
+    recall@k médio e a latência média por vaga de cada caminho.
+    """
+    job_blocks = features.pipeline.transform_jobs(vagas)
+    start = time.perf_counter()
+    exhaustive = [
+        rank_jobs(lambda jobs, rows: features.predict_proba([blocks], rows), 1, features.n_rows, top_k)[0].positions
+        for blocks in job_blocks
+    ]
+    exhaustive_ms = (time.perf_counter() - start) * 1000 / len(vagas)
+
+    report = {"top_k": top_k, "jobs": len(vagas), "applicants": features.n_rows, "exhaustive_ms": exhaustive_ms, "sizes": []}
+    for size in sizes:
+        start = time.perf_counter()
+        subsets = cascade_scores.shortlists(vagas, size)
+        rankings, _ = rank_shortlisted(features, job_blocks, top_k, size=size, subsets=subsets)
+        cascade_ms = (time.perf_counter() - start) * 1000 / len(vagas)
+
+        differs = [not np.array_equal(r.positions, e) for r, e in zip(rankings, exhaustive)]
+        recalls = [len(set(r.positions.tolist()) & set(e.tolist())) / max(1, len(e)) for r, e in zip(rankings, exhaustive)]
+        report["sizes"].append({
+            "cascade": size,
+            "differs": float(np.mean(differs)),
+            "set_differs": float(np.mean([recall < 1 for recall in recalls])),
+            "recall_at_k": float(np.mean(recalls)),
+            "cascade_ms": cascade_ms
+        })
+    return report
+
+
+def main():
+    """Avaliação offline da cascata (executar na raiz do projeto)."""
+    parser = argparse.ArgumentParser(description="Top-k da cascata (regressão logística -> floresta) x floresta exaustiva.")
+    parser.add_argument("--data", default=None, help="Base de treino de onde as vagas são amostradas.")
+    parser.add_argument("--applicants", default=PARQUET_PATH)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 5000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Salvar o relatório em JSON.")
+    args = parser.parse_args()
+
+    try:
+        forest, linear = joblib.load(MODEL_PATH), joblib.load(CASCADE_MODEL_PATH)
+    except Exception as e:
+        print(f"Erro ao carregar {MODEL_PATH} / {CASCADE_MODEL_PATH}: {e}")
+        return
+    applicants = load_parquet(args.applicants)
+    vagas = sample_vagas(args.data, args.jobs)
+    if applicants is None or not vagas:
+        print("Sem candidatos ou vagas para avaliar.")
+        return
+
+    features = ApplicantFeatures(SplitPipeline(forest), applicants)
+    cascade_scores = CascadeCache().get(linear, applicants, features=features)
+    if cascade_scores is None:
+        return
+    report = evaluate(features, cascade_scores, vagas, args.sizes, args.k)
+
+    print(f"{report['jobs']} vagas x {report['applicants']} candidatos, k={args.k}; "
+          f"floresta exaustiva: {report['exhaustive_ms']:.1f} ms/vaga")
+    print(f"{'N':>7} {'top-k diferente':>16} {'conjunto diferente':>19} {'recall@k':>9} {'ms/vaga':>8}")
+    for row in report["sizes"]:
+        print(f"{row['cascade']:>7} {row['differs']:>16.1%} {row['set_differs']:>19.1%} "
+              f"{row['recall_at_k']:>9.3f} {row['cascade_ms']:>8.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Relatório salvo em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import joblib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.inference.schema import ARTIFACTS_PATH, MODEL_PATH, PARQUET_PATH
+from src.inference.applicants import load_parquet
+from src.inference.artifacts import export_artifacts
+from src.inference.result_cache import artifact_version
+
+
+def export():
+    """Exportar model_rf.joblib e a base de candidatos para ARTIFACTS_PATH (executar na raiz do projeto)."""
+    print("Exportando artefatos do modelo e da base de candidatos...")
+    try:
+        model = joblib.load(MODEL_PATH)
+    except Exception as e:
+        print(f"Erro ao carregar {MODEL_PATH}: {e}")
+        return
+
+    applicants = load_parquet(PARQUET_PATH)
+    if applicants is None:
+        return
+
+    try:
+        path = export_artifacts(
+            model, applicants, ARTIFACTS_PATH,
+            model_version=artifact_version(MODEL_PATH), data_version=artifact_version(PARQUET_PATH)
+        )
+        print(f"Artefatos salvos em {path}")
+    except Exception as e:
+        print(f"Erro ao exportar os artefatos: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    export()
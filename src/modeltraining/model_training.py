@@ -1,6 +1,16 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
 import pandas as pd
 import joblib
-from sklearn.model_selection import train_test_split, GridSearchCV
+from joblib import Memory, Parallel, delayed
+from threadpoolctl import threadpool_limits
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (habilita HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, HalvingGridSearchCV
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
@@ -9,24 +19,70 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, roc_auc_score, accuracy_score
 import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.modeltraining.data_preparation import load_prepared
+from src.inference.text_hashing import HashingTfidfVectorizer
 
-def train_model():
-    print("Iniciando o treinamento do modelo...")
+# Diretório dos modelos salvos
+MODEL_OUTPUT_DIR = os.environ.get("MODEL_OUTPUT_DIR", "/home/ubuntu")
+# Cache em disco (joblib.Memory) do pré-processamento ajustado e das matrizes de treino/teste
+TRAINING_CACHE_DIR = os.environ.get("TRAINING_CACHE_DIR", "../data/training_cache")
+# Núcleos usados no treino (0: todos os disponíveis para o processo)
+TRAINING_CORES = int(os.environ.get("TRAINING_CORES", 0))
+# Features de texto: "tfidf" (vocabulário de até 1000 termos) ou "hashing" (HashingTfidfVectorizer).
+# Na base realista (benchmarks/bench_text_backend.py, 40k linhas) o hashing ajusta em float32 e em
+# blocos: pico de RSS do fit de um texto 248 MB contra 1001 MB, do pré-processamento inteiro 528 MB
+# contra 813 MB, em menos da metade do tempo, e RSS de carga 0.2 MB contra 2.2 MB. O padrão segue
+# tfidf porque o hashing perde AUC (0.7966 contra 0.8014).
+TEXT_BACKEND = os.environ.get("TEXT_BACKEND", "tfidf")
+HASH_FEATURES = int(os.environ.get("HASH_FEATURES", 2 ** 14))
+
+# Espaços de busca do modo de tuning (etapas depois do pré-processamento e grade de parâmetros)
+SEARCH_SPACES = {
+    "rf": (
+        [('classifier', RandomForestClassifier(random_state=42, class_weight='balanced', n_jobs=1))],
+        {
+            'classifier__n_estimators': [50, 100, 200],
+            'classifier__max_depth': [6, 10, 16, None],
+            'classifier__min_samples_leaf': [1, 5]
+        }
+    ),
+    "lr": (
+        [('scaler', StandardScaler(with_mean=False)),
+         ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced'))],
+        {
+            'classifier__C': [0.01, 0.03, 0.1, 0.3, 1.0],
+            'classifier__penalty': ['l1', 'l2']
+        }
+    )
+}
+
+
+def available_cores():
     try:
-        df = pd.read_pickle("../data/processed_data.pkl")
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def load_training_data(data_path=None):
+    # Parquet particionado do preparo por entidade, parquet do preparo em streaming ou o pickle original
+    candidates = ["../data/processed_data", "../data/processed_data.parquet", "../data/processed_data.pkl"]
+    data_path = data_path or next((path for path in candidates if os.path.exists(path)), candidates[-1])
+    try:
+        df = pd.read_pickle(data_path) if data_path.endswith(".pkl") else load_prepared(data_path)
         print(f"DataFrame carregado com shape: {df.shape}")
+        return df
     except Exception as e:
-        print(f"Erro ao carregar ../data/processed_data.pkl: {e}")
-        return
+        print(f"Erro ao carregar {data_path}: {e}")
+        return None
 
-    # Definir X e y
-    if 'target' not in df.columns:
-        print("Coluna 'target' não encontrada no DataFrame.")
-        return
-    
-    X = df.drop(columns=["target", "ID_VAGA", "ID_APPLICANT", "situacao_candidado", "titulo_vaga_prospect", 
-                         "informacoes_basicas", "beneficios", "ID_APPLICANT_raw", "infos_basicas_applicant", 
-                         "informacoes_pessoais", "cargo_atual", "cv_en"])
+
+def select_features(df):
+    """X, y e as colunas de texto e categóricas usadas pelo modelo (None se não houver features)."""
+    X = df.drop(columns=["target", "ID_VAGA", "ID_APPLICANT", "situacao_candidado", "titulo_vaga_prospect",
+                         "informacoes_basicas", "beneficios", "ID_APPLICANT_raw", "infos_basicas_applicant",
+                         "informacoes_pessoais", "cargo_atual", "cv_en"], errors="ignore")
     y = df["target"]
 
     # Garantir que não há NaNs em y antes do split
@@ -47,30 +103,23 @@ def train_model():
     categorical_features = []
 
     # Colunas de texto principais
-    if 'cv_pt' in X.columns:
-        text_features.append('cv_pt')
-        X['cv_pt'] = X['cv_pt'].fillna('') # Preencher NaNs em colunas de texto
-    if 'vaga_principais_atividades' in X.columns:
-        text_features.append('vaga_principais_atividades')
-        X['vaga_principais_atividades'] = X['vaga_principais_atividades'].fillna('')
-    if 'vaga_competencia_tecnicas_e_comportamentais' in X.columns:
-        text_features.append('vaga_competencia_tecnicas_e_comportamentais')
-        X['vaga_competencia_tecnicas_e_comportamentais'] = X['vaga_competencia_tecnicas_e_comportamentais'].fillna('')
-    if 'app_prof_conhecimentos_tecnicos' in X.columns:
-        text_features.append('app_prof_conhecimentos_tecnicos')
-        X['app_prof_conhecimentos_tecnicos'] = X['app_prof_conhecimentos_tecnicos'].fillna('')
+    for col in ['cv_pt', 'vaga_principais_atividades', 'vaga_competencia_tecnicas_e_comportamentais',
+                'app_prof_conhecimentos_tecnicos']:
+        if col in X.columns:
+            text_features.append(col)
+            X[col] = X[col].fillna('') # Preencher NaNs em colunas de texto
 
     # Colunas categóricas
     potential_cat_cols = [
         'vaga_nivel profissional', 'vaga_nivel_academico', 'vaga_nivel_ingles', 'vaga_nivel_espanhol',
         'vaga_areas_atuacao', 'vaga_local_trabalho', 'vaga_vaga_especifica_para_pcd',
-        'app_prof_nivel_profissional', 'app_prof_area_atuacao', 
+        'app_prof_nivel_profissional', 'app_prof_area_atuacao',
         'app_form_nivel_academico', 'app_form_nivel_ingles', 'app_form_nivel_espanhol'
     ]
 
     for col in potential_cat_cols:
         if col in X.columns:
-            X[col] = X[col].fillna('Desconhecido').astype(str) # Preencher NaNs e garantir tipo string
+            X[col] = X[col].astype(object).fillna('Desconhecido').astype(str) # Preencher NaNs e garantir tipo string
             if X[col].nunique() < 50: # Limitar cardinalidade para OneHotEncoding
                  categorical_features.append(col)
 
@@ -81,84 +130,298 @@ def train_model():
     features_to_keep = list(set(text_features + categorical_features))
     if not features_to_keep:
         print("Nenhuma feature selecionada para o modelo.")
-        return
+        return None
     X = X[features_to_keep]
     print(f"Shape de X após seleção de features: {X.shape}")
     print(f"Colunas finais em X: {X.columns.tolist()}")
+    return X, y, text_features, categorical_features
+
 
-    # Criar preprocessor
+def text_vectorizer(backend=TEXT_BACKEND):
+    if backend == "hashing":
+        return HashingTfidfVectorizer(n_features=HASH_FEATURES, ngram_range=(1,2))
+    if backend != "tfidf":
+        raise ValueError(f"Backend de texto desconhecido: {backend}")
+    return TfidfVectorizer(max_features=1000, stop_words=None, ngram_range=(1,2))
+
+
+def build_preprocessor(text_features, categorical_features, text_backend=TEXT_BACKEND):
     preprocessor_steps = []
-    if text_features:
-        for i, feature_name in enumerate(text_features):
-            preprocessor_steps.append((f'tfidf_{i}', TfidfVectorizer(max_features=1000, stop_words=None, ngram_range=(1,2)), feature_name))
-    
+    for i, feature_name in enumerate(text_features):
+        preprocessor_steps.append((f'tfidf_{i}', text_vectorizer(text_backend), feature_name))
     if categorical_features:
-        preprocessor_steps.append(('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=True), categorical_features))
+        # Com hashing a saída inteira fica em float32 (o one-hot em float64 faria o hstack converter tudo)
+        dtype = np.float32 if text_backend == "hashing" else np.float64
+        preprocessor_steps.append(('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=True, dtype=dtype),
+                                   categorical_features))
+    return ColumnTransformer(transformers=preprocessor_steps, remainder='drop') # drop other columns
 
-    if not preprocessor_steps:
-        print("Nenhum passo de pré-processamento definido. Verifique as features.")
-        return
-        
-    preprocessor = ColumnTransformer(transformers=preprocessor_steps, remainder='drop') # drop other columns
+
+def fit_features(X_train, X_test, text_features, categorical_features, text_backend=TEXT_BACKEND):
+    """Ajustar o pré-processamento uma única vez e transformar treino e teste (matrizes esparsas)."""
+    preprocessor = build_preprocessor(text_features, categorical_features, text_backend)
+    Xt_train = preprocessor.fit_transform(X_train)
+    Xt_test = preprocessor.transform(X_test)
+    return preprocessor, Xt_train, Xt_test
+
+
+def split_training_data(data_path=None):
+    """Carregar a base, selecionar as features e dividir treino/teste.
+
+    Retorna (X_train, X_test, y_train, y_test, text_features, categorical_features)
+    ou None em caso de erro.
+    """
+    df = load_training_data(data_path)
+    if df is None:
+        return None
+
+    # Definir X e y
+    if 'target' not in df.columns:
+        print("Coluna 'target' não encontrada no DataFrame.")
+        return None
+
+    selected = select_features(df)
+    if selected is None:
+        return None
+    X, y, text_features, categorical_features = selected
 
     # Dividir dados
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
     print(f"Dados divididos: X_train: {X_train.shape}, X_test: {X_test.shape}")
+    return X_train, X_test, y_train, y_test, text_features, categorical_features
 
-    # Modelo 1: Logistic Regression
-    print("\nTreinando Logistic Regression")
-    pipeline_lr = Pipeline([
-        ('preprocessor', preprocessor),
-        ('scaler', StandardScaler(with_mean=False)), # StandardScaler para dados esparsos
-        ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced', C=0.1))
-    ])
 
-    try:
-        pipeline_lr.fit(X_train, y_train)
-        y_pred_lr = pipeline_lr.predict(X_test)
-        y_proba_lr = pipeline_lr.predict_proba(X_test)[:, 1]
+def prepare_features(data_path=None, cache_dir=TRAINING_CACHE_DIR, text_backend=TEXT_BACKEND):
+    """Carregar a base, dividir treino/teste e transformar (preprocessor, Xt_train, Xt_test, y_train, y_test).
 
-        print("Logistic Regression - Relatório de Classificação:")
-        print(classification_report(y_test, y_pred_lr))
-        print(f"Logistic Regression - ROC AUC: {roc_auc_score(y_test, y_proba_lr)}")
-        print(f"Logistic Regression - Accuracy: {accuracy_score(y_test, y_pred_lr)}")
-        joblib.dump(pipeline_lr, '/home/ubuntu/model_lr.joblib')
-        print("Modelo Logistic Regression salvo em /home/ubuntu/model_lr.joblib")
+    O pré-processamento é ajustado uma única vez e reaproveitado do cache
+    (joblib.Memory) enquanto os dados não mudam. Retorna None em caso de erro.
+    """
+    split = split_training_data(data_path)
+    if split is None:
+        return None
+    X_train, X_test, y_train, y_test, text_features, categorical_features = split
 
-    except Exception as e:
-        print(f"Erro ao treinar Logistic Regression: {e}")
-        import traceback
-        traceback.print_exc()
+    memory = Memory(cache_dir, mmap_mode='r', verbose=0)
+    preprocessor, Xt_train, Xt_test = memory.cache(fit_features)(
+        X_train, X_test, text_features, categorical_features, text_backend
+    )
+    print(f"Features: treino {Xt_train.shape}, teste {Xt_test.shape}")
+    return preprocessor, Xt_train, Xt_test, y_train, y_test
 
-    # Modelo 2: Random Forest
-    print("\nTreinando Random Forest")
-    pipeline_rf = Pipeline([
-        ('preprocessor', preprocessor),
-        ('classifier', RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', max_depth=10, n_jobs=-1))
-    ])
 
-    try:
-        pipeline_rf.fit(X_train, y_train)
-        best_pipeline_rf = pipeline_rf
+def model_heads(cores):
+    """Etapas de cada modelo depois do pré-processamento e os núcleos reservados a cada um.
 
-        y_pred_rf = best_pipeline_rf.predict(X_test)
-        y_proba_rf = best_pipeline_rf.predict_proba(X_test)[:, 1]
+    A LogisticRegression (liblinear) usa um núcleo; a Random Forest fica com os demais.
+    """
+    rf_cores = max(1, cores - 1)
+    return {
+        "Logistic Regression": ("lr", [
+            ('scaler', StandardScaler(with_mean=False)), # StandardScaler para dados esparsos
+            ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced', C=0.1))
+        ], 1),
+        "Random Forest": ("rf", [
+            ('classifier', RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', max_depth=10, n_jobs=rf_cores))
+        ], rf_cores)
+    }
 
-        print("Random Forest - Relatório de Classificação:")
-        print(classification_report(y_test, y_pred_rf))
-        print(f"Random Forest - ROC AUC: {roc_auc_score(y_test, y_proba_rf)}")
-        print(f"Random Forest - Accuracy: {accuracy_score(y_test, y_pred_rf)}")
-        joblib.dump(best_pipeline_rf, '/home/ubuntu/model_rf.joblib')
-        print("Modelo Random Forest salvo em /home/ubuntu/model_rf.joblib")
 
+def fit_head(name, steps, Xt_train, y_train, threads):
+    """Treinar as etapas de um modelo sobre a matriz já transformada (executado no pool)."""
+    start = time.perf_counter()
+    try:
+        with threadpool_limits(limits=threads):
+            head = Pipeline(steps).fit(Xt_train, y_train)
+        return name, head.steps, None, time.perf_counter() - start
     except Exception as e:
-        print(f"Erro ao treinar Random Forest: {e}")
         import traceback
-        traceback.print_exc()
+        return name, None, f"{e}\n{traceback.format_exc()}", time.perf_counter() - start
 
-    print("\nTreinamento e avaliação concluídos. Modelos salvos.")
 
+def train_model(data_path=None, output_dir=MODEL_OUTPUT_DIR, cores=TRAINING_CORES, cache_dir=TRAINING_CACHE_DIR,
+                text_backend=TEXT_BACKEND):
+    """Treinar LogisticRegression e Random Forest com o pré-processamento ajustado uma vez.
 
-if __name__ == '__main__':
-    train_model()
+    As matrizes esparsas de treino/teste ficam em cache (joblib.Memory) e os
+    dois modelos treinam ao mesmo tempo em processos separados (com mais de
+    um núcleo), recebendo as matrizes por memmap. Os modelos salvos são
+    Pipelines completos (preprocessor + etapas do modelo), como antes.
+    """
+    print("Iniciando o treinamento do modelo...")
+    start = time.perf_counter()
+    prepared = prepare_features(data_path, cache_dir, text_backend)
+    if prepared is None:
+        return
+    preprocessor, Xt_train, Xt_test, y_train, y_test = prepared
+
+    cores = cores or available_cores()
+    heads = model_heads(cores)
+    # Um processo por modelo quando há núcleos para isso; matrizes grandes vão por memmap
+    n_jobs = len(heads) if cores > 1 else 1
+    print(f"\nTreinando {', '.join(heads)} ({cores} núcleos, {n_jobs} processos)")
+    results = Parallel(n_jobs=n_jobs, max_nbytes='1M')(
+        delayed(fit_head)(name, steps, Xt_train, y_train, threads) for name, (_, steps, threads) in heads.items()
+    )
+
+    for name, steps, error, seconds in results:
+        short_name = heads[name][0]
+        if error is not None:
+            print(f"Erro ao treinar {name}: {error}")
+            continue
+        pipeline = Pipeline([('preprocessor', preprocessor)] + steps)
+        head = Pipeline(steps)
+        y_pred = head.predict(Xt_test)
+        y_proba = head.predict_proba(Xt_test)[:, 1]
+
+        print(f"\n{name} - treinado em {seconds:.1f}s")
+        print(f"{name} - Relatório de Classificação:")
+        print(classification_report(y_test, y_pred))
+        print(f"{name} - ROC AUC: {roc_auc_score(y_test, y_proba)}")
+        print(f"{name} - Accuracy: {accuracy_score(y_test, y_pred)}")
+        model_path = os.path.join(output_dir, f'model_{short_name}.joblib')
+        joblib.dump(pipeline, model_path)
+        print(f"Modelo {name} salvo em {model_path}")
+
+    print(f"\nTreinamento e avaliação concluídos em {time.perf_counter() - start:.1f}s. Modelos salvos.")
+
+
+def pareto_front(points):
+    """Máscara dos pontos (auc, latência) não dominados: nenhum outro tem AUC >= e latência <= com uma melhora estrita."""
+    return [
+        not any(
+            other_auc >= auc and other_latency <= latency and (other_auc > auc or other_latency < latency)
+            for other_auc, other_latency in points
+        )
+        for auc, latency in points
+    ]
+
+
+class TimedRocAuc:
+    """Scorer ROC AUC do tuning que também mede o predict_proba de cada fold de validação.
+
+    O score_time do sklearn inclui o cálculo do AUC; aqui só o predict_proba
+    (pré-processamento + modelo, como na API) é cronometrado. Cada processo
+    do search anota as medições em um arquivo próprio em directory.
+    """
+
+    def __init__(self, directory, param_names):
+        self.directory = directory
+        self.param_names = list(param_names)
+
+    def __call__(self, estimator, X, y):
+        start = time.perf_counter()
+        proba = estimator.predict_proba(X)[:, 1]
+        seconds = time.perf_counter() - start
+        params = estimator.get_params()
+        record = {"params": {name: params[name] for name in self.param_names}, "rows": len(X), "seconds": seconds}
+        with open(os.path.join(self.directory, f"{os.getpid()}.jsonl"), "a") as f:
+            f.write(json.dumps(record, sort_keys=True, default=str) + "\n")
+        return roc_auc_score(y, proba)
 
+    def latencies(self):
+        """ms por 1.000 linhas de cada configuração, na rodada com mais linhas em que foi avaliada."""
+        measured = {}
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name)) as f:
+                for line in f:
+                    record = json.loads(line)
+                    key = json.dumps(record["params"], sort_keys=True, default=str)
+                    rows, seconds = measured.get(key, (0, []))
+                    if record["rows"] > rows:
+                        rows, seconds = record["rows"], []
+                    if record["rows"] == rows:
+                        seconds.append(record["seconds"])
+                    measured[key] = (rows, seconds)
+        return {key: float(np.mean(seconds)) * 1000 / rows * 1000 for key, (rows, seconds) in measured.items()}
+
+
+def search_results(name, search, latencies):
+    """Uma linha por configuração, na última rodada em que ela foi avaliada.
+
+    A latência (latencies, de TimedRocAuc) é o tempo do predict_proba no
+    fold de validação, sem o cálculo do AUC, em ms por 1.000 linhas.
+    """
+    results = search.cv_results_
+    last = {}
+    for i, params in enumerate(results['params']):
+        last[json.dumps(params, sort_keys=True, default=str)] = i
+    rows = []
+    for key, i in last.items():
+        rows.append({
+            "model": name,
+            "params": json.loads(key),
+            "roc_auc": float(results['mean_test_score'][i]),
+            "roc_auc_std": float(results['std_test_score'][i]),
+            "latency_ms_per_1k": latencies[key],
+            "fit_seconds": float(results['mean_fit_time'][i]),
+            "n_resources": int(results['n_resources'][i]),
+            "iteration": int(results['iter'][i])
+        })
+    return rows
+
+
+def tune_models(data_path=None, output_dir=MODEL_OUTPUT_DIR, cores=TRAINING_CORES, cache_dir=TRAINING_CACHE_DIR,
+                factor=3, cv=3, spaces=None, text_backend=TEXT_BACKEND):
+    """Busca de hiperparâmetros (successive halving) da Random Forest e da LogisticRegression.
+
+    O pré-processamento faz parte do pipeline buscado: TF-IDF e one-hot são
+    ajustados só com a parte de treino de cada fold, sem ver o fold de
+    validação. O ajuste de cada fold fica em cache (memory do Pipeline) e é
+    reaproveitado por todas as configurações. Cada configuração fica com ROC
+    AUC e latência do predict_proba no relatório (tuning_results.json em
+    output_dir), e a fronteira de Pareto AUC x latência é impressa para a
+    escolha do modelo.
+    """
+    print("Iniciando a busca de hiperparâmetros...")
+    start = time.perf_counter()
+    split = split_training_data(data_path)
+    if split is None:
+        return None
+    X_train, _, y_train, _, text_features, categorical_features = split
+    cores = cores or available_cores()
+    memory = Memory(cache_dir, verbose=0)
+    timings = tempfile.mkdtemp(prefix="tuning-timings-")
+
+    rows = []
+    try:
+        for name, (steps, grid) in (spaces or SEARCH_SPACES).items():
+            preprocessor = build_preprocessor(text_features, categorical_features, text_backend)
+            scorer = TimedRocAuc(os.path.join(timings, name), grid)
+            os.makedirs(scorer.directory)
+            search = HalvingGridSearchCV(
+                Pipeline([('preprocessor', preprocessor)] + steps, memory=memory), grid, factor=factor, cv=cv,
+                scoring=scorer, refit=False, n_jobs=cores, random_state=42, error_score='raise'
+            )
+            search.fit(X_train, y_train)
+            print(f"{name}: {len(search.cv_results_['params'])} avaliações em {search.n_iterations_} rodadas")
+            rows.extend(search_results(name, search, scorer.latencies()))
+    finally:
+        shutil.rmtree(timings, ignore_errors=True)
+
+    for row, on_front in zip(rows, pareto_front([(row["roc_auc"], row["latency_ms_per_1k"]) for row in rows])):
+        row["pareto"] = on_front
+    rows.sort(key=lambda row: (not row["pareto"], -row["roc_auc"]))
+
+    print("\nFronteira de Pareto (ROC AUC x latência):")
+    for row in rows:
+        if row["pareto"]:
+            print(f"  {row['model']} AUC {row['roc_auc']:.4f} | {row['latency_ms_per_1k']:.2f} ms/1k linhas | {row['params']}")
+
+    report_path = os.path.join(output_dir, 'tuning_results.json')
+    with open(report_path, 'w') as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em {report_path} ({time.perf_counter() - start:.1f}s)")
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tune', action='store_true', help='busca de hiperparâmetros em vez do treino')
+    parser.add_argument('--text-backend', choices=['tfidf', 'hashing'], default=TEXT_BACKEND,
+                        help='features de texto: TfidfVectorizer ou HashingTfidfVectorizer (sem vocabulário)')
+    args = parser.parse_args()
+    if args.tune:
+        tune_models(text_backend=args.text_backend)
+    else:
+        train_model(text_backend=args.text_backend)
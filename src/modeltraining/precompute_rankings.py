@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.inference.schema import EXPECTED_FEATURES, PARQUET_PATH, RANKING_TABLE_PATH, job_fields
+from src.inference.applicants import load_applicants
+from src.inference.artifacts import ArtifactModel
+from src.inference.batch import rank_jobs
+from src.inference.features import ApplicantFeatures
+from src.inference.ingestion import applicant_ids
+from src.inference.ranking_table import load_ranking_table, table_metadata, update_rankings, write_ranking_table
+from src.inference.reload import ServingState
+from src.inference.result_cache import canonical_key
+from src.inference.sharding import ShardedScorer
+from src.modeltraining.data_preparation import VAGA_SECTIONS, load_entities, read_parts
+
+VAGAS_PATH = "./src/data/vagas.json"
+RANKING_TOP_K = int(os.environ.get("RANKING_TOP_K", 100))
+
+
+def load_catalogue(path):
+    """Vagas do vagas.json (ou da tabela de vagas do preparo por entidade) como {ID_VAGA: (digest, campos)}.
+
+    O digest é o mesmo hash dos campos normalizados usado pela API, então uma
+    vaga alterada no catálogo é recalculada e não é servida com o ranking antigo.
+    """
+    if os.path.isdir(path):
+        vagas = read_parts(os.path.join(path, 'vagas'))
+    else:
+        vagas = load_entities(path, VAGA_SECTIONS, lambda key, record: key).rename(columns={'__id': 'ID_VAGA'})
+    columns = [feature for feature in EXPECTED_FEATURES if feature.startswith("vaga_")]
+    vagas = vagas.reindex(columns=['ID_VAGA'] + columns)
+    catalogue = {}
+    for vaga in vagas.to_dict('records'):
+        fields = job_fields(vaga)
+        catalogue[str(vaga['ID_VAGA'])] = (canonical_key(fields), fields)
+    return catalogue
+
+
+def precompute(catalogue_path=VAGAS_PATH, output_path=RANKING_TABLE_PATH, top_k=RANKING_TOP_K, workers=None,
+               full=False):
+    """Calcular (ou atualizar) o top-K de todas as vagas do catálogo contra a base servida pela API.
+
+    A base é a mesma do servidor (artefatos ou parquet + segmentos delta), e a
+    tabela leva as versões do modelo e dos dados. Com uma tabela anterior do
+    mesmo modelo, só vagas novas/alteradas e candidatos novos são pontuados.
+    """
+    # A rota de predição carrega o modelo ao ser importada: só aqui, não na importação do script
+    from src.routes.prediction import CHUNK_ROWS, MODEL_VERSION, SHARD_ROWS, model, prepare_state, with_deltas
+
+    start = time.perf_counter()
+    catalogue = load_catalogue(catalogue_path)
+    print(f"Catálogo: {len(catalogue)} vagas")
+
+    if model is None:
+        return None
+    applicants, data_version = load_applicants(PARQUET_PATH, model)
+    if applicants is None or len(applicants) == 0:
+        print("Base de candidatos vazia ou não carregada.")
+        return None
+    state = with_deltas(prepare_state(ServingState(model, applicants, MODEL_VERSION, data_version)))
+    features = state.features
+    if features is None:
+        print("Modelo sem suporte ao cache de features; tabela não gerada.")
+        return None
+
+    workers = workers if workers is not None else os.cpu_count() or 1
+    scorer = None
+    if workers > 1 and isinstance(features, ApplicantFeatures):
+        scorer = ShardedScorer(features, workers, SHARD_ROWS, model if isinstance(model, ArtifactModel) else None)
+        rank_all = lambda job_blocks: scorer.rank(job_blocks, top_k, None, CHUNK_ROWS)
+    else:
+        rank_all = lambda job_blocks: rank_jobs(
+            lambda jobs, rows: features.predict_proba([job_blocks[j] for j in jobs], rows),
+            len(job_blocks), features.n_rows, top_k, chunk_rows=CHUNK_ROWS
+        )
+
+    try:
+        previous = None if full else load_ranking_table(output_path)
+        ids = applicant_ids(state.applicants, np.arange(len(state.applicants)))
+        jobs, summary = update_rankings(
+            previous, catalogue, features, ids, top_k, rank_all, state.model_version, CHUNK_ROWS
+        )
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+    metadata = table_metadata(top_k, ids, features.pipeline.classifier.classes_,
+                              state.model_version, state.data_version)
+    write_ranking_table(output_path, jobs, metadata)
+    print(f"Tabela de rankings salva em {output_path}: {summary['full']} vagas calculadas do zero, "
+          f"{summary['incremental']} atualizadas com candidatos novos, {summary['reused']} reaproveitadas "
+          f"({time.perf_counter() - start:.1f}s)")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Top-K pré-calculado de todas as vagas do catálogo (executar na raiz do projeto).")
+    parser.add_argument("--vagas", default=VAGAS_PATH, help="vagas.json ou diretório do preparo por entidade.")
+    parser.add_argument("--output", default=RANKING_TABLE_PATH)
+    parser.add_argument("--k", type=int, default=RANKING_TOP_K)
+    parser.add_argument("--workers", type=int, default=None, help="Processos para pontuar a base (padrão: núcleos).")
+    parser.add_argument("--full", action="store_true", help="Ignorar a tabela anterior e recalcular tudo.")
+    args = parser.parse_args()
+    precompute(args.vagas, args.output, args.k, args.workers, args.full)
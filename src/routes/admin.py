@@ -0,0 +1,46 @@
+import os
+import hmac
+from flask import request, jsonify
+from . import prediction
+
+# Token exigido no header X-Admin-Token (sem ADMIN_TOKEN as rotas de administração ficam desativadas)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+
+def authorized(headers):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+
+def reload_status():
+    state = prediction.serving_snapshot()
+    return dict(
+        prediction.reloader.status(),
+        model_version=state.model_version,
+        data_version=state.data_version,
+        threads=prediction.inference_threads.status()
+    )
+
+
+def create_admin_route(app):
+
+    @app.route("/admin/reload", methods=["GET", "POST"])
+    def admin_reload():
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Administração desativada. Defina ADMIN_TOKEN para habilitar."}), 403
+        if not authorized(request.headers):
+            return jsonify({"error": "Token de administração inválido."}), 401
+
+        if request.method == "GET":
+            return jsonify(reload_status()), 200
+
+        # Recarregar modelo e base em segundo plano; ?wait=1 responde só depois da troca
+        wait = request.args.get("wait", "0").lower() in ("1", "true")
+        if not prediction.reloader.trigger(wait=wait):
+            return jsonify({"error": "Recarregamento já em andamento."}), 409
+        if not wait:
+            return jsonify({"message": "Recarregamento iniciado."}), 202
+
+        status = reload_status()
+        return jsonify(status), 500 if status["last_error"] else 200
+
+    return app
@@ -0,0 +1,28 @@
+from flask import request, jsonify
+from . import prediction
+from .admin import ADMIN_TOKEN, authorized
+
+
+def create_applicants_route(app):
+
+    @app.route("/applicants", methods=["POST"])
+    def ingest():
+        # Mesma proteção das rotas de administração (ADMIN_TOKEN / X-Admin-Token)
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Ingestão desativada. Defina ADMIN_TOKEN para habilitar."}), 403
+        if not authorized(request.headers):
+            return jsonify({"error": "Token de administração inválido."}), 401
+        if not request.is_json:
+            return jsonify({"error": "Content-Type deve ser application/json"}), 400
+
+        try:
+            summary = prediction.ingest_applicants(request.get_json())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(f"Erro ao ingerir candidatos: {e}")
+            return jsonify({"error": f"Erro ao ingerir candidatos: {e}"}), 500
+
+        return jsonify(summary), 201
+
+    return app
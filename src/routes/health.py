@@ -0,0 +1,25 @@
+from flask import jsonify
+from . import prediction
+
+
+def create_health_route(app):
+
+    @app.route("/healthz", methods=["GET"])
+    def healthz():
+        # Liveness: o processo está no ar e atende requisições
+        return jsonify({"status": "ok"}), 200
+
+    @app.route("/readyz", methods=["GET"])
+    def readyz():
+        # Readiness: só depois de uma predição de warm-up com a versão servida
+        state = prediction.serving_snapshot()
+        is_ready = prediction.ready and state.model is not None and state.applicants is not None
+        status = {
+            "ready": is_ready,
+            "model_version": state.model_version,
+            "data_version": state.data_version,
+            "warm_up_ms": prediction.warm_up_ms
+        }
+        return jsonify(status), 200 if is_ready else 503
+
+    return app
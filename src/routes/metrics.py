@@ -0,0 +1,37 @@
+from . import prediction
+from ..inference.metrics import metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collected_metrics():
+    """Valores lidos na coleta: base servida, prontidão, cache de resultados e micro-batching."""
+    state = prediction.serving_snapshot()
+    cache = prediction.result_cache.stats()
+    collected = [
+        ("predict_applicants", "gauge", "Candidatos na base servida.",
+         0 if state.applicants is None else len(state.applicants)),
+        ("predict_ready", "gauge", "1 depois do warm-up da predição.", prediction.ready),
+        ("predict_result_cache_entries", "gauge", "Entradas no cache de resultados.", cache["entries"]),
+        ("predict_result_cache_hits_total", "counter", "Acertos do cache de resultados.", cache["hits"]),
+        ("predict_result_cache_misses_total", "counter", "Falhas do cache de resultados.", cache["misses"]),
+        ("predict_result_cache_evictions_total", "counter", "Remoções do cache de resultados.", cache["evictions"])
+    ]
+    if prediction.coalescer is not None:
+        stats = prediction.coalescer.stats()
+        collected += [
+            ("predict_coalescer_batches_total", "counter", "Lotes pontuados pelo micro-batching.", stats["batches"]),
+            ("predict_coalescer_requests_total", "counter", "Requisições atendidas em lote.", stats["requests"]),
+            ("predict_coalescer_timeouts_total", "counter", "Requisições que desistiram do lote.", stats["timeouts"])
+        ]
+    return collected
+
+
+def create_metrics_route(app):
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        # Formato texto do Prometheus; cada worker do servidor expõe as próprias métricas
+        return app.response_class(metrics.render(collected_metrics()), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    return app
@@ -1,63 +1,782 @@
 import os
 import sys
+import threading
+import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
 import joblib
 import pandas as pd
 import numpy as np
+from ..inference.features import ApplicantFeatures, FeatureCache, SegmentedFeatures, fill_categorical
+from ..inference.ranking import DEFAULT_TOP_K, format_matches
+from ..inference.ingestion import applicant_ids
+from ..inference.batch import rank_jobs
+from ..inference.retrieval import rank_shortlisted
+from ..inference.result_cache import ResultCache, artifact_version, canonical_key
+from ..inference.artifacts import ArtifactModel, latest_version, load_artifacts
+from ..inference.sharding import SharedArrays, ShardedScorer
+from ..inference.cascade import CascadeCache
+from ..inference.ranking_table import load_ranking_table
+from ..inference.filters import FilterCache, SegmentedBitmapIndex, parse_filters
+from ..inference.coalescer import Coalescer
+from ..inference.reload import Reloader, ServingState
+from ..inference.threads import ThreadBudget
+from ..inference.metrics import metrics, server_timing
+from ..inference.schema import (
+    ARTIFACTS_PATH, CASCADE_MODEL_PATH, CATEGORICAL_FEATURES_FOR_PREDICTION, EXPECTED_FEATURES, MODEL_PATH,
+    PARQUET_PATH, RANKING_TABLE_PATH, TEXT_FEATURES_FOR_PREDICTION, job_fields
+)
 
-# Carregar o modelo
-MODEL_PATH = "./src/modeltraining/model_rf.joblib"
+# Orçamento de threads: os núcleos disponíveis (afinidade e quota do cgroup) divididos entre os
+# PREDICT_SERVER_WORKERS processos do servidor, ou PREDICT_THREADS threads por processo se definido.
+# Vale para o n_jobs dos modelos carregados e para os pools nativos (BLAS/OpenMP).
+SERVER_WORKERS = int(os.environ.get("PREDICT_SERVER_WORKERS", os.environ.get("WEB_CONCURRENCY", 1)))
+INFERENCE_THREADS = int(os.environ.get("PREDICT_THREADS", 0))
+inference_threads = ThreadBudget(SERVER_WORKERS, INFERENCE_THREADS)
+inference_threads.apply()
 
-try:
-    model = joblib.load(MODEL_PATH)
-    print(f"Modelo carregado de {MODEL_PATH}")
-except FileNotFoundError:
-    print(f"ERRO: Arquivo do modelo não encontrado em {MODEL_PATH}. A API de predição não funcionará.")
-    model = None
-except Exception as e:
-    print(f"ERRO ao carregar o modelo de {MODEL_PATH}: {e}")
+# Índice invertido dos candidatos para a pré-seleção (?shortlist=)
+TERM_INDEX = os.environ.get("PREDICT_TERM_INDEX", "1") == "1"
+
+
+def load_model():
+    """Carregar o modelo: artefatos (mmap) se houver versão válida, senão o joblib.
+
+    Os artefatos vêm de ARTIFACTS_PATH (src/modeltraining/export_artifacts.py);
+    exportados de outro MODEL_PATH, são ignorados.
+
+    Retorna o modelo (ou None) e a versão usada na chave do cache de resultados.
+    """
     model = None
+    artifacts_path = latest_version(ARTIFACTS_PATH)
+    if artifacts_path is not None:
+        try:
+            model = load_artifacts(artifacts_path, term_index=TERM_INDEX)
+            if model.model_version not in (None, artifact_version(MODEL_PATH)) and os.path.exists(MODEL_PATH):
+                print(f"Artefatos em {artifacts_path} exportados de outro {MODEL_PATH}; ignorando.")
+                model = None
+            else:
+                print(f"Modelo carregado dos artefatos em {artifacts_path}")
+                return inference_threads.configure(model), model.version
+        except Exception as e:
+            print(f"ERRO ao carregar os artefatos de {artifacts_path}: {e}")
+            model = None
+
+    try:
+        model = joblib.load(MODEL_PATH)
+        print(f"Modelo carregado de {MODEL_PATH}")
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo do modelo não encontrado em {MODEL_PATH}. A API de predição não funcionará.")
+        model = None
+    except Exception as e:
+        print(f"ERRO ao carregar o modelo de {MODEL_PATH}: {e}")
+        model = None
+    return inference_threads.configure(model), artifact_version(MODEL_PATH)
+
+
+model, MODEL_VERSION = load_model()
+
+def load_cascade_model():
+    """Carregar o modelo linear da cascata. Sem ele as requisições com cascata pontuam todos os candidatos."""
+    try:
+        cascade = joblib.load(CASCADE_MODEL_PATH)
+        print(f"Modelo da cascata carregado de {CASCADE_MODEL_PATH}")
+        return inference_threads.configure(cascade)
+    except FileNotFoundError:
+        print(f"Modelo da cascata não encontrado em {CASCADE_MODEL_PATH}; cascata desativada.")
+    except Exception as e:
+        print(f"ERRO ao carregar o modelo da cascata de {CASCADE_MODEL_PATH}: {e}")
+    return None
+
+
+cascade_model = load_cascade_model()
+
+def load_rankings():
+    table = load_ranking_table(RANKING_TABLE_PATH)
+    if table is not None:
+        print(f"Tabela de rankings carregada de {RANKING_TABLE_PATH}: {len(table)} vagas, top-{table.top_k}")
+    return table
+
+
+ranking_table = load_rankings()
+
+# Máximo de linhas (vagas x candidatos) montadas por chamada ao classificador
+CHUNK_ROWS = int(os.environ.get("PREDICT_CHUNK_ROWS", 50_000))
+
+# Motor de inferência da floresta: "sklearn" (padrão) ou "numpy" (src/inference/forest.py)
+PREDICT_ENGINE = os.environ.get("PREDICT_ENGINE", "sklearn")
+
+# Tamanho padrão da pré-seleção pelo índice invertido (0 = pontuar todos os candidatos)
+SHORTLIST_SIZE = int(os.environ.get("PREDICT_SHORTLIST", 0))
+
+# Tamanho padrão do top-N da cascata: a regressão logística pontua todos os candidatos e a
+# floresta só os N melhores (0 = sem cascata)
+CASCADE_SIZE = int(os.environ.get("PREDICT_CASCADE", 0))
+
+# Processos para pontuar a base em shards (0 = pontuar no próprio processo) e linhas por shard
+PREDICT_WORKERS = int(os.environ.get("PREDICT_WORKERS", 0))
+SHARD_ROWS = int(os.environ.get("PREDICT_SHARD_ROWS", 100_000))
+
+# Features dos candidatos pré-calculadas (recalculadas quando o modelo ou a base mudam)
+feature_cache = FeatureCache(engine=PREDICT_ENGINE, term_index=TERM_INDEX)
+
+# Filtros por coluna categórica dos candidatos (ex.: ?app_form_nivel_ingles_min=Avançado), avaliados
+# sobre bitmaps montados uma vez por base
+FILTER_COLUMNS = [col for col in CATEGORICAL_FEATURES_FOR_PREDICTION if col.startswith("app_")]
+filter_cache = FilterCache(FILTER_COLUMNS)
+
+# Pontuações lineares dos candidatos para a cascata (recalculadas quando o modelo ou a base mudam)
+cascade_cache = CascadeCache()
+
+# Resultados já calculados por vaga: LRU com expiração (PREDICT_RESULT_CACHE_SIZE=0 desativa)
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("PREDICT_RESULT_CACHE_SIZE", 256)),
+    ttl_seconds=float(os.environ.get("PREDICT_RESULT_CACHE_TTL", 300))
+)
+
+# Micro-batching: requisições que chegam dentro de PREDICT_COALESCE_MS (0 = desativado) são pontuadas
+# juntas, em lotes de até PREDICT_COALESCE_MAX_BATCH; quem espera mais de PREDICT_COALESCE_MAX_WAIT_MS
+# na fila é pontuado sozinho. Os lotes são pontuados em paralelo por PREDICT_COALESCE_WORKERS threads
+# (no gunicorn, o número de threads de cada worker)
+COALESCE_MS = float(os.environ.get("PREDICT_COALESCE_MS", 0))
+COALESCE_MAX_BATCH = int(os.environ.get("PREDICT_COALESCE_MAX_BATCH", 32))
+COALESCE_MAX_WAIT_MS = float(os.environ.get("PREDICT_COALESCE_MAX_WAIT_MS", 100))
+COALESCE_WORKERS = int(os.environ.get("PREDICT_COALESCE_WORKERS", 4))
+coalescer = None
+
+# Métricas por etapa da predição em /metrics (PREDICT_METRICS=0 desativa os timers). O header
+# X-Debug-Timing: 1 devolve as etapas da requisição no header Server-Timing mesmo com as métricas desativadas
+METRICS_ENABLED = os.environ.get("PREDICT_METRICS", "1") == "1"
+metrics.enabled = METRICS_ENABLED
+PREDICT_ENDPOINTS = ("predict", "predict_batch", "predict_known_job")
+
+# Pool de processos criado em create_prediction_route quando PREDICT_WORKERS > 0
+shard_scorer = None
+
+# Base de candidatos servida (definida em create_prediction_route e trocada no reload)
+applicants = None
+DATA_VERSION = None
+
+# Versão servida completa, com os derivados da base já montados (trocada junto com as globais acima)
+served_state = None
+
+# Recarregamento: intervalo do polling dos arquivos (0 = só pelo endpoint /admin/reload)
+# e tempo até fechar o pool de processos da versão anterior
+RELOAD_INTERVAL = float(os.environ.get("PREDICT_RELOAD_INTERVAL", 0))
+RELOAD_GRACE_SECONDS = float(os.environ.get("PREDICT_RELOAD_GRACE", 30))
+
+# Protege a leitura/troca conjunta de modelo, base e versões
+serving_lock = threading.Lock()
+
+# Candidatos ingeridos via POST /applicants: segmentos delta em parquet e máximo de
+# segmentos antes da compactação em segundo plano
+APPLICANT_DELTA_PATH = os.environ.get("PREDICT_DELTA_PATH", "./src/data/applicants_delta")
+DELTA_MAX_SEGMENTS = int(os.environ.get("PREDICT_DELTA_MAX_SEGMENTS", 8))
+
+# Serializa ingestões, compactação e recarregamento (todos geram uma nova versão servida)
+ingest_lock = threading.Lock()
+delta_store = None
+compaction_thread = None
+
+# Prontidão (/readyz): só depois de uma predição de warm-up bem-sucedida
+ready = False
+warm_up_ms = None
+
+
+def build_input_frame(vaga_data, applicants):
+    """Combinar a vaga com todos os candidatos usando operações colunares.
+
+    As colunas dos candidatos são copiadas uma única vez do DataFrame carregado
+    do parquet e os campos da vaga são replicados como colunas constantes.
+    """
+    applicant_features = [feature for feature in EXPECTED_FEATURES if feature in applicants.columns]
+    input_df = applicants[applicant_features].reset_index(drop=True)
+
+    for feature in EXPECTED_FEATURES:
+        if feature not in applicant_features:
+            value = vaga_data.get(feature, np.nan)
+            input_df[feature] = value if pd.api.types.is_scalar(value) else [value] * len(input_df)
+
+    return input_df[EXPECTED_FEATURES]
+
+
+def validate_job_payload(vaga_data):
+    """Validar e pré-processar os campos de uma vaga. Retorna os campos ausentes."""
+    # Verificar se todos os campos da vaga estão presentes
+    missing_fields = [feature for feature in EXPECTED_FEATURES if feature.startswith("vaga_") and feature not in vaga_data]
+    if missing_fields:
+        return missing_fields
+
+    # Aplicar pré-processamento nos campos da vaga
+    for col in TEXT_FEATURES_FOR_PREDICTION:
+        if col in vaga_data:
+            vaga_data[col] = vaga_data.get(col, "")
+
+    for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
+        if col in vaga_data:
+            vaga_data[col] = vaga_data.get(col, "Desconhecido")
+
+    return []
+
+
+def frame_predict_proba(model, vagas, applicants, jobs, rows):
+    """Caminho completo (sem cache de features): DataFrame candidatos x vaga no pipeline."""
+    frames = []
+    with metrics.stage("frame"):
+        for job in jobs:
+            input_df = build_input_frame(vagas[job], applicants.iloc[rows])
+
+            for col in TEXT_FEATURES_FOR_PREDICTION:
+                input_df[col] = input_df[col].fillna("")
+
+            for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
+                input_df[col] = fill_categorical(input_df[col])
+
+            frames.append(input_df)
+        frame = pd.concat(frames, ignore_index=True)
+
+    with metrics.stage("pipeline"):
+        probabilities = model.predict_proba(frame)
+    return np.split(probabilities, len(frames))
+
+
+def prepare_state(state):
+    """Montar na própria versão, uma única vez, as features, os bitmaps dos filtros e as pontuações da cascata."""
+    if state.applicants is None:
+        return state
+    if state.features is None:
+        state.features = feature_cache.get(state.model, state.applicants)
+    if state.filters is None:
+        state.filters = filter_cache.get(state.applicants)
+    if state.cascade_scores is None:
+        # Reaproveita os blocos dos candidatos já calculados para a floresta
+        state.cascade_scores = cascade_cache.get(state.cascade_model, state.applicants, features=state.features)
+    return state
+
+
+def rank_vagas(vagas, state, top_k, min_probability=None, shortlist=0, report_recall=False, cascade=0, filters=None):
+    """Top-k de candidatos para cada vaga, com uma única passada de predict_proba por bloco.
+
+    state é a versão servida (ServingState) lida no início da requisição.
+    Com filters ({coluna: valores aceitos}) só os candidatos selecionados pelos
+    bitmaps chegam à montagem das features e à floresta. Com cascade > 0 a
+    regressão logística pontua a base e a floresta ordena só os cascade
+    melhores; com shortlist > 0 a floresta pontua só os candidatos
+    pré-selecionados pelo índice invertido. Retorna os resultados e as
+    informações da pré-seleção.
+    """
+    model, applicants, shard_scorer = state.model, state.applicants, state.shard_scorer
+    if len(applicants) == 0:
+        return [[] for _ in vagas], {}
+    prepare_state(state)
+
+    # Posições dos candidatos que passam nos filtros (None = todos)
+    allowed = state.filters.select(filters) if filters else None
+    n_rows = len(applicants) if allowed is None else len(allowed)
+    rows_of = (lambda rows: rows) if allowed is None else (lambda rows: allowed[rows])
+
+    info = {}
+    applicant_features = state.features
+    if applicant_features is not None:
+        # Transformar só as vagas e concatenar com o bloco já calculado dos candidatos
+        job_blocks = applicant_features.pipeline.transform_jobs(vagas)
+        classes = applicant_features.pipeline.classifier.classes_
+        cascade_scores = state.cascade_scores if cascade else None
+        if cascade_scores is not None:
+            rankings, info = rank_shortlisted(
+                applicant_features, job_blocks, top_k, min_probability, cascade, CHUNK_ROWS, report_recall,
+                subsets=cascade_scores.shortlists(vagas, max(cascade, top_k), allowed), allowed=allowed
+            )
+        elif shortlist and applicant_features.term_index is not None:
+            rankings, info = rank_shortlisted(
+                applicant_features, job_blocks, top_k, min_probability, shortlist, CHUNK_ROWS, report_recall,
+                allowed=allowed
+            )
+        elif allowed is None and shard_scorer is not None and shard_scorer.features is applicant_features:
+            rankings = shard_scorer.rank(job_blocks, top_k, min_probability, CHUNK_ROWS)
+        else:
+            predict_proba = lambda jobs, rows: applicant_features.predict_proba(
+                [job_blocks[j] for j in jobs], rows_of(rows)
+            )
+            rankings = rank_jobs(predict_proba, len(vagas), n_rows, top_k, min_probability, CHUNK_ROWS)
+            for ranking in rankings:
+                ranking.positions = rows_of(ranking.positions)
+    else:
+        from ..inference.ingestion import SegmentedApplicants
+        frame = applicants.frame() if isinstance(applicants, SegmentedApplicants) else applicants
+        predict_proba = lambda jobs, rows: frame_predict_proba(model, vagas, frame, jobs, rows_of(rows))
+        classes = model.classes_
+        rankings = rank_jobs(predict_proba, len(vagas), n_rows, top_k, min_probability, CHUNK_ROWS)
+        for ranking in rankings:
+            ranking.positions = rows_of(ranking.positions)
+
+    # Pares vaga x candidato que chegaram à floresta
+    metrics.count_candidates(sum(info["shortlist_sizes"]) if info.get("shortlist_sizes") else n_rows * len(vagas))
+    with metrics.stage("format"):
+        # IDs só das posições selecionadas
+        return [
+            format_matches(r.positions, r.probabilities, classes, dict(zip(r.positions, applicant_ids(applicants, r.positions))))
+            for r in rankings
+        ], info
+
+
+def coalescing_key(state, params):
+    """Requisições só entram no mesmo lote com a mesma versão servida e os mesmos parâmetros."""
+    return id(state.model), id(state.applicants), id(state.cascade_model), canonical_key(params)
+
+
+def new_coalescer():
+    if COALESCE_MS <= 0:
+        return None
+    print(f"Micro-batching do /predict: janela de {COALESCE_MS} ms, lotes de até {COALESCE_MAX_BATCH} requisições")
+    return Coalescer(
+        lambda vagas, state, **params: rank_vagas(vagas, state, **params),
+        COALESCE_MS, COALESCE_MAX_BATCH, COALESCE_MAX_WAIT_MS, key=coalescing_key, workers=COALESCE_WORKERS
+    )
+
+
+def score_vagas(vagas, state, **params):
+    """rank_vagas direto ou pelo coalescer, quando o micro-batching está ativo."""
+    if coalescer is None:
+        return rank_vagas(vagas, state, **params)
+    return coalescer.submit(vagas, state, **params)
+
+
+def cached_rank_vagas(vagas, state, bypass=False, **params):
+    """rank_vagas passando pelo cache de resultados: só as vagas sem resultado são pontuadas.
+
+    Retorna os resultados, as informações da pré-seleção e o status do cache
+    de cada vaga (HIT, MISS ou BYPASS; lista vazia com o cache desativado).
+    """
+    if not result_cache.enabled:
+        return score_vagas(vagas, state, **params) + ([],)
+
+    # Uma nova versão do modelo ou da base (reload, ingestão) invalida todos os resultados
+    result_cache.bind(state.model_version, state.data_version)
+    keys = [
+        canonical_key([job_fields(vaga), params], state.model_version, state.data_version) for vaga in vagas
+    ]
+    entries = [None if bypass else result_cache.get(key) for key in keys]
+    statuses = ["BYPASS" if bypass else "HIT" if entry is not None else "MISS" for entry in entries]
+
+    pending = [i for i, entry in enumerate(entries) if entry is None]
+    if pending:
+        results, info = score_vagas([vagas[i] for i in pending], state, **params)
+        sizes = info.get("shortlist_sizes") or [None] * len(pending)
+        recalls = info.get("recalls") or [None] * len(pending)
+        for i, matches, size, recall in zip(pending, results, sizes, recalls):
+            entries[i] = (matches, size, recall)
+            result_cache.put(keys[i], entries[i])
+
+    info = {
+        "shortlist_sizes": [size for _, size, _ in entries if size is not None],
+        "recalls": [recall for _, _, recall in entries if recall is not None]
+    }
+    return [matches for matches, _, _ in entries], info, statuses
+
+
+def table_matches(vaga_data, state, top_k, min_probability=None, report_recall=False, **params):
+    """Top-k da tabela pré-calculada para uma vaga do catálogo (payload com ID_VAGA), ou None.
+
+    A tabela só é usada com o mesmo modelo e a mesma base que a geraram e se os
+    campos da vaga não mudaram desde o cálculo; caso contrário a vaga é pontuada na hora.
+    """
+    table = state.ranking_table
+    if table is None or report_recall or params.get("filters") or "ID_VAGA" not in vaga_data or top_k > table.top_k:
+        return None
+    if not table.usable(state.model_version, state.data_version):
+        return None
+    return table.matches(vaga_data["ID_VAGA"], canonical_key(job_fields(vaga_data)), top_k, min_probability)
+
+
+def table_rank_vagas(vagas, state, bypass=False, **params):
+    """Vagas do catálogo saem da tabela pré-calculada (status TABLE); as demais seguem cached_rank_vagas."""
+    results = [None if bypass else table_matches(vaga, state, **params) for vaga in vagas]
+    pending = [i for i, matches in enumerate(results) if matches is None]
+    if len(pending) == len(vagas):
+        return cached_rank_vagas(vagas, state, bypass, **params)
+
+    statuses = ["TABLE"] * len(vagas)
+    info = {}
+    if pending:
+        live, info, live_statuses = cached_rank_vagas([vagas[i] for i in pending], state, bypass, **params)
+        for j, i in enumerate(pending):
+            results[i] = live[j]
+            statuses[i] = live_statuses[j] if live_statuses else "LIVE"
+    return results, info, statuses
+
+
+def ranking_response(results, info, state, cache_statuses=()):
+    """Resposta JSON com versões, informações da pré-seleção e do cache nos headers."""
+    with metrics.stage("serialize"):
+        response = jsonify(results)
+    if state.model_version is not None:
+        response.headers["X-Model-Version"] = state.model_version
+    if state.data_version is not None:
+        response.headers["X-Data-Version"] = state.data_version
+    if cache_statuses:
+        response.headers["X-Cache"] = ",".join(cache_statuses)
+    if info.get("shortlist_sizes"):
+        response.headers["X-Shortlist-Size"] = ",".join(str(size) for size in info["shortlist_sizes"])
+    if info.get("recalls"):
+        response.headers["X-Shortlist-Recall"] = f"{np.mean(info['recalls']):.4f}"
+    return response, 200
 
-# Lista de features esperadas pelo modelo
-EXPECTED_FEATURES = [
-    "cv_pt", # Text
-    "vaga_principais_atividades", # Text
-    "vaga_competencia_tecnicas_e_comportamentais", # Text
-    "app_prof_conhecimentos_tecnicos", # Text
-    "vaga_nivel profissional", # Categorical
-    "vaga_nivel_academico", # Categorical
-    "vaga_nivel_ingles", # Categorical
-    "vaga_nivel_espanhol", # Categorical
-    "vaga_local_trabalho", # Categorical
-    "vaga_vaga_especifica_para_pcd", # Categorical
-    "app_prof_nivel_profissional", # Categorical
-    "app_form_nivel_academico", # Categorical
-    "app_form_nivel_ingles", # Categorical
-    "app_form_nivel_espanhol" # Categorical
-]
-
-TEXT_FEATURES_FOR_PREDICTION = [
-    "cv_pt", 
-    "vaga_principais_atividades", 
-    "vaga_competencia_tecnicas_e_comportamentais", 
-    "app_prof_conhecimentos_tecnicos"
-]
-
-CATEGORICAL_FEATURES_FOR_PREDICTION = [
-    "vaga_nivel profissional", "vaga_nivel_academico", "vaga_nivel_ingles", "vaga_nivel_espanhol",
-    "vaga_local_trabalho", "vaga_vaga_especifica_para_pcd",
-    "app_prof_nivel_profissional", 
-    "app_form_nivel_academico", "app_form_nivel_ingles", "app_form_nivel_espanhol"
-]
-
-
-def create_prediction_route(app):
-    from ..main import applicants
+
+def parse_ranking_params(args):
+    """Ler os parâmetros da query string (ex.: /predict?k=10&min_probability=0.5&shortlist=500&recall=1).
+
+    cascade=N ativa a cascata (regressão logística em todos, floresta nos N melhores) e
+    as colunas app_* categóricas viram filtros (ver parse_filters).
+    """
+    try:
+        top_k = int(args.get("k", DEFAULT_TOP_K))
+        min_probability = args.get("min_probability")
+        min_probability = float(min_probability) if min_probability is not None else None
+        shortlist = int(args.get("shortlist", SHORTLIST_SIZE))
+        cascade = int(args.get("cascade", CASCADE_SIZE))
+    except ValueError:
+        raise ValueError("Parâmetros k, min_probability, shortlist e cascade devem ser numéricos.")
+    if top_k < 1:
+        raise ValueError("Parâmetro k deve ser maior que zero.")
+    if min_probability is not None and not 0 <= min_probability <= 1:
+        raise ValueError("Parâmetro min_probability deve estar entre 0 e 1.")
+    if shortlist < 0 or cascade < 0:
+        raise ValueError("Parâmetros shortlist e cascade não podem ser negativos.")
+    return {
+        "top_k": top_k,
+        "min_probability": min_probability,
+        "shortlist": shortlist,
+        "report_recall": args.get("recall", "0").lower() in ("1", "true"),
+        "cascade": cascade,
+        "filters": parse_filters(args, FILTER_COLUMNS)
+    }
+
+
+def debug_timing(headers):
+    """Header X-Debug-Timing: 1 devolve a duração de cada etapa no header Server-Timing."""
+    return headers.get("X-Debug-Timing", "0").lower() in ("1", "true")
+
+
+def cache_bypassed(headers):
+    """Header X-Cache-Bypass: 1 força o recálculo (o resultado novo substitui o do cache)."""
+    return headers.get("X-Cache-Bypass", "0").lower() in ("1", "true")
+
+
+def serving_snapshot():
+    """Modelo, base e versões atuais, lidos juntos (a requisição inteira usa a mesma versão).
+
+    Os derivados da base vêm da versão publicada (served_state); se o modelo ou a
+    base foram trocados direto nas globais, prepare_state os monta na primeira requisição.
+    """
+    with serving_lock:
+        state = ServingState(
+            model, applicants, MODEL_VERSION, DATA_VERSION, shard_scorer=shard_scorer, cascade_model=cascade_model,
+            ranking_table=ranking_table
+        )
+        current = served_state
+    if current is not None and current.model is state.model and current.applicants is state.applicants:
+        state.features, state.filters, state.applicant_ids = current.features, current.filters, current.applicant_ids
+        state.shared_arrays = current.shared_arrays
+        if current.cascade_model is state.cascade_model:
+            state.cascade_scores = current.cascade_scores
+    return state
+
+
+def new_shard_scorer(state, start_method="fork"):
+    """Pool de processos da versão. fork só na inicialização; com o servidor já atendendo, forkserver."""
+    if PREDICT_WORKERS <= 0 or not isinstance(state.features, ApplicantFeatures):
+        # Com segmentos delta a base é pontuada no próprio processo até o próximo reload
+        return None
+    scorer = ShardedScorer(
+        state.features, PREDICT_WORKERS, SHARD_ROWS, state.model if isinstance(state.model, ArtifactModel) else None,
+        start_method, shared=state.shared_arrays
+    )
+    print(f"Pontuação em {PREDICT_WORKERS} processos, shards de {SHARD_ROWS} candidatos")
+    return scorer
+
+
+def share_applicant_arrays(state):
+    """Mapear os arrays dos candidatos uma vez no master, antes do fork dos workers do gunicorn.
+
+    Cada worker abre só o próprio pool (after_fork) sobre os mesmos arquivos, sem
+    gravar outra cópia da base em /dev/shm.
+    """
+    if PREDICT_WORKERS <= 0 or not isinstance(state.features, ApplicantFeatures):
+        return None
+    return SharedArrays(state.features, state.model if isinstance(state.model, ArtifactModel) else None)
+
+
+def load_serving_state():
+    """Carregar modelo e base novos e pré-calcular as features (sem afetar a versão servida)."""
+    from ..inference.applicants import load_applicants
+
+    new_model, model_version = load_model()
+    if new_model is None:
+        raise ValueError(f"Modelo não carregado de {ARTIFACTS_PATH} nem de {MODEL_PATH}.")
+    new_applicants, data_version = load_applicants(PARQUET_PATH, new_model)
+    if new_applicants is None:
+        raise ValueError(f"Base de candidatos não carregada de {PARQUET_PATH}.")
+    state = prepare_state(ServingState(
+        new_model, new_applicants, model_version, data_version, cascade_model=load_cascade_model(),
+        ranking_table=load_rankings()
+    ))
+    state = with_deltas(state)
+    # Roda em segundo plano com as threads das requisições ativas: fork não é seguro aqui
+    state.shard_scorer = new_shard_scorer(state, "forkserver")
+    # A versão nova só entra no ar já aquecida
+    warm_up(state)
+    return state
+
+
+def get_delta_store():
+    global delta_store
+    if delta_store is None:
+        from ..inference.ingestion import DeltaStore
+        delta_store = DeltaStore(APPLICANT_DELTA_PATH, DELTA_MAX_SEGMENTS)
+    return delta_store
+
+
+def known_applicants(state, delta):
+    """Máscara (por linha de delta) dos candidatos que já estão na versão."""
+    from ..inference.ingestion import ApplicantIds
+
+    if state.applicant_ids is None:
+        # Uma vez por base: as versões com deltas herdam o conjunto e só acrescentam os IDs novos
+        state.applicant_ids = ApplicantIds.from_applicants(state.applicants)
+    return state.applicant_ids.known(delta_ids(delta))
+
+
+def delta_ids(delta):
+    return delta["ID_APPLICANT"].astype(str).tolist()
+
+
+def extend_state(state, delta):
+    """Versão servida com os candidatos de delta no fim da base.
+
+    Só as linhas novas são transformadas e a base não é copiada: candidatos,
+    features e índices da versão anterior viram o primeiro segmento da nova.
+    """
+    from ..inference.ingestion import ApplicantIds, SegmentedApplicants
+
+    prepare_state(state)
+    combined = SegmentedApplicants.extend(state.applicants, delta)
+    features = delta_features = state.features
+    if features is not None:
+        delta_features = ApplicantFeatures(features.pipeline, delta, TERM_INDEX)
+        features = SegmentedFeatures.extend(features, delta_features)
+    cascade_scores = None if state.cascade_scores is None else state.cascade_scores.extend(delta, delta_features)
+
+    # Versão dos dados: versão da base + número de candidatos acrescentados
+    base_version, _, delta_rows = (state.data_version or "").partition("+")
+    data_version = f"{base_version}+{int(delta_rows or 0) + len(delta)}"
+    ids = state.applicant_ids or ApplicantIds.from_applicants(state.applicants)
+    return state.replace(
+        applicants=combined, data_version=data_version, features=features, filters=state.filters.extend(delta),
+        cascade_scores=cascade_scores, applicant_ids=ids.extend(delta_ids(delta)), shard_scorer=None
+    )
+
+
+def with_deltas(state):
+    """Acrescentar à versão carregada os segmentos delta já gravados em disco."""
+    delta = get_delta_store().load()
+    if delta is None or state.applicants is None:
+        return state
+    # Candidatos já presentes na base (ex.: parquet regenerado com os deltas) ficam de fora
+    delta = delta[~known_applicants(state, delta)].reset_index(drop=True)
+    return extend_state(state, delta) if len(delta) else state
+
+
+def ingest_applicants(records):
+    """Gravar novos candidatos em um segmento delta e torná-los pontuáveis na hora.
+
+    Candidatos que já estão na base são ignorados. Retorna o resumo da ingestão.
+    """
+    from ..inference.ingestion import flatten_applicants
+
+    delta = flatten_applicants(records)
+    with ingest_lock:
+        state = serving_snapshot()
+        if state.model is None or state.applicants is None:
+            raise ValueError("Modelo ou base de candidatos não carregados.")
+        known = known_applicants(state, delta)
+        ignored = delta.loc[known, "ID_APPLICANT"].tolist()
+        delta = delta[~known].reset_index(drop=True)
+        if len(delta):
+            get_delta_store().append(delta)
+            state = extend_state(state, delta)
+            swap_serving_state(state)
+
+    if get_delta_store().needs_compaction():
+        start_compaction()
+    return {
+        "ingested": len(delta),
+        "ignored": ignored,
+        "total": len(state.applicants),
+        "data_version": state.data_version
+    }
+
+
+def compact_deltas():
+    """Juntar os segmentos delta em disco e na memória (não toca na base original)."""
+    with ingest_lock:
+        get_delta_store().compact()
+        state = serving_snapshot()
+        if isinstance(state.features, SegmentedFeatures):
+            filters = state.filters.compact() if isinstance(state.filters, SegmentedBitmapIndex) else state.filters
+            set_serving_state(state.replace(
+                features=state.features.compact(), applicants=state.applicants.compact(), filters=filters
+            ))
+    print("Segmentos delta de candidatos compactados")
+
+
+def start_compaction():
+    global compaction_thread
+    if compaction_thread is not None and compaction_thread.is_alive():
+        return
+    compaction_thread = threading.Thread(target=compact_deltas, name="delta-compaction", daemon=True)
+    compaction_thread.start()
+
+
+def set_serving_state(state):
+    """Publicar a versão (lida por serving_snapshot). Retorna o pool de processos da versão anterior."""
+    global model, applicants, MODEL_VERSION, DATA_VERSION, shard_scorer, cascade_model, ranking_table, served_state
+    with serving_lock:
+        previous_scorer = shard_scorer
+        model, applicants, cascade_model = state.model, state.applicants, state.cascade_model
+        ranking_table = state.ranking_table
+        MODEL_VERSION, DATA_VERSION = state.model_version, state.data_version
+        shard_scorer = state.shard_scorer
+        served_state = state
+    return previous_scorer
+
+
+def swap_serving_state(state):
+    """Trocar a versão servida de uma vez. Requisições em andamento terminam na versão antiga."""
+    previous_scorer = set_serving_state(state)
+    print(f"Versão servida: modelo {state.model_version}, dados {state.data_version}")
+    if previous_scorer is not None and previous_scorer is not state.shard_scorer:
+        # Dar tempo às requisições que ainda usam o pool antigo
+        threading.Timer(RELOAD_GRACE_SECONDS, previous_scorer.close).start()
+
+
+def serving_fingerprint():
+    """Versões dos arquivos observados: última exportação dos artefatos, joblib, parquet e tabela de rankings."""
+    return (
+        latest_version(ARTIFACTS_PATH), artifact_version(MODEL_PATH), artifact_version(PARQUET_PATH),
+        artifact_version(RANKING_TABLE_PATH)
+    )
+
+
+reloader = Reloader(load_serving_state, swap_serving_state, serving_fingerprint, RELOAD_INTERVAL, lock=ingest_lock)
+
+
+def warm_up(state=None):
+    """Pontuar uma vaga sintética (campos vazios) na versão servida, ou em state, com os parâmetros padrão.
+
+    Aquece modelo, features e pré-seleções antes da primeira requisição e marca a
+    API como pronta (/readyz). Retorna a duração em ms, ou None se não foi possível.
+    """
+    global ready, warm_up_ms
+    state = state or serving_snapshot()
+    if state.model is None or state.applicants is None:
+        print("Warm-up não executado: modelo ou base de candidatos não carregados.")
+        return None
+    start = time.perf_counter()
+    try:
+        rank_vagas([job_fields({})], state, **dict(parse_ranking_params({}), top_k=1))
+    except Exception as e:
+        print(f"Erro no warm-up da predição: {e}")
+        return None
+    warm_up_ms = (time.perf_counter() - start) * 1000
+    ready = True
+    print(f"Warm-up da predição em {warm_up_ms:.0f} ms ({len(state.applicants)} candidatos)")
+    return warm_up_ms
+
+
+def after_fork():
+    """Recriar em um worker do servidor as threads e o pool de processos, que não sobrevivem ao fork.
+
+    Modelo, base e features carregados no master continuam compartilhados com
+    ele (copy-on-write); só o que depende de threads é montado no worker.
+    """
+    reloader.after_fork()
+    state = serving_snapshot()
+    set_serving_state(state.replace(shard_scorer=new_shard_scorer(state)))
+    reloader.start_watch()
+
+
+def shutdown():
+    """Encerrar o pool de processos da versão servida (saída de um worker do servidor)."""
+    with serving_lock:
+        scorer = shard_scorer
+    if scorer is not None:
+        scorer.close()
+
+
+def create_prediction_route(app, loaded_applicants=None, loaded_data_version=None, prefork=False):
+    """Registrar as rotas de predição servindo a base loaded_applicants.
+
+    Sem base, serve a já carregada (ou lê PARQUET_PATH). Com prefork=True (master
+    do gunicorn com preload_app) o pool de processos e a observação dos arquivos
+    ficam para after_fork(), em cada worker.
+    """
+    global coalescer
+    if loaded_applicants is None:
+        if applicants is not None:
+            loaded_applicants, loaded_data_version = applicants, DATA_VERSION
+        else:
+            from ..inference.applicants import load_applicants
+            loaded_applicants, loaded_data_version = load_applicants(PARQUET_PATH, model)
+
+    # A partir daqui a base só muda pelo reload ou pela ingestão. Pré-calcular o bloco de features
+    # dos candidatos (e os bitmaps e as pontuações da cascata) na inicialização
+    state = prepare_state(ServingState(
+        model, loaded_applicants, MODEL_VERSION, loaded_data_version, cascade_model=cascade_model,
+        ranking_table=ranking_table
+    ))
+    state = with_deltas(state)
+    if shard_scorer is not None and shard_scorer.features is state.features:
+        state.shard_scorer = shard_scorer
+    else:
+        if shard_scorer is not None:
+            shard_scorer.close()
+        if prefork:
+            state.shard_scorer, state.shared_arrays = None, share_applicant_arrays(state)
+        else:
+            state.shard_scorer = new_shard_scorer(state)
+    set_serving_state(state)
+    if not prefork:
+        reloader.start_watch()
+    if coalescer is None:
+        coalescer = new_coalescer()
+
+    @app.before_request
+    def start_predict_timing():
+        # Duração total das rotas de predição; com o header de debug, também as etapas
+        if request.endpoint not in PREDICT_ENDPOINTS:
+            return
+        debug = debug_timing(request.headers)
+        if metrics.enabled or debug:
+            g.predict_start = time.perf_counter()
+        if debug:
+            metrics.start_trace()
+
+    @app.after_request
+    def finish_predict_timing(response):
+        start = g.pop("predict_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        metrics.observe_request(request.endpoint, response.status_code, elapsed)
+        if debug_timing(request.headers):
+            response.headers["Server-Timing"] = server_timing(metrics.end_trace() + [("total", elapsed)])
+        return response
 
     @app.route("/predict", methods=["POST"])
     def predict():
-        if model is None:
+        state = serving_snapshot()
+        if state.model is None:
             return jsonify({"error": "Modelo não carregado. Predição indisponível."}), 500
 
         try:
@@ -66,70 +785,92 @@ def create_prediction_route(app):
             if vaga_data is None:
                 return jsonify({"error": "Payload JSON inválido ou Content-Type incorreto. Use application/json."}), 400
 
-            # Verificar se todos os campos da vaga estão presentes
-            missing_fields = [feature for feature in EXPECTED_FEATURES if feature.startswith("vaga_") and feature not in vaga_data]
-            if missing_fields:
-                return jsonify({"error": f"Campos ausentes no payload da vaga: {missing_fields}"}), 400
+            with metrics.stage("validate"):
+                try:
+                    params = parse_ranking_params(request.args)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
 
-            # Aplicar pré-processamento nos campos da vaga
-            for col in TEXT_FEATURES_FOR_PREDICTION:
-                if col in vaga_data:
-                    vaga_data[col] = vaga_data.get(col, "")
-
-            for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
-                if col in vaga_data:
-                    vaga_data[col] = vaga_data.get(col, "Desconhecido")
-
-            # Lista para armazenar os registros combinados
-            input_data = []
-
-            # Iterar sobre cada linha de "applicants"
-            for _, applicant_row in applicants.iterrows():
-                # Combinar os dados da vaga com os dados do candidato
-                combined_record = vaga_data.copy()
+                missing_fields = validate_job_payload(vaga_data)
+                if missing_fields:
+                    return jsonify({"error": f"Campos ausentes no payload da vaga: {missing_fields}"}), 400
 
-                # Preencher os dados do candidato
-                for feature in applicants.columns:
-                    if feature in EXPECTED_FEATURES:
-                        combined_record[feature] = applicant_row[feature]
+            # Pegar os k maiores matches por probabilidade de Target = 1
+            with metrics.stage("rank"):
+                results, info, statuses = table_rank_vagas(
+                    [vaga_data], state, cache_bypassed(request.headers), **params
+                )
 
-                # Adicionar ao conjunto de entrada
-                input_data.append(combined_record)
+            return ranking_response(results[0], info, state, statuses)
 
-            # Criar DataFrame de entrada
-            input_df = pd.DataFrame(input_data, columns=EXPECTED_FEATURES)
+        except Exception as e:
+            print(f"Erro durante a predição: {e}")
+            import traceback
+            traceback.print_exc()
+            return jsonify({"error": f"Erro interno do servidor durante a predição: {str(e)}"}), 500
 
-            for col in TEXT_FEATURES_FOR_PREDICTION:
-                input_df[col] = input_df[col].fillna("")
+    @app.route("/predict/batch", methods=["POST"])
+    def predict_batch():
+        state = serving_snapshot()
+        if state.model is None:
+            return jsonify({"error": "Modelo não carregado. Predição indisponível."}), 500
 
-            for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
-                input_df[col] = input_df[col].fillna("Desconhecido").astype(str)
+        try:
+            # Receber a lista de vagas
+            vagas = request.get_json(silent=True)
+            if not isinstance(vagas, list) or not all(isinstance(vaga, dict) for vaga in vagas):
+                return jsonify({"error": "Payload JSON inválido. Envie uma lista de vagas em application/json."}), 400
 
-            # Realizar a predição
-            predictions = model.predict(input_df)
-            probabilities = model.predict_proba(input_df)
+            with metrics.stage("validate"):
+                try:
+                    params = parse_ranking_params(request.args)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
 
-            # Formatar a resposta
-            results = []
-            for i, (pred, proba) in enumerate(zip(predictions, probabilities)):
-                results.append({
-                    "index": i,
-                    "applicant_index": applicants.loc[i,'ID_APPLICANT'],  # Posição do candidato no DataFrame
-                    "prediction": int(pred),
-                    "probability_no_match": float(proba[0]),
-                    "probability_match": float(proba[1])
-                })
+                errors = []
+                for i, vaga_data in enumerate(vagas):
+                    missing_fields = validate_job_payload(vaga_data)
+                    if missing_fields:
+                        errors.append(f"Vaga {i}: campos ausentes no payload da vaga: {missing_fields}")
+                if errors:
+                    return jsonify({"error": errors}), 400
 
-            # Pegar os 5 maiores matches por probabilidade de Target = 1
-            top_5_matches = sorted(results, key=lambda x: x["probability_match"], reverse=True)[:5]
+            with metrics.stage("rank"):
+                rankings, info, statuses = table_rank_vagas(vagas, state, cache_bypassed(request.headers), **params)
+            results = [{"job_index": i, "matches": matches} for i, matches in enumerate(rankings)]
 
-            return jsonify(top_5_matches), 200
+            return ranking_response(results, info, state, statuses)
 
         except Exception as e:
-            print(f"Erro durante a predição: {e}")
+            print(f"Erro durante a predição em lote: {e}")
             import traceback
             traceback.print_exc()
             return jsonify({"error": f"Erro interno do servidor durante a predição: {str(e)}"}), 500
 
-    return app
+    @app.route("/predict/jobs/<job_id>", methods=["GET"])
+    def predict_known_job(job_id):
+        # Ranking de uma vaga do catálogo direto da tabela pré-calculada
+        state = serving_snapshot()
+        try:
+            params = parse_ranking_params(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if params["filters"]:
+            return jsonify({"error": "Filtros não são aplicados à tabela de rankings. Use POST /predict."}), 400
+        table = state.ranking_table
+        if table is None or not table.usable(state.model_version, state.data_version) or params["top_k"] > table.top_k:
+            return jsonify({"error": "Tabela de rankings indisponível ou desatualizada. Use POST /predict."}), 404
+        matches = table.matches(job_id, top_k=params["top_k"], min_probability=params["min_probability"])
+        if matches is None:
+            return jsonify({"error": f"Vaga {job_id} não encontrada na tabela de rankings."}), 404
+        return ranking_response(matches, {}, state, ["TABLE"])
 
+    @app.route("/predict/cache", methods=["GET"])
+    def predict_cache_stats():
+        # Contadores de acertos/falhas do cache de resultados (e dos lotes do micro-batching)
+        stats = result_cache.stats()
+        if coalescer is not None:
+            stats["coalescer"] = coalescer.stats()
+        return jsonify(stats), 200
+
+    return app
@@ -1,17 +1,34 @@
 import unittest
 import json
+import time
 import os
+import shutil
+import tempfile
 import sys
 import pandas as pd
 import numpy as np
 from unittest.mock import patch, MagicMock, mock_open
 from flask import Flask
 import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Importar os módulos necessários da aplicação
-from src.routes.prediction import create_prediction_route
+from src.routes.prediction import (
+    create_prediction_route, build_input_frame, EXPECTED_FEATURES,
+    TEXT_FEATURES_FOR_PREDICTION, CATEGORICAL_FEATURES_FOR_PREDICTION
+)
+from src.inference.applicants import load_parquet, load_applicants, APPLICANT_COLUMNS
+from src.inference.features import ApplicantFeatures, FeatureCache, SplitPipeline, fill_categorical
+from src.inference.ranking import top_k_indices
+from src.inference.batch import rank_jobs
+from src.inference.forest import ForestEngine
+from src.inference.retrieval import rank_shortlisted
+from src.inference.result_cache import ResultCache
+from src.inference.artifacts import export_artifacts, latest_version, load_artifacts
+from src.routes.admin import create_admin_route
 
 
 class TestPredictionAPI(unittest.TestCase):
@@ -136,16 +153,11 @@ class TestPredictionAPI(unittest.TestCase):
             self.assertIn('Campos ausentes', data['error'])
 
     @patch('src.routes.prediction.model')
-    @patch('src.main.applicants')
-    def test_empty_applicants_dataframe(self, mock_applicants, mock_model):
+    def test_empty_applicants_dataframe(self, mock_model):
         """Teste para DataFrame de candidatos vazio."""
-        # Configurar mock para DataFrame vazio
-        empty_df = pd.DataFrame()
-        mock_applicants.iterrows.return_value = empty_df.iterrows()
-        mock_applicants.columns = empty_df.columns
 
         # Registrar a rota de predição
-        self.app = create_prediction_route(self.app)
+        self.app = create_prediction_route(self.app, pd.DataFrame())
 
         # Fazer a requisição
         with self.app.test_client() as client:
@@ -162,19 +174,15 @@ class TestPredictionAPI(unittest.TestCase):
             # Pode verificar outras propriedades da resposta conforme necessário
 
     @patch('src.routes.prediction.model')
-    @patch('src.main.applicants')
-    def test_model_prediction_error(self, mock_applicants, mock_model):
-        """Teste para erro durante a predição do modelo."""
-        # Configurar mocks
-        mock_applicants.iterrows.return_value = self.mock_applicants.iterrows()
-        mock_applicants.columns = self.mock_applicants.columns
-        mock_applicants.loc = self.mock_applicants.loc
-
-        # Simular erro na predição
+    def test_model_prediction_single_pass(self, mock_model):
+        """Teste para a predição em uma única passada de predict_proba."""
+        # predict não deve mais ser chamado: o rótulo vem das probabilidades
         mock_model.predict.side_effect = Exception("Erro na predição")
+        mock_model.predict_proba.return_value = self.mock_model.predict_proba.return_value
+        mock_model.classes_ = np.array([0, 1])
 
         # Registrar a rota de predição
-        self.app = create_prediction_route(self.app)
+        self.app = create_prediction_route(self.app, self.mock_applicants)
 
         # Fazer a requisição
         with self.app.test_client() as client:
@@ -185,26 +193,46 @@ class TestPredictionAPI(unittest.TestCase):
             )
 
             # Verificar resposta
-            self.assertEqual(response.status_code, 500)
+            self.assertEqual(response.status_code, 200)
             data = json.loads(response.data)
-            self.assertIn('error', data)
-            self.assertIn('Erro interno do servidor', data['error'])
+            self.assertEqual([match['applicant_index'] for match in data], [2, 3, 1])
+            self.assertEqual([match['prediction'] for match in data], [1, 0, 0])
+            mock_model.predict.assert_not_called()
+            self.assertEqual(mock_model.predict_proba.call_count, 1)
 
     @patch('src.routes.prediction.model')
-    @patch('src.main.applicants')
-    def test_model_predict_proba_error(self, mock_applicants, mock_model):
-        """Teste para erro durante o cálculo de probabilidades."""
-        # Configurar mocks
-        mock_applicants.iterrows.return_value = self.mock_applicants.iterrows()
-        mock_applicants.columns = self.mock_applicants.columns
-        mock_applicants.loc = self.mock_applicants.loc
+    def test_top_k_and_min_probability_params(self, mock_model):
+        """Teste para os parâmetros k e min_probability da query string."""
+        mock_model.predict_proba.return_value = self.mock_model.predict_proba.return_value
+        mock_model.classes_ = np.array([0, 1])
+
+        # Índice do parquet que não é um RangeIndex limpo
+        applicants = self.mock_applicants.set_index(pd.Index([10, 0, 5]))
+        self.app = create_prediction_route(self.app, applicants)
 
+        with self.app.test_client() as client:
+            response = client.post('/predict?k=2', json=self.valid_job_data)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertEqual([match['applicant_index'] for match in data], [2, 3])
+            self.assertEqual([match['index'] for match in data], [1, 2])
+
+            response = client.post('/predict?min_probability=0.5', json=self.valid_job_data)
+            self.assertEqual([match['applicant_index'] for match in json.loads(response.data)], [2])
+
+            for query in ['k=0', 'k=abc', 'min_probability=2']:
+                response = client.post(f'/predict?{query}', json=self.valid_job_data)
+                self.assertEqual(response.status_code, 400)
+
+    @patch('src.routes.prediction.model')
+    def test_model_predict_proba_error(self, mock_model):
+        """Teste para erro durante o cálculo de probabilidades."""
         # Simular sucesso na predição mas erro no predict_proba
         mock_model.predict.return_value = np.array([0, 1, 0])
         mock_model.predict_proba.side_effect = Exception("Erro no cálculo de probabilidades")
 
         # Registrar a rota de predição
-        self.app = create_prediction_route(self.app)
+        self.app = create_prediction_route(self.app, self.mock_applicants)
 
         # Fazer a requisição
         with self.app.test_client() as client:
@@ -240,20 +268,14 @@ class TestPredictionAPI(unittest.TestCase):
             self.assertIn('Payload JSON inválido', data['error'])
 
     @patch('src.routes.prediction.model')
-    @patch('src.main.applicants')
-    def test_invalid_feature_types(self, mock_applicants, mock_model):
+    def test_invalid_feature_types(self, mock_model):
         """Teste para tipos de dados inválidos nos campos."""
-        # Configurar mocks
-        mock_applicants.iterrows.return_value = self.mock_applicants.iterrows()
-        mock_applicants.columns = self.mock_applicants.columns
-        mock_applicants.loc = self.mock_applicants.loc
-
         # Dados com tipos inválidos
         invalid_type_data = self.valid_job_data.copy()
         invalid_type_data['vaga_nivel profissional'] = 123  # Deveria ser string
 
         # Registrar a rota de predição
-        self.app = create_prediction_route(self.app)
+        self.app = create_prediction_route(self.app, self.mock_applicants)
 
         # Fazer a requisição
         with self.app.test_client() as client:
@@ -283,5 +305,1327 @@ class TestPredictionAPI(unittest.TestCase):
         self.assertIsNone(model)
 
 
+class TestInputFrame(unittest.TestCase):
+    """Testes para a montagem vetorizada do DataFrame de entrada."""
+
+    def setUp(self):
+        self.applicants = pd.DataFrame({
+            'ID_APPLICANT': [10, 20, 30],
+            'cv_pt': ['Experiência em Python', None, 'Desenvolvedor Full Stack'],
+            'app_prof_conhecimentos_tecnicos': ['Python, Flask', 'Java, Spring', np.nan],
+            'app_prof_nivel_profissional': ['Pleno', None, 'Júnior'],
+            'app_form_nivel_academico': ['Superior Completo', 'Pós-graduação', 'Superior Incompleto'],
+            'app_form_nivel_ingles': ['Avançado', 'Intermediário', 'Básico'],
+            'app_form_nivel_espanhol': ['Básico', 'Fluente', 'Não possui']
+        }, index=[7, 3, 5])
+        self.vaga_data = {
+            'vaga_principais_atividades': 'Desenvolvimento de APIs REST',
+            'vaga_competencia_tecnicas_e_comportamentais': 'Python, Flask, API REST',
+            'vaga_nivel profissional': 'Pleno',
+            'vaga_nivel_academico': 'Superior Completo',
+            'vaga_nivel_ingles': 'Intermediário',
+            'vaga_nivel_espanhol': None,
+            'vaga_local_trabalho': 2000,
+            'vaga_vaga_especifica_para_pcd': 'Não',
+            'campo_extra': 'ignorado'
+        }
+
+    def legacy_input_frame(self, vaga_data, applicants):
+        """Implementação original (iterrows) usada como referência."""
+        input_data = []
+        for _, applicant_row in applicants.iterrows():
+            combined_record = vaga_data.copy()
+            for feature in applicants.columns:
+                if feature in EXPECTED_FEATURES:
+                    combined_record[feature] = applicant_row[feature]
+            input_data.append(combined_record)
+        return pd.DataFrame(input_data, columns=EXPECTED_FEATURES)
+
+    def normalize(self, input_df):
+        input_df = input_df.copy()
+        for col in TEXT_FEATURES_FOR_PREDICTION:
+            input_df[col] = input_df[col].fillna("")
+        for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
+            input_df[col] = input_df[col].fillna("Desconhecido").astype(str)
+        return input_df
+
+    def test_matches_legacy_iterrows(self):
+        """O DataFrame vetorizado deve ser idêntico ao montado com iterrows."""
+        expected = self.normalize(self.legacy_input_frame(self.vaga_data, self.applicants))
+        result = self.normalize(build_input_frame(self.vaga_data, self.applicants))
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_missing_applicant_column_uses_job_value(self):
+        """Colunas ausentes no parquet usam o valor do payload (ou NaN)."""
+        applicants = self.applicants.drop(columns=['cv_pt'])
+        expected = self.normalize(self.legacy_input_frame(self.vaga_data, applicants))
+        result = self.normalize(build_input_frame(self.vaga_data, applicants))
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+        self.assertEqual(list(result.columns), EXPECTED_FEATURES)
+
+
+class RealModelTestCase(unittest.TestCase):
+    """Base para testes que usam o model_rf.joblib real com uma base pequena."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = joblib.load("./src/modeltraining/model_rf.joblib")
+
+    def setUp(self):
+        self.applicants = pd.DataFrame({
+            'ID_APPLICANT': [1, 2, 3, 4],
+            'cv_pt': ['Experiência em Python e SQL', None, 'Desenvolvedor Full Stack', 'Analista SAP financeiro'],
+            'app_prof_conhecimentos_tecnicos': ['Python, Flask, Django', 'Java, Spring', 'JavaScript, React', None],
+            'app_prof_nivel_profissional': ['Pleno', 'Sênior', None, 'Nível inexistente'],
+            'app_form_nivel_academico': ['Ensino Superior Completo', 'Pós Graduação Completo', '', None],
+            'app_form_nivel_ingles': ['Avançado', 'Intermediário', 'Básico', 'Fluente'],
+            'app_form_nivel_espanhol': ['Básico', 'Fluente', 'Nenhum', None]
+        })
+        self.vaga_data = {
+            'vaga_principais_atividades': 'Desenvolvimento de APIs REST em Python',
+            'vaga_competencia_tecnicas_e_comportamentais': 'Python, Flask, SQL, trabalho em equipe',
+            'vaga_nivel profissional': 'Pleno',
+            'vaga_nivel_academico': 'Ensino Superior Completo',
+            'vaga_nivel_ingles': 'Intermediário',
+            'vaga_nivel_espanhol': 'Nenhum',
+            'vaga_local_trabalho': '2000',
+            'vaga_vaga_especifica_para_pcd': 'Não'
+        }
+
+    def reference_input(self):
+        input_df = build_input_frame(self.vaga_data, self.applicants)
+        for col in TEXT_FEATURES_FOR_PREDICTION:
+            input_df[col] = input_df[col].fillna("")
+        for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
+            input_df[col] = input_df[col].fillna("Desconhecido").astype(str)
+        return input_df
+
+
+class TestApplicantFeatureCache(RealModelTestCase):
+    """Testes para o bloco de features dos candidatos pré-calculado."""
+
+    def test_matrix_matches_column_transformer(self):
+        """A matriz montada deve ser idêntica à saída do ColumnTransformer."""
+        features = ApplicantFeatures(SplitPipeline(self.model), self.applicants)
+        expected = self.model.named_steps['preprocessor'].transform(self.reference_input())
+        result = features.build_matrix(self.vaga_data)
+        self.assertEqual(result.shape, expected.shape)
+        self.assertEqual(abs(result - expected).max(), 0)
+
+    def test_probabilities_bit_identical(self):
+        """As probabilidades devem ser idênticas às do pipeline completo."""
+        features = ApplicantFeatures(SplitPipeline(self.model), self.applicants)
+        expected = self.model.predict_proba(self.reference_input())
+        result = features.pipeline.classifier.predict_proba(features.build_matrix(self.vaga_data))
+        np.testing.assert_array_equal(result, expected)
+
+    def test_cache_reused_until_inputs_change(self):
+        """O bloco só é recalculado quando o modelo ou a base mudam."""
+        cache = FeatureCache()
+        first = cache.get(self.model, self.applicants)
+        self.assertIs(cache.get(self.model, self.applicants), first)
+        self.assertIsNot(cache.get(self.model, self.applicants.copy()), first)
+
+    def test_unsupported_model_returns_none(self):
+        """Modelos fora do formato Pipeline(ColumnTransformer, ...) usam o caminho completo."""
+        self.assertIsNone(FeatureCache().get(MagicMock(), self.applicants))
+
+
+class TestTopK(unittest.TestCase):
+    """Testes para a seleção dos k melhores candidatos."""
+
+    def test_matches_stable_sort(self):
+        """Deve coincidir com o sorted() estável, inclusive em empates."""
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 20, size=500) / 20
+        for k in [1, 5, 37, 500, 1000]:
+            expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+            self.assertEqual(list(top_k_indices(scores, k)), expected)
+
+    def test_min_probability(self):
+        """Candidatos abaixo do limiar são descartados."""
+        scores = np.array([0.2, 0.9, 0.5, 0.7])
+        self.assertEqual(list(top_k_indices(scores, 5, min_probability=0.5)), [1, 3, 2])
+        self.assertEqual(list(top_k_indices(scores, 5, min_probability=0.95)), [])
+
+
+class TestBatchPrediction(unittest.TestCase):
+    """Testes para o endpoint /predict/batch e o ranqueamento em blocos."""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        rng = np.random.default_rng(0)
+        words = ['python', 'java', 'sql', 'dados', 'sap', 'gestão', 'projetos', 'cloud', 'redes', 'vendas']
+        self.applicants = pd.DataFrame({
+            'ID_APPLICANT': [f'A{i}' for i in range(40)],
+            'cv_pt': [' '.join(rng.choice(words, 12)) for _ in range(40)],
+            'app_prof_conhecimentos_tecnicos': [' '.join(rng.choice(words, 4)) for _ in range(40)],
+            'app_prof_nivel_profissional': rng.choice(['Pleno', 'Sênior', 'Analista'], 40),
+            'app_form_nivel_academico': rng.choice(['Ensino Superior Completo', 'Pós Graduação Completo'], 40),
+            'app_form_nivel_ingles': rng.choice(['Básico', 'Intermediário', 'Avançado'], 40),
+            'app_form_nivel_espanhol': rng.choice(['Nenhum', 'Básico'], 40)
+        })
+        self.vagas = [
+            {
+                'vaga_principais_atividades': ' '.join(rng.choice(words, 10)),
+                'vaga_competencia_tecnicas_e_comportamentais': ' '.join(rng.choice(words, 6)),
+                'vaga_nivel profissional': nivel,
+                'vaga_nivel_academico': 'Ensino Superior Completo',
+                'vaga_nivel_ingles': 'Intermediário',
+                'vaga_nivel_espanhol': 'Nenhum',
+                'vaga_local_trabalho': '2000',
+                'vaga_vaga_especifica_para_pcd': 'Não'
+            }
+            for nivel in ['Pleno', 'Sênior', 'Analista']
+        ]
+        # Usar o modelo real mesmo se outro teste tiver recarregado o módulo
+        model_patcher = patch('src.routes.prediction.model', joblib.load("./src/modeltraining/model_rf.joblib"))
+        model_patcher.start()
+        self.addCleanup(model_patcher.stop)
+
+        self.app = create_prediction_route(self.app, self.applicants)
+
+    def test_batch_matches_single_predictions(self):
+        """Cada vaga do lote deve ter o mesmo top-k do /predict individual."""
+        with self.app.test_client() as client:
+            expected = [client.post('/predict?k=4', json=vaga).get_json() for vaga in self.vagas]
+            with patch('src.routes.prediction.CHUNK_ROWS', 7):
+                response = client.post('/predict/batch?k=4', json=self.vagas, headers={'X-Cache-Bypass': '1'})
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual([item['job_index'] for item in data], [0, 1, 2])
+            self.assertEqual([item['matches'] for item in data], expected)
+
+    def test_shortlist_param_and_recall_header(self):
+        """O parâmetro shortlist limita a pré-seleção e recall=1 informa o recall no header."""
+        with self.app.test_client() as client:
+            expected = client.post('/predict?k=3', json=self.vagas[0]).get_json()
+            response = client.post('/predict?k=3&shortlist=1000&recall=1', json=self.vagas[0])
+            self.assertEqual(response.get_json(), expected)
+            self.assertEqual(response.headers['X-Shortlist-Recall'], '1.0000')
+
+            response = client.post('/predict?k=3&shortlist=5', json=self.vagas[0])
+            self.assertEqual(response.headers['X-Shortlist-Size'], '5')
+            self.assertEqual(len(response.get_json()), 3)
+
+            response = client.post('/predict?shortlist=-1', json=self.vagas[0])
+            self.assertEqual(response.status_code, 400)
+
+    def test_cascade_param(self):
+        """cascade=N: a floresta ordena só os N melhores da regressão logística."""
+        frame = pd.concat([build_input_frame(vaga, self.applicants) for vaga in self.vagas], ignore_index=True)
+        for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
+            frame[col] = fill_categorical(frame[col])
+        forest = joblib.load("./src/modeltraining/model_rf.joblib")
+        linear = linear_cascade_model(forest, frame, np.arange(len(frame)) % 2)
+        with self.app.test_client() as client, patch('src.routes.prediction.cascade_model', linear):
+            expected = client.post('/predict?k=3', json=self.vagas[0]).get_json()
+            response = client.post('/predict?k=3&cascade=40&recall=1', json=self.vagas[0])
+            self.assertEqual(response.get_json(), expected)
+            self.assertEqual(response.headers['X-Shortlist-Recall'], '1.0000')
+
+            response = client.post('/predict?k=3&cascade=5', json=self.vagas[0])
+            self.assertEqual(response.headers['X-Shortlist-Size'], '5')
+            self.assertEqual(len(response.get_json()), 3)
+            self.assertEqual(client.post('/predict?cascade=-1', json=self.vagas[0]).status_code, 400)
+
+    def test_precomputed_ranking_table(self):
+        """Vagas do catálogo saem da tabela (com atualização incremental); vagas alteradas são pontuadas na hora."""
+        from src.routes import prediction
+        from src.inference.ranking_table import load_ranking_table, table_metadata, update_rankings, write_ranking_table
+        features = prediction.feature_cache.get(prediction.model, prediction.applicants)
+        ranker = lambda f: lambda blocks: rank_jobs(
+            lambda jobs, rows: f.predict_proba([blocks[j] for j in jobs], rows), len(blocks), f.n_rows, 4
+        )
+        catalogue = {
+            f'V{i}': (prediction.canonical_key(prediction.job_fields(vaga)), vaga) for i, vaga in enumerate(self.vagas)
+        }
+        ids = self.applicants['ID_APPLICANT'].to_numpy()
+        expected, _ = update_rankings(None, catalogue, features, ids, 4, ranker(features), prediction.MODEL_VERSION)
+
+        # Tabela calculada com 30 candidatos e atualizada só com os 10 novos
+        path = os.path.join(tempfile.mkdtemp(), 'rankings.parquet')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        partial = features.__class__.from_blocks(features.pipeline, [None if b is None else b[:30] for b in features.blocks])
+        jobs, _ = update_rankings(None, catalogue, partial, ids[:30], 4, ranker(partial), prediction.MODEL_VERSION)
+        write_ranking_table(path, jobs, table_metadata(4, ids[:30], [0, 1], prediction.MODEL_VERSION, 'd0'))
+        jobs, summary = update_rankings(load_ranking_table(path), catalogue, features, ids, 4, None, prediction.MODEL_VERSION)
+        self.assertEqual(summary, {'full': 0, 'incremental': 3, 'reused': 0})
+        for job_id in catalogue:
+            np.testing.assert_array_equal(jobs[job_id][1], expected[job_id][1])
+        write_ranking_table(path, jobs, table_metadata(4, ids, [0, 1], prediction.MODEL_VERSION, prediction.DATA_VERSION))
+
+        with self.app.test_client() as client, patch('src.routes.prediction.ranking_table', load_ranking_table(path)):
+            live = client.post('/predict?k=3', json=self.vagas[1]).get_json()
+            response = client.post('/predict?k=3', json=dict(self.vagas[1], ID_VAGA='V1'))
+            self.assertEqual(response.headers['X-Cache'], 'TABLE')
+            self.assertEqual(response.get_json(), live)
+            self.assertEqual(client.get('/predict/jobs/V1?k=3').get_json(), live)
+            self.assertEqual(client.get('/predict/jobs/V9').status_code, 404)
+
+            changed = dict(self.vagas[1], ID_VAGA='V1', **{'vaga_nivel profissional': 'Pleno'})
+            self.assertNotEqual(client.post('/predict?k=3', json=changed).headers.get('X-Cache'), 'TABLE')
+
+    def test_categorical_filters(self):
+        """Filtros app_* restringem os candidatos pontuados e o resultado é o top-k exaustivo filtrado."""
+        query = 'app_form_nivel_ingles_min=Intermediário&app_prof_nivel_profissional=Pleno,Sênior'
+        allowed = set(self.applicants.index[
+            self.applicants['app_form_nivel_ingles'].isin(['Intermediário', 'Avançado'])
+            & self.applicants['app_prof_nivel_profissional'].isin(['Pleno', 'Sênior'])
+        ])
+        with self.app.test_client() as client:
+            everyone = client.post('/predict?k=40', json=self.vagas[0]).get_json()
+            expected = [match for match in everyone if match['index'] in allowed][:3]
+            response = client.post(f'/predict?k=3&{query}', json=self.vagas[0])
+            self.assertEqual(response.get_json(), expected)
+
+            response = client.post(f'/predict?k=3&shortlist=1000&recall=1&{query}', json=self.vagas[0])
+            self.assertEqual(response.get_json(), expected)
+            self.assertEqual(response.headers['X-Shortlist-Recall'], '1.0000')
+            self.assertEqual(client.post('/predict?app_form_nivel_ingles_min=Nativo', json=self.vagas[0]).status_code, 400)
+
+    def test_coalesced_requests_match_direct_scoring(self):
+        """Com o micro-batching ativo, cada requisição concorrente recebe o mesmo top-k de quando é pontuada sozinha."""
+        import threading
+        from src.routes import prediction
+        with self.app.test_client() as client:
+            expected = [client.post('/predict?k=3', json=vaga).get_json() for vaga in self.vagas]
+
+        coalescer = prediction.Coalescer(
+            lambda vagas, state, **params: prediction.rank_vagas(vagas, state, **params),
+            window_ms=50, key=prediction.coalescing_key
+        )
+        responses = [None] * len(self.vagas)
+
+        def call(i):
+            with self.app.test_client() as client:
+                responses[i] = client.post('/predict?k=3', json=self.vagas[i], headers={'X-Cache-Bypass': '1'}).get_json()
+
+        with patch('src.routes.prediction.coalescer', coalescer):
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(len(self.vagas))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(responses, expected)
+        self.assertEqual(coalescer.stats()['requests'], len(self.vagas))
+
+    def test_batch_validation(self):
+        """Payload que não é lista ou vaga sem campos obrigatórios retornam 400."""
+        invalid = dict(self.vagas[1])
+        del invalid['vaga_nivel_ingles']
+        with self.app.test_client() as client:
+            response = client.post('/predict/batch', json=self.vagas[0])
+            self.assertEqual(response.status_code, 400)
+            response = client.post('/predict/batch', json=[self.vagas[0], invalid])
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Vaga 1', response.get_json()['error'][0])
+
+    def test_result_cache_hits_and_bypass(self):
+        """A mesma vaga (em qualquer ordem de campos) é servida do cache; X-Cache-Bypass recalcula."""
+        vaga = self.vagas[0]
+        with patch('src.routes.prediction.result_cache', ResultCache()):
+            with self.app.test_client() as client:
+                first = client.post('/predict?k=3', json=vaga)
+                self.assertEqual(first.headers['X-Cache'], 'MISS')
+
+                with patch('src.routes.prediction.rank_vagas') as mock_rank:
+                    second = client.post('/predict?k=3', json=dict(reversed(list(vaga.items()))))
+                    mock_rank.assert_not_called()
+                self.assertEqual(second.headers['X-Cache'], 'HIT')
+                self.assertEqual(second.get_json(), first.get_json())
+
+                # Parâmetros diferentes não reaproveitam o resultado
+                self.assertEqual(client.post('/predict?k=2', json=vaga).headers['X-Cache'], 'MISS')
+                response = client.post('/predict/batch?k=3', json=self.vagas[:2])
+                self.assertEqual(response.headers['X-Cache'], 'HIT,MISS')
+                response = client.post('/predict?k=3', json=vaga, headers={'X-Cache-Bypass': '1'})
+                self.assertEqual(response.headers['X-Cache'], 'BYPASS')
+                self.assertEqual(response.get_json(), first.get_json())
+
+                stats = client.get('/predict/cache').get_json()
+                self.assertEqual((stats['hits'], stats['misses']), (2, 3))
+
+    def test_sharded_scoring_matches_single_process(self):
+        """Com PREDICT_WORKERS os shards rodam em outros processos e o top-k não muda."""
+        with self.app.test_client() as client:
+            expected = client.post('/predict/batch?k=4', json=self.vagas).get_json()
+
+        app = Flask(__name__)
+        with patch('src.routes.prediction.PREDICT_WORKERS', 2), patch('src.routes.prediction.SHARD_ROWS', 9), \
+                patch('src.routes.prediction.shard_scorer', None):
+            app = create_prediction_route(app, self.applicants)
+            import src.routes.prediction as prediction
+            self.addCleanup(prediction.shard_scorer.close)
+            self.assertEqual(prediction.shard_scorer.pool._max_workers, 2)
+            with app.test_client() as client:
+                response = client.post('/predict/batch?k=4', json=self.vagas, headers={'X-Cache-Bypass': '1'})
+            self.assertEqual(response.get_json(), expected)
+
+            # Pool criado com o servidor já atendendo (reload em segundo plano): forkserver em vez de fork
+            from src.inference.sharding import ShardedScorer
+            scorer = ShardedScorer(prediction.shard_scorer.features, 2, 9, start_method='forkserver')
+            self.addCleanup(scorer.close)
+            job_blocks = scorer.features.pipeline.transform_jobs(self.vagas)
+            for forked, served in zip(scorer.rank(job_blocks, 4), prediction.shard_scorer.rank(job_blocks, 4)):
+                np.testing.assert_array_equal(forked.positions, served.positions)
+
+    def test_prefork_workers_share_master_arrays(self):
+        """Sob preload, os arrays vão para /dev/shm uma vez no master; os workers só abrem o pool e não os apagam."""
+        import glob
+        import src.routes.prediction as prediction
+        from src.inference.batch import rank_jobs
+        with patch('src.routes.prediction.PREDICT_WORKERS', 2), patch('src.routes.prediction.SHARD_ROWS', 9), \
+                patch('src.routes.prediction.shard_scorer', None), \
+                patch('src.routes.prediction.feature_cache', prediction.FeatureCache()):
+            create_prediction_route(Flask(__name__), self.applicants, prefork=True)
+            shared = prediction.serving_snapshot().shared_arrays
+            self.addCleanup(shared.close)
+            self.assertIsNone(prediction.shard_scorer)
+            pattern = os.path.join(os.path.dirname(shared.path), 'predict-shards-*')
+            directories = sorted(glob.glob(pattern))
+
+            pid = os.fork()
+            if pid == 0:
+                # Worker: abre o pool sobre os arquivos do master, pontua e sai (close/atexit não apagam nada)
+                status = 1
+                try:
+                    scorer = prediction.new_shard_scorer(prediction.serving_snapshot())
+                    job_blocks = scorer.features.pipeline.transform_jobs(self.vagas)
+                    features = scorer.features
+                    expected = rank_jobs(
+                        lambda jobs, rows: features.predict_proba([job_blocks[j] for j in jobs], rows),
+                        len(job_blocks), features.n_rows, 4
+                    )
+                    same_rankings = all(
+                        np.array_equal(a.positions, b.positions) for a, b in zip(scorer.rank(job_blocks, 4), expected)
+                    )
+                    same_directories = sorted(glob.glob(pattern)) == directories
+                    scorer.close()
+                    shared.close()
+                    status = 0 if same_directories and same_rankings else 2
+                finally:
+                    os._exit(status)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            self.assertTrue(os.path.isdir(shared.path))
+
+
+        shared.close()
+        self.assertFalse(os.path.isdir(shared.path))
+
+    def test_reload_swaps_model_and_data_versions(self):
+        """POST /admin/reload troca modelo e base de uma vez; requisições já iniciadas ficam na versão antiga."""
+        import src.routes.prediction as prediction
+        create_admin_route(self.app)
+        reloaded = self.applicants.iloc[::-1].reset_index(drop=True)
+        restore = patch.multiple(prediction, applicants=prediction.applicants, MODEL_VERSION='m1', DATA_VERSION='d1')
+        restore.start()
+        self.addCleanup(restore.stop)
+
+        with self.app.test_client() as client:
+            response = client.post('/predict?k=3', json=self.vagas[0])
+            self.assertEqual((response.headers['X-Model-Version'], response.headers['X-Data-Version']), ('m1', 'd1'))
+            before = prediction.serving_snapshot()
+
+            with patch('src.routes.prediction.load_model', return_value=(prediction.model, 'm2')), \
+                    patch('src.inference.applicants.load_applicants', return_value=(reloaded, 'd2')), \
+                    patch('src.routes.admin.ADMIN_TOKEN', 's3cr3t'):
+                self.assertEqual(client.post('/admin/reload').status_code, 401)
+                response = client.post('/admin/reload?wait=1', headers={'X-Admin-Token': 's3cr3t'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.get_json()['model_version'], response.get_json()['data_version']), ('m2', 'd2'))
+
+            self.assertIs(before.applicants, self.applicants)
+            self.assertIs(prediction.serving_snapshot().applicants, reloaded)
+            response = client.post('/predict?k=3', json=self.vagas[0])
+            self.assertEqual(response.headers['X-Data-Version'], 'd2')
+            self.assertEqual(response.headers['X-Cache'], 'MISS')
+            self.assertEqual(client.post('/admin/reload').status_code, 403)
+
+    def test_reload_during_request_with_deltas(self):
+        """Requisição iniciada antes de um reload (com segmentos delta) termina com os derivados da versão antiga."""
+        import src.routes.prediction as prediction
+        from src.inference.ingestion import DeltaStore, flatten_applicants
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        restore = patch.multiple(
+            prediction, applicants=prediction.applicants, MODEL_VERSION='m1', DATA_VERSION='d1',
+            served_state=prediction.served_state, delta_store=DeltaStore(directory)
+        )
+        restore.start()
+        self.addCleanup(restore.stop)
+        prediction.delta_store.append(flatten_applicants([
+            {'infos_basicas': {'codigo_profissional': 'N1'}, 'cv_pt': 'python sql dados cloud'},
+            {'infos_basicas': {'codigo_profissional': 'N2'}, 'cv_pt': 'sap gestão projetos'}
+        ]))
+        create_prediction_route(Flask(__name__), self.applicants, 'd1')
+        before = prediction.serving_snapshot()
+        self.assertEqual((len(before.applicants), before.data_version), (42, 'd1+2'))
+        params = dict(top_k=5, cascade=0, filters={'app_form_nivel_ingles': ['Avançado']})
+        expected, _ = prediction.rank_vagas(self.vagas, before, **params)
+
+        reloaded = self.applicants.iloc[::-1].reset_index(drop=True)
+        with patch('src.routes.prediction.load_model', return_value=(prediction.model, 'm2')), \
+                patch('src.inference.applicants.load_applicants', return_value=(reloaded, 'd2')):
+            self.assertTrue(prediction.reloader.trigger(wait=True))
+        self.assertIsNone(prediction.reloader.status()['last_error'])
+        self.assertEqual(prediction.serving_snapshot().data_version, 'd2+2')
+
+        # Nada da versão antiga é recalculado, mesmo fora dos caches
+        with patch.object(prediction.feature_cache, '_build', side_effect=AssertionError('features recalculadas')), \
+                patch('src.inference.filters.BitmapIndex.__init__', side_effect=AssertionError('bitmaps recalculados')):
+            prediction.feature_cache.clear()
+            prediction.filter_cache.clear()
+            results, _ = prediction.rank_vagas(self.vagas, before, **params)
+        self.assertEqual(results, expected)
+
+    def test_ingest_applicants_incrementally(self):
+        """POST /applicants grava um segmento delta e os novos candidatos entram no ranking sem recalcular a base."""
+        import src.routes.prediction as prediction
+        from src.inference.ingestion import DeltaStore, concat_applicants, flatten_applicants
+        from src.routes.applicants import create_applicants_route
+        create_applicants_route(self.app)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        restore = patch.multiple(
+            prediction, applicants=prediction.applicants, DATA_VERSION='d1',
+            delta_store=DeltaStore(directory, max_segments=1)
+        )
+        restore.start()
+        self.addCleanup(restore.stop)
+
+        def record(applicant_id, cv, nivel):
+            return {
+                'infos_basicas': {'codigo_profissional': applicant_id},
+                'cv_pt': cv,
+                'informacoes_profissionais': {'conhecimentos_tecnicos': 'python sql dados', 'nivel_profissional': nivel},
+                'formacao_e_idiomas': {
+                    'nivel_academico': 'Ensino Superior Completo', 'nivel_ingles': 'Avançado', 'nivel_espanhol': 'Nenhum'
+                }
+            }
+
+        first = [record('N1', 'python sql dados cloud', 'Pleno'), record('A3', 'duplicado', 'Pleno')]
+        second = {'N2': record('N2', 'sap gestão projetos', 'Especialista')}
+        full = concat_applicants(self.applicants, flatten_applicants([first[0], second['N2']]))
+        expected = create_prediction_route(Flask(__name__), full).test_client().post(
+            '/predict/batch?k=50', json=self.vagas, headers={'X-Cache-Bypass': '1'}
+        ).get_json()
+        prediction.applicants, prediction.DATA_VERSION = self.applicants, 'd1'
+
+        with self.app.test_client() as client, patch('src.routes.admin.ADMIN_TOKEN', 's3cr3t'), \
+                patch('src.routes.applicants.ADMIN_TOKEN', 's3cr3t'):
+            self.assertEqual(client.post('/applicants', json=first).status_code, 401)
+            headers = {'X-Admin-Token': 's3cr3t'}
+            response = client.post('/applicants', json=first, headers=headers)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.get_json(), {'ingested': 1, 'ignored': ['A3'], 'total': 41, 'data_version': 'd1+1'})
+            self.assertEqual(client.post('/applicants', json='x', headers=headers).status_code, 400)
+
+            response = client.post('/applicants', json=second, headers=headers)
+            self.assertEqual(response.get_json()['data_version'], 'd1+2')
+            response = client.post('/predict/batch?k=50', json=self.vagas, headers={'X-Cache-Bypass': '1'})
+            self.assertEqual(response.headers['X-Data-Version'], 'd1+2')
+            self.assertEqual(response.get_json(), expected)
+
+            # Dois segmentos com max_segments=1: compactação em segundo plano
+            prediction.compaction_thread.join()
+            self.assertEqual(len(prediction.delta_store.files()), 1)
+            response = client.post('/predict/batch?k=50', json=self.vagas, headers={'X-Cache-Bypass': '1'})
+            self.assertEqual(response.get_json(), expected)
+
+        # Reinício: os deltas gravados são aplicados sobre a base original
+        app = create_prediction_route(Flask(__name__), self.applicants)
+        self.assertEqual(len(prediction.serving_snapshot().applicants), 42)
+        response = app.test_client().post('/predict/batch?k=50', json=self.vagas, headers={'X-Cache-Bypass': '1'})
+        self.assertEqual(response.get_json(), expected)
+
+    def test_readiness_after_warm_up(self):
+        """/healthz responde sempre; /readyz só depois de uma predição de warm-up."""
+        import src.routes.prediction as prediction
+        from src.routes.health import create_health_route
+        create_health_route(self.app)
+        with patch.multiple(prediction, ready=False, warm_up_ms=None), self.app.test_client() as client:
+            self.assertEqual(client.get('/healthz').status_code, 200)
+            self.assertEqual(client.get('/readyz').status_code, 503)
+
+            with patch('src.routes.prediction.model', None):
+                self.assertIsNone(prediction.warm_up())
+            self.assertEqual(client.get('/readyz').status_code, 503)
+
+            self.assertIsNotNone(prediction.warm_up())
+            response = client.get('/readyz')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.get_json()['ready'])
+
+    def test_stage_metrics_and_debug_header(self):
+        """Etapas da predição em /metrics e, com X-Debug-Timing: 1, no header Server-Timing."""
+        from src.inference.metrics import metrics
+        from src.routes.metrics import create_metrics_route
+        create_metrics_route(self.app)
+        with self.app.test_client() as client:
+            with patch.object(metrics, 'enabled', False):
+                self.assertIsNone(metrics.stage('rank').__enter__())
+                response = client.post('/predict?k=3', json=self.vagas[0], headers={'X-Cache-Bypass': '1'})
+                self.assertNotIn('Server-Timing', response.headers)
+                response = client.post('/predict?k=3', json=self.vagas[0],
+                                       headers={'X-Cache-Bypass': '1', 'X-Debug-Timing': '1'})
+                stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+                for stage in ['validate', 'tfidf_1', 'onehot', 'assemble', 'classifier', 'rank', 'serialize', 'total']:
+                    self.assertIn(stage, stages)
+
+            with patch.object(metrics, 'enabled', True):
+                client.post('/predict/batch?k=3', json=self.vagas, headers={'X-Cache-Bypass': '1'})
+                response = client.get('/metrics')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.content_type.startswith('text/plain'))
+            text = response.get_data(as_text=True)
+            self.assertIn('predict_stage_seconds_count{stage="tfidf_1"}', text)
+            self.assertIn('predict_requests_total{route="predict_batch",status="200"}', text)
+            self.assertIn('predict_result_cache_misses_total', text)
+            self.assertIn('predict_applicants 40.0', text)
+
+    def test_rank_jobs_chunking(self):
+        """O top-k não depende do tamanho dos blocos."""
+        rng = np.random.default_rng(1)
+        scores = [rng.integers(0, 10, size=103) / 10 for _ in range(3)]
+
+        def predict_proba(jobs, rows):
+            return [np.column_stack([1 - scores[j][rows], scores[j][rows]]) for j in jobs]
+
+        expected = [list(top_k_indices(s, 6)) for s in scores]
+        for chunk_rows in [1, 10, 50, 103, 1000]:
+            rankings = rank_jobs(predict_proba, 3, 103, 6, chunk_rows=chunk_rows)
+            self.assertEqual([list(r.positions) for r in rankings], expected)
+
+
+class TestForestEngine(RealModelTestCase):
+    """Testes de paridade do motor NumPy da Random Forest com o sklearn."""
+
+    def test_predict_proba_parity(self):
+        """A descida completa sobre a CSR deve bater com o sklearn."""
+        features = ApplicantFeatures(SplitPipeline(self.model), self.applicants)
+        matrix = features.build_matrix(self.vaga_data)
+        engine = ForestEngine.from_forest(self.model.named_steps['classifier'])
+        expected = self.model.named_steps['classifier'].predict_proba(matrix)
+        np.testing.assert_allclose(engine.predict_proba(matrix), expected, rtol=0, atol=1e-12)
+
+    def test_leaf_incidence_parity(self):
+        """O caminho por incidência candidato x folha deve bater com o pipeline completo."""
+        features = ApplicantFeatures(SplitPipeline(self.model, engine="numpy"), self.applicants)
+        self.assertIsNotNone(features.leaves)
+        expected = self.model.predict_proba(self.reference_input())
+
+        vagas = [self.vaga_data, dict(self.vaga_data, **{'vaga_nivel_ingles': 'Fluente', 'vaga_principais_atividades': 'Gestão de projetos SAP'})]
+        job_blocks = features.pipeline.transform_jobs(vagas)
+        result = features.predict_proba(job_blocks)
+        np.testing.assert_allclose(result[0], expected, rtol=0, atol=1e-12)
+
+        # Subconjunto de linhas
+        subset = features.predict_proba(job_blocks[:1], rows=np.array([3, 1]))[0]
+        np.testing.assert_allclose(subset, expected[[3, 1]], rtol=0, atol=1e-12)
+
+    def test_unsupported_classifier_falls_back(self):
+        """Classificadores que não são Random Forest continuam usando o sklearn."""
+        with self.assertRaises(ValueError):
+            ForestEngine.from_forest(MagicMock())
+
+
+class TestShortlist(RealModelTestCase):
+    """Testes para a pré-seleção de candidatos pelo índice invertido."""
+
+    def test_shortlist_by_term_overlap(self):
+        """Só candidatos com termos em comum com a vaga entram na pré-seleção."""
+        applicants = self.applicants.copy()
+        applicants.loc[2, ['cv_pt', 'app_prof_conhecimentos_tecnicos']] = ['', '']
+        features = ApplicantFeatures(SplitPipeline(self.model), applicants, term_index=True)
+        job_blocks = features.pipeline.transform_job(self.vaga_data)
+
+        shortlist = features.term_index.shortlist(job_blocks, 10)
+        self.assertNotIn(2, shortlist)
+        self.assertEqual(list(shortlist), sorted(shortlist))
+        self.assertEqual(len(features.term_index.shortlist(job_blocks, 1)), 1)
+
+    def test_shortlist_ranking_and_recall(self):
+        """A floresta pontua só a pré-seleção e o recall compara com a pontuação exaustiva."""
+        features = ApplicantFeatures(SplitPipeline(self.model), self.applicants, term_index=True)
+        job_blocks = features.pipeline.transform_jobs([self.vaga_data])
+        shortlist = features.term_index.shortlist(job_blocks[0], 10)
+        rankings, info = rank_shortlisted(features, job_blocks, 1, size=10, report_recall=True)
+
+        probabilities = features.predict_proba(job_blocks)[0]
+        expected = shortlist[top_k_indices(probabilities[shortlist, 1], 1)]
+        np.testing.assert_array_equal(rankings[0].positions, expected)
+
+        exhaustive = set(top_k_indices(probabilities[:, 1], 1).tolist())
+        self.assertEqual(info["shortlist_sizes"], [len(shortlist)])
+        self.assertEqual(info["recalls"], [len(exhaustive & set(expected.tolist())) / len(exhaustive)])
+
+    def test_short_shortlist_padded_to_k(self):
+        """Vaga sem termos em comum com a base ou pré-seleção menor que k: k candidatos pontuados, não a base inteira."""
+        from src.inference.retrieval import pad_subset
+        features = ApplicantFeatures(SplitPipeline(self.model), self.applicants, term_index=True)
+        vaga = dict(self.vaga_data, vaga_principais_atividades='', vaga_competencia_tecnicas_e_comportamentais='')
+        job_blocks = features.pipeline.transform_jobs([vaga])
+        self.assertEqual(len(features.term_index.shortlist(job_blocks[0], 10)), 0)
+
+        with patch.object(features, 'predict_proba', wraps=features.predict_proba) as predict:
+            rankings, info = rank_shortlisted(features, job_blocks, 2, size=10)
+        self.assertEqual(sum(len(call.args[1]) for call in predict.call_args_list), 2)
+        self.assertEqual(info["shortlist_sizes"], [2])
+        self.assertEqual(sorted(rankings[0].positions.tolist()), [0, 1])
+
+        rankings, info = rank_shortlisted(features, job_blocks, 2, size=10, allowed=np.array([1, 3]))
+        self.assertEqual((sorted(rankings[0].positions.tolist()), info["shortlist_sizes"]), ([1, 3], [2]))
+
+        # shortlist menor que k: o índice seleciona k candidatos
+        rankings, info = rank_shortlisted(features, features.pipeline.transform_jobs([self.vaga_data]), 3, size=1)
+        self.assertEqual((len(rankings[0].positions), info["shortlist_sizes"]), (3, [3]))
+
+        np.testing.assert_array_equal(pad_subset(np.array([5]), 3, 10), [0, 1, 5])
+        np.testing.assert_array_equal(pad_subset(np.array([0, 4]), 3, 10, allowed=np.array([0, 4, 6, 8])), [0, 4, 6])
+        np.testing.assert_array_equal(pad_subset(np.array([1, 2, 3]), 2, 10), [1, 2, 3])
+
+    def test_segmented_features_match_full_base(self):
+        """Base + segmentos delta (e após compactar) pontuam e pré-selecionam como a base inteira."""
+        from src.inference.features import SegmentedFeatures
+        pipeline = SplitPipeline(self.model)
+        full = ApplicantFeatures(pipeline, self.applicants, term_index=True)
+        features = ApplicantFeatures(pipeline, self.applicants.iloc[:2].reset_index(drop=True), term_index=True)
+        for i in [2, 3]:
+            delta = ApplicantFeatures(pipeline, self.applicants.iloc[i:i + 1].reset_index(drop=True), term_index=True)
+            features = SegmentedFeatures.extend(features, delta)
+        job_blocks = pipeline.transform_jobs([self.vaga_data])
+
+        for segmented in [features, features.compact()]:
+            self.assertEqual(segmented.n_rows, 4)
+            np.testing.assert_allclose(segmented.predict_proba(job_blocks)[0], full.predict_proba(job_blocks)[0])
+            rows = np.array([3, 0, 2])
+            np.testing.assert_allclose(segmented.predict_proba(job_blocks, rows)[0], full.predict_proba(job_blocks, rows)[0])
+            np.testing.assert_array_equal(
+                segmented.term_index.shortlist(job_blocks[0], 3), full.term_index.shortlist(job_blocks[0], 3)
+            )
+        self.assertEqual(len(features.compact().segments), 2)
+
+
+class TestCompactApplicantStore(RealModelTestCase):
+    """Testes para o carregamento compacto do parquet de candidatos."""
+
+    def write_parquet(self):
+        applicants = self.applicants.assign(
+            ID_APPLICANT=self.applicants['ID_APPLICANT'].astype(str),
+            cv_en=['Python experience', None, 'Full stack developer', 'SAP analyst'],
+            app_prof_area_atuacao=['TI', 'TI', None, 'Financeiro']
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'applicants_processed.parquet')
+        applicants.to_parquet(path)
+        return applicants, path
+
+    def test_projects_columns_and_compact_dtypes(self):
+        """Só as colunas usadas são lidas; categorias viram category e textos string[pyarrow]."""
+        _, path = self.write_parquet()
+        compact = load_parquet(path)
+        self.assertEqual(list(compact.columns), APPLICANT_COLUMNS)
+        self.assertIsInstance(compact['app_form_nivel_ingles'].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact['cv_pt'].dtype, pd.StringDtype("pyarrow"))
+
+    def test_same_features_as_object_frame(self):
+        """A matriz de features da base compacta é idêntica à da base com objetos Python."""
+        applicants, path = self.write_parquet()
+        pipeline = SplitPipeline(self.model)
+        expected = ApplicantFeatures(pipeline, applicants).build_matrix(self.vaga_data)
+        result = ApplicantFeatures(pipeline, load_parquet(path)).build_matrix(self.vaga_data)
+        self.assertEqual(abs(result - expected).max(), 0)
+
+        # Caminho completo (DataFrame no pipeline) também aceita as colunas compactas
+        input_df = build_input_frame(self.vaga_data, load_parquet(path))
+        for col in CATEGORICAL_FEATURES_FOR_PREDICTION:
+            input_df[col] = fill_categorical(input_df[col])
+        self.assertEqual(input_df['app_prof_nivel_profissional'].tolist(), ['Pleno', 'Sênior', 'Desconhecido', 'Nível inexistente'])
+
+
+class TestResultCache(unittest.TestCase):
+    """Testes para o cache LRU/TTL de resultados por vaga."""
+
+    def test_lru_ttl_and_invalidation(self):
+        now = [0.0]
+        cache = ResultCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+        model, applicants = object(), object()
+        cache.bind(model, applicants)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)  # 'b' é o menos usado recentemente
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+        now[0] = 11.0
+        self.assertIsNone(cache.get('a'))  # expirado
+
+        cache.put('d', 4)
+        cache.bind(model, applicants)
+        self.assertEqual(cache.get('d'), 4)
+        cache.bind(object(), applicants)  # modelo recarregado
+        self.assertIsNone(cache.get('d'))
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_bind_invalidates_only_on_version_change(self):
+        cache = ResultCache(max_entries=8, ttl_seconds=0)
+        cache.bind('m1', 'd1')
+        cache.put('a', 1)
+        # Mesmas versões em outro objeto (ex.: estado republicado depois de compactar os deltas)
+        cache.bind('m1', ''.join(['d', '1']))
+        self.assertEqual(cache.get('a'), 1)
+        cache.bind('m1', 'd1+3')  # candidatos ingeridos
+        self.assertIsNone(cache.get('a'))
+        cache.put('b', 2)
+        cache.bind('m2', 'd1+3')  # modelo recarregado
+        self.assertIsNone(cache.get('b'))
+
+
+class TestArtifacts(RealModelTestCase):
+    """Testes para a exportação e o carregamento com mmap dos artefatos."""
+
+    def export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        export_artifacts(self.model, self.applicants, directory, model_version='m1', data_version='d1')
+        return directory, load_artifacts(latest_version(directory))
+
+    def test_same_predictions_without_unpickling(self):
+        """Vetorizadores, one-hot e floresta reconstruídos dos .npy dão as mesmas probabilidades."""
+        _, artifacts = self.export()
+        expected = self.model.predict_proba(self.reference_input())
+        np.testing.assert_allclose(artifacts.predict_proba(self.reference_input()), expected, atol=1e-12)
+
+        features = artifacts.features
+        job_blocks = features.pipeline.transform_jobs([self.vaga_data])
+        np.testing.assert_allclose(features.predict_proba(job_blocks)[0], expected, atol=1e-12)
+        self.assertFalse(features.leaves.data.flags.writeable)  # mapeado do disco
+        self.assertEqual(artifacts.applicants['ID_APPLICANT'].tolist(), self.applicants['ID_APPLICANT'].tolist())
+        self.assertIs(FeatureCache().get(artifacts, artifacts.applicants), features)
+
+    def test_versions_and_applicants_source(self):
+        """LATEST aponta para a última exportação; a base dos artefatos só é usada se o parquet não mudou."""
+        directory, first = self.export()
+        second_path = export_artifacts(self.model, self.applicants.iloc[:2], directory, data_version='d2')
+        self.assertEqual(latest_version(directory), second_path)
+        self.assertNotEqual(first.version, load_artifacts(second_path).version)
+
+        with patch('src.inference.applicants.artifact_version', return_value='d1'):
+            applicants, version = load_applicants('applicants.parquet', first)
+        self.assertIs(applicants, first.applicants)
+        self.assertEqual(version, 'd1')
+        with patch('src.inference.applicants.artifact_version', return_value='d9'), \
+                patch('src.inference.applicants.load_parquet', return_value=self.applicants):
+            applicants, version = load_applicants('applicants.parquet', first)
+        self.assertIs(applicants, self.applicants)
+        self.assertEqual(version, 'd9')
+
+
+class TestStreamingPreparation(unittest.TestCase):
+    """Testes para o preparo em streaming dos JSONs de treino."""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        vagas = {
+            str(v): {
+                'informacoes_basicas': {'titulo_vaga': f'Vaga {v}', 'cliente': 'Cliente'},
+                'perfil_vaga': {'nivel profissional': 'Pleno', 'principais_atividades': f'Atividades {v}',
+                                **({'nivel_ingles': 'Avançado'} if v % 2 else {})},
+                'beneficios': {'valor_venda': '-'}
+            }
+            for v in range(1, 4)
+        }
+        applicants = {
+            str(a): {
+                'infos_basicas': {'codigo_profissional': str(a), 'nome': f'Candidato {a}'},
+                'informacoes_profissionais': {'conhecimentos_tecnicos': 'Python, SQL', 'nivel_profissional': 'Sênior'},
+                'formacao_e_idiomas': {'nivel_academico': 'Ensino Superior Completo', 'nivel_ingles': 'Básico'},
+                'cv_pt': f'Currículo "{a}" com aspas, vírgulas {{chaves}} e 123',
+                'cv_en': ''
+            }
+            for a in range(10, 16)
+        }
+        applicants['12']['formacao_e_idiomas'] = {}
+        # Mesmo candidato com duas chaves no arquivo: o merge repete as linhas dele
+        applicants['99'] = dict(applicants['11'], cv_pt='Outro currículo')
+        statuses = ['Contratado pela Decision', 'Não Aprovado pelo RH', 'Encaminhado ao Requisitante', 'Desistiu']
+        prospects = {
+            str(v): {
+                'titulo': f'Vaga {v}',
+                'prospects': [{'codigo': str(a), 'situacao_candidado': statuses[(a + v) % 4]} for a in range(9, 16)]
+            }
+            for v in range(1, 5)  # vaga 4 e candidato 9 não existem nos outros arquivos
+        }
+        for name, data in [('vagas', vagas), ('applicants', applicants), ('prospects', prospects)]:
+            with open(os.path.join(self.data_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def test_iter_json_object_small_chunks(self):
+        """O leitor incremental devolve os mesmos registros do json.load, com qualquer tamanho de bloco."""
+        from src.modeltraining.data_preparation import iter_json_object
+        path = os.path.join(self.data_dir, 'applicants.json')
+        with open(path, encoding='utf-8') as f:
+            expected = list(json.load(f).items())
+        for chunk_size in [1, 7, 4096]:
+            self.assertEqual(list(iter_json_object(path, chunk_size)), expected)
+
+    def test_streaming_matches_in_memory_preparation(self):
+        """O parquet em row groups tem as mesmas linhas e colunas do processed_data.pkl."""
+        import pyarrow.parquet as pq
+        from src.modeltraining.data_preparation import as_text, prepare_data, prepare_data_streaming
+        pkl_path = os.path.join(self.data_dir, 'processed_data.pkl')
+        prepare_data(self.data_dir, pkl_path)
+        parquet_path = prepare_data_streaming(self.data_dir, batch_size=4)
+
+        expected = pd.read_pickle(pkl_path)
+        result = pd.read_parquet(parquet_path)
+        self.assertGreater(pq.ParquetFile(parquet_path).metadata.num_row_groups, 1)
+        self.assertEqual(sorted(result.columns), sorted(expected.columns))
+        self.assertIn('vaga_nivel_ingles', result.columns)
+
+        for col in expected.columns:
+            if col != 'target':
+                expected[col] = expected[col].map(as_text, na_action='ignore')
+        keys = ['ID_VAGA', 'ID_APPLICANT']
+        expected = expected.sort_values(keys).reset_index(drop=True)[sorted(expected.columns)]
+        result = result.sort_values(keys).reset_index(drop=True)[sorted(result.columns)]
+        pd.testing.assert_frame_equal(
+            result.astype(object).where(result.notna(), None), expected.astype(object).where(expected.notna(), None)
+        )
+
+    def test_entities_match_in_memory_preparation(self):
+        """Vagas e candidatos normalizados uma vez e unidos na leitura dão as mesmas linhas, na mesma ordem."""
+        from src.modeltraining.data_preparation import as_text, load_prepared, prepare_data, prepare_data_entities
+        pkl_path = os.path.join(self.data_dir, 'processed_data.pkl')
+        prepare_data(self.data_dir, pkl_path)
+        with patch('src.modeltraining.data_preparation.pd.json_normalize', wraps=pd.json_normalize) as normalize:
+            output_dir = prepare_data_entities(self.data_dir, part_rows=8)
+        self.assertEqual([len(call.args[0]) for call in normalize.call_args_list], [3, 7, 7])
+
+        expected = pd.read_pickle(pkl_path)
+        result = load_prepared(output_dir)
+        self.assertEqual(sorted(os.listdir(output_dir)), ['applicants', 'prospects', 'vagas'])
+        self.assertEqual(len(os.listdir(os.path.join(output_dir, 'prospects'))), 3)
+        self.assertEqual(list(result.columns), list(expected.columns))
+        self.assertEqual(result['target'].dtype, np.int8)
+        self.assertIsInstance(result['app_form_nivel_ingles'].dtype, pd.CategoricalDtype)
+
+        for col in expected.columns:
+            if col != 'target':
+                expected[col] = expected[col].map(as_text, na_action='ignore')
+        pd.testing.assert_frame_equal(
+            result.astype(object).where(result.notna(), None), expected.astype(object).where(expected.notna(), None)
+        )
+
+
+class TestModelTraining(unittest.TestCase):
+    """Testes para o treino com pré-processamento ajustado uma vez."""
+
+    def training_data(self):
+        """Base de treino sintética em um diretório temporário: (diretório, caminho do pickle)."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        rng = np.random.default_rng(0)
+        words = ['python', 'java', 'sql', 'dados', 'sap', 'gestão', 'projetos', 'cloud', 'redes', 'vendas']
+        n = 80
+        df = pd.DataFrame({
+            'ID_VAGA': [str(i % 9) for i in range(n)],
+            'ID_APPLICANT': [str(i) for i in range(n)],
+            'cv_pt': [' '.join(rng.choice(words, 12)) for _ in range(n)],
+            'app_prof_conhecimentos_tecnicos': [' '.join(rng.choice(words, 4)) for _ in range(n)],
+            'vaga_principais_atividades': [' '.join(rng.choice(words, 8)) for _ in range(n)],
+            'vaga_competencia_tecnicas_e_comportamentais': [None] + [' '.join(rng.choice(words, 5)) for _ in range(n - 1)],
+            'vaga_nivel profissional': rng.choice(['Pleno', 'Sênior', None], n),
+            'app_form_nivel_ingles': rng.choice(['Básico', 'Avançado'], n),
+            'target': rng.integers(0, 2, n)
+        })
+        data_path = os.path.join(directory, 'processed_data.pkl')
+        df.to_pickle(data_path)
+        return directory, data_path
+
+    def test_fit_once_matches_full_pipeline(self):
+        """Os modelos salvos são Pipelines completos e iguais ao Pipeline ajustado do jeito antigo."""
+        from sklearn.model_selection import train_test_split
+        from sklearn.pipeline import Pipeline
+        from src.modeltraining.model_training import build_preprocessor, select_features, train_model
+        directory, data_path = self.training_data()
+        df = pd.read_pickle(data_path)
+
+        with patch('sys.stdout', new=MagicMock()):
+            train_model(data_path, directory, cores=1, cache_dir=os.path.join(directory, 'cache'))
+            X, y, text_features, categorical_features = select_features(df)
+        self.assertTrue(os.listdir(os.path.join(directory, 'cache')))
+        X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+        expected = Pipeline([
+            ('preprocessor', build_preprocessor(text_features, categorical_features)),
+            ('classifier', RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', max_depth=10))
+        ]).fit(X_train, y_train)
+
+        model_rf = joblib.load(os.path.join(directory, 'model_rf.joblib'))
+        model_lr = joblib.load(os.path.join(directory, 'model_lr.joblib'))
+        self.assertEqual([name for name, _ in model_rf.steps], ['preprocessor', 'classifier'])
+        self.assertEqual([name for name, _ in model_lr.steps], ['preprocessor', 'scaler', 'classifier'])
+        np.testing.assert_allclose(model_rf.predict_proba(X_test), expected.predict_proba(X_test))
+        self.assertEqual(model_lr.predict_proba(X_test).shape, (len(X_test), 2))
+
+    def test_hashing_text_backend(self):
+        """O backend de hashing dá os mesmos pesos do TF-IDF, transforma em blocos paralelos e é servido pela API."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        import pickle
+        from src.inference.text_hashing import HashingTfidfVectorizer
+        from src.modeltraining.model_training import select_features, train_model
+        directory, data_path = self.training_data()
+        texts = pd.read_pickle(data_path)['cv_pt']
+
+        # Sem colisões os pesos por documento são os do TfidfVectorizer (só a ordem das colunas muda)
+        hashed = HashingTfidfVectorizer(n_features=2 ** 20, dtype=np.float64, chunk_size=7).fit(texts).transform(texts)
+        expected = TfidfVectorizer(ngram_range=(1, 2)).fit(texts).transform(texts)
+        for i in [0, 1, 40]:
+            np.testing.assert_allclose(np.sort(hashed[i].data), np.sort(expected[i].data))
+        parallel = HashingTfidfVectorizer(n_features=2 ** 10, n_jobs=2, chunk_size=30).fit(texts)
+        np.testing.assert_allclose(
+            parallel.transform(texts).toarray(), HashingTfidfVectorizer(n_features=2 ** 10).fit(texts).transform(texts).toarray()
+        )
+        # float32 por padrão; fit_transform em blocos = fit + transform; idf compacto no pickle
+        single = HashingTfidfVectorizer(n_features=2 ** 10)
+        self.assertEqual(single.fit_transform(texts).dtype, np.float32)
+        np.testing.assert_array_equal(single.fit_transform(texts).toarray(), parallel.fit_transform(texts).toarray())
+        np.testing.assert_array_equal(pickle.loads(pickle.dumps(single)).idf_, single.idf_)
+
+        with patch('sys.stdout', new=MagicMock()):
+            train_model(data_path, directory, cores=1, cache_dir=os.path.join(directory, 'cache'), text_backend='hashing')
+            X = select_features(pd.read_pickle(data_path))[0]
+        model = joblib.load(os.path.join(directory, 'model_rf.joblib'))
+        self.assertIsInstance(model.named_steps['preprocessor'].named_transformers_['tfidf_0'], HashingTfidfVectorizer)
+
+        # Rota: features separadas candidato/vaga, índice invertido e artefatos exportados
+        applicants = X[[col for col in X.columns if not col.startswith('vaga_')]].assign(ID_APPLICANT=[f'A{i}' for i in range(len(X))])
+        features = ApplicantFeatures(SplitPipeline(model, engine='numpy'), applicants, term_index=True)
+        self.assertIsNotNone(features.term_index)
+        artifacts = load_artifacts(export_artifacts(model, applicants, os.path.join(directory, 'artifacts')))
+        np.testing.assert_allclose(artifacts.predict_proba(X), model.predict_proba(X))
+        job = X.iloc[0][[col for col in X.columns if col.startswith('vaga_')]].to_dict()
+        frame = applicants.assign(**job)[X.columns]
+        np.testing.assert_allclose(
+            features.predict_proba(features.pipeline.transform_jobs([job]))[0], model.predict_proba(frame)
+        )
+
+    def test_tuning_reports_auc_latency_pareto_front(self):
+        """O tuning ajusta o pré-processamento por fold, registra AUC e latência e marca a fronteira de Pareto."""
+        from sklearn.compose import ColumnTransformer
+        from src.modeltraining import model_training
+        directory, data_path = self.training_data()
+        spaces = {
+            'rf': ([('classifier', RandomForestClassifier(random_state=42, n_jobs=1))],
+                   {'classifier__n_estimators': [5, 20], 'classifier__max_depth': [3, None]}),
+            'lr': ([('classifier', LogisticRegression(solver='liblinear'))], {'classifier__C': [0.1, 1.0]})
+        }
+        fit_transform = ColumnTransformer.fit_transform
+        fitted_rows = []
+
+        def record_fit(self, X, y=None, **params):
+            fitted_rows.append(len(X))
+            return fit_transform(self, X, y, **params)
+
+        with patch('sys.stdout', new=MagicMock()), \
+                patch.object(ColumnTransformer, 'fit_transform', autospec=True, side_effect=record_fit):
+            n_train = len(model_training.split_training_data(data_path)[0])
+            rows = model_training.tune_models(
+                data_path, directory, cores=1, cache_dir=os.path.join(directory, 'cache'), factor=2, cv=2, spaces=spaces
+            )
+        # TF-IDF/one-hot ajustados só com o treino de cada fold, no máximo uma vez por fold e rodada (não por
+        # configuração; o cache também é reaproveitado entre modelos com os mesmos dados)
+        self.assertTrue(fitted_rows)
+        self.assertLessEqual(max(fitted_rows), n_train // 2 + 1)
+        rounds = sum(max(row['iteration'] for row in rows if row['model'] == name) + 1 for name in spaces)
+        self.assertLessEqual(len(fitted_rows), 2 * rounds)
+        self.assertTrue(all(row['latency_ms_per_1k'] > 0 for row in rows))
+
+        with open(os.path.join(directory, 'tuning_results.json')) as f:
+            self.assertEqual(json.load(f), rows)
+        self.assertEqual(sorted({row['model'] for row in rows}), ['lr', 'rf'])
+        self.assertEqual(len(rows), 6)
+        front = [row for row in rows if row['pareto']]
+        self.assertTrue(front)
+        for row in front:
+            self.assertFalse(any(
+                other['roc_auc'] >= row['roc_auc'] and other['latency_ms_per_1k'] <= row['latency_ms_per_1k']
+                and other is not row and (other['roc_auc'], other['latency_ms_per_1k']) != (row['roc_auc'], row['latency_ms_per_1k'])
+                for other in rows
+            ))
+        self.assertEqual(model_training.pareto_front([(0.8, 2.0), (0.9, 3.0), (0.7, 2.5), (0.9, 1.0)]), [False, False, False, True])
+
+
+def linear_cascade_model(forest, frame, target):
+    """Regressão logística com o mesmo pré-processamento da floresta, no formato do model_lr.joblib."""
+    import copy
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    return Pipeline([
+        ('preprocessor', copy.deepcopy(forest.steps[0][1])),
+        ('scaler', StandardScaler(with_mean=False)),
+        ('classifier', LogisticRegression(solver='liblinear', C=0.1))
+    ]).fit(frame, target)
+
+
+class TestCascade(RealModelTestCase):
+    """Testes para a cascata regressão logística -> Random Forest."""
+
+    def test_linear_scores_match_decision_function(self):
+        """Parte do candidato + parte da vaga (escalonamento embutido nos pesos) = decision_function."""
+        from src.inference.cascade import CascadeCache
+        reference = self.reference_input()
+        linear = linear_cascade_model(self.model, reference, [1, 0, 1, 0])
+        scores = CascadeCache().get(linear, self.applicants)
+        job_score = scores.scorer.job_scores([self.vaga_data])[0]
+        np.testing.assert_allclose(scores.scores + job_score, linear.decision_function(reference))
+
+        top = np.argsort(-linear.decision_function(reference), kind='stable')[:2]
+        np.testing.assert_array_equal(scores.shortlists([self.vaga_data], 2)[0], np.sort(top))
+        extended = scores.extend(self.applicants.iloc[:1])
+        self.assertEqual(extended.n_rows, 5)
+        self.assertAlmostEqual(extended.scores[4], scores.scores[0])
+
+    def test_linear_scores_reuse_forest_features(self):
+        """Com o pré-processamento do train_model (o mesmo da floresta), a base não é transformada de novo."""
+        import copy
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+        from src.inference.cascade import CascadeCache
+        from src.inference.features import FeatureCache, SegmentedFeatures, SplitPipeline
+        reference = self.reference_input()
+        preprocessor = self.model.steps[0][1]
+        head = Pipeline([
+            ('scaler', StandardScaler(with_mean=False)), ('classifier', LogisticRegression(solver='liblinear', C=0.1))
+        ]).fit(preprocessor.transform(reference), [1, 0, 1, 0])
+        shared = Pipeline([('preprocessor', copy.deepcopy(preprocessor))] + head.steps)
+        features = FeatureCache().get(self.model, self.applicants)
+
+        with patch.object(SplitPipeline, 'transform_applicants', side_effect=AssertionError('base transformada')):
+            scores = CascadeCache().get(shared, self.applicants, features=features)
+        job_score = scores.scorer.job_scores([self.vaga_data])[0]
+        np.testing.assert_allclose(scores.scores + job_score, shared.decision_function(reference))
+
+        # Deltas: blocos do segmento novo, também sem transformar de novo
+        delta = features.pipeline.transform_applicants(self.applicants.iloc[:1])
+        segmented = SegmentedFeatures.extend(features, type(features).from_blocks(features.pipeline, delta))
+        with patch.object(SplitPipeline, 'transform_applicants', side_effect=AssertionError('base transformada')):
+            extended = scores.extend(self.applicants.iloc[:1], segmented.segments[-1])
+            self.assertAlmostEqual(scores.scorer.applicant_scores(None, segmented)[4], scores.scores[0])
+        self.assertAlmostEqual(extended.scores[4], scores.scores[0])
+
+        # Pré-processamento reajustado (outro vocabulário): a cascata transforma a base com o seu
+        refit = linear_cascade_model(self.model, reference, [1, 0, 1, 0])
+        scores = CascadeCache().get(refit, self.applicants, features=features)
+        np.testing.assert_allclose(scores.scores + scores.scorer.job_scores([self.vaga_data])[0],
+                                   refit.decision_function(reference))
+
+
+class TestCategoricalFilters(unittest.TestCase):
+    """Testes para os filtros por coluna categórica sobre bitmaps."""
+
+    def test_bitmap_select_and_extend(self):
+        """select combina OU dentro da coluna e E entre colunas; extend equivale a indexar a base inteira."""
+        from src.inference.filters import BitmapIndex, parse_filters
+        columns = ['app_form_nivel_ingles', 'app_prof_nivel_profissional']
+        applicants = pd.DataFrame({
+            'app_form_nivel_ingles': pd.Categorical(['Básico', 'Fluente', None, 'Avançado', 'Intermediário'] * 3),
+            'app_prof_nivel_profissional': ['Pleno', 'Sênior', 'Pleno', None, 'Pleno'] * 3
+        })
+        filters = parse_filters(
+            {'app_form_nivel_ingles_min': 'Intermediário', 'app_prof_nivel_profissional': 'Pleno,Desconhecido'}, columns
+        )
+        self.assertEqual(filters['app_form_nivel_ingles'], ['Avançado', 'Fluente', 'Intermediário'])
+        expected = np.flatnonzero(
+            applicants['app_form_nivel_ingles'].isin(['Intermediário', 'Avançado', 'Fluente']).to_numpy()
+            & applicants['app_prof_nivel_profissional'].fillna('Desconhecido').isin(['Pleno', 'Desconhecido']).to_numpy()
+        )
+        np.testing.assert_array_equal(BitmapIndex(applicants, columns).select(filters), expected)
+
+        # Cortes no meio de um byte e na fronteira de um byte, com extensões encadeadas; a base não é copiada
+        for first, second in [(6, 11), (8, 9), (3, 13)]:
+            base = BitmapIndex(applicants.iloc[:first], columns)
+            extended = base.extend(applicants.iloc[first:second]).extend(applicants.iloc[second:])
+            self.assertIs(extended.segments[0], base)
+            np.testing.assert_array_equal(extended.select(filters), expected)
+            compacted = extended.extend(applicants.iloc[:0]).compact()
+            self.assertEqual(len(compacted.segments), 2)
+            np.testing.assert_array_equal(compacted.select(filters), expected)
+        with self.assertRaises(ValueError):
+            parse_filters({'app_form_nivel_ingles_min': 'Nativo'}, columns)
+
+
+class TestCoalescer(unittest.TestCase):
+    """Testes para o micro-batching de requisições concorrentes do /predict."""
+
+    def submit_concurrently(self, coalescer, requests):
+        import threading
+        results = [None] * len(requests)
+
+        def call(i, vagas, state, params):
+            results[i] = coalescer.submit(vagas, state, **params)
+
+        threads = [threading.Thread(target=call, args=(i, *request)) for i, request in enumerate(requests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_requests_scored_together(self):
+        """Requisições da mesma janela viram uma chamada; parâmetros diferentes ficam em lotes separados."""
+        from src.inference.coalescer import Coalescer
+        calls = []
+
+        def score(vagas, state, top_k):
+            calls.append((list(vagas), top_k))
+            return [[f'{vaga}@{top_k}'] for vaga in vagas], {'shortlist_sizes': [len(vaga) for vaga in vagas]}
+
+        coalescer = Coalescer(score, window_ms=50, max_batch=10, max_wait_ms=1000)
+        results = self.submit_concurrently(coalescer, [
+            (['a'], 'state', {'top_k': 5}), (['bb', 'c'], 'state', {'top_k': 5}), (['d'], 'state', {'top_k': 3})
+        ])
+        self.assertEqual(results[0], ([['a@5']], {'shortlist_sizes': [1]}))
+        self.assertEqual(results[1], ([['bb@5'], ['c@5']], {'shortlist_sizes': [2, 1]}))
+        self.assertEqual(results[2], ([['d@3']], {'shortlist_sizes': [1]}))
+        self.assertEqual(sorted(len(vagas) for vagas, _ in calls), [1, 3])
+        self.assertEqual(coalescer.stats()['requests'], 3)
+
+    def test_latency_cap_scores_in_caller(self):
+        """Com todos os workers ocupados por um lote, quem passa de max_wait_ms é pontuado sozinho."""
+        import threading
+        from src.inference.coalescer import Coalescer
+        release = threading.Event()
+
+        def score(vagas, state):
+            if vagas == ['slow']:
+                release.wait(5)
+            return [[vaga] for vaga in vagas], {}
+
+        coalescer = Coalescer(score, window_ms=1, max_batch=1, max_wait_ms=50, workers=1)
+        slow = threading.Thread(target=coalescer.submit, args=(['slow'], 'state'))
+        slow.start()
+        time.sleep(0.05)
+        self.assertEqual(coalescer.submit(['fast'], 'state'), ([['fast']], {}))
+        self.assertEqual(coalescer.timeouts, 1)
+        release.set()
+        slow.join()
+
+    def test_slow_batch_does_not_block_others(self):
+        """Um lote lento ocupa um worker; o seguinte é pontuado em lote por outro, dentro de max_wait_ms."""
+        import threading
+        from src.inference.coalescer import Coalescer
+        release = threading.Event()
+
+        def score(vagas, state):
+            if vagas == ['slow']:
+                release.wait(5)
+            return [[vaga] for vaga in vagas], {}
+
+        coalescer = Coalescer(score, window_ms=1, max_batch=1, max_wait_ms=1000, workers=2)
+        slow = threading.Thread(target=coalescer.submit, args=(['slow'], 'state'))
+        slow.start()
+        time.sleep(0.05)
+        start = time.monotonic()
+        self.assertEqual(coalescer.submit(['fast'], 'state'), ([['fast']], {}))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(coalescer.timeouts, 0)
+        release.set()
+        slow.join()
+        self.assertEqual(coalescer.stats()['batches'], 2)
+
+    def test_batch_stages_reach_request_trace(self):
+        """Etapas medidas no worker do lote entram no trace (Server-Timing) da requisição que o abriu."""
+        from src.inference.coalescer import Coalescer
+        from src.inference.metrics import metrics
+
+        def score(vagas, state):
+            with metrics.stage('rank_batch'):
+                return [[vaga] for vaga in vagas], {}
+
+        coalescer = Coalescer(score, window_ms=1, max_batch=4, max_wait_ms=1000)
+        metrics.start_trace()
+        try:
+            coalescer.submit(['a'], 'state')
+        finally:
+            trace = metrics.end_trace()
+        self.assertEqual([name for name, _ in trace], ['rank_batch'])
+        # Sem trace aberto nada é anotado
+        coalescer.submit(['b'], 'state')
+        self.assertEqual(metrics.end_trace(), [])
+
+    def test_counters_consistent_under_concurrency(self):
+        """Contadores do stats() não perdem incrementos com muitas threads desistindo do lote ao mesmo tempo."""
+        import sys
+        import threading
+        from src.inference.coalescer import Coalescer
+        release = threading.Event()
+
+        def score(vagas, state):
+            if vagas == ['slow']:
+                release.wait(5)
+            return [[vaga] for vaga in vagas], {}
+
+        coalescer = Coalescer(score, window_ms=1, max_batch=1, max_wait_ms=20, workers=1)
+        slow = threading.Thread(target=coalescer.submit, args=(['slow'], 'state'))
+        slow.start()
+        time.sleep(0.02)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            results = self.submit_concurrently(coalescer, [([f'v{i}'], 'state', {}) for i in range(32)])
+        finally:
+            sys.setswitchinterval(interval)
+            release.set()
+            slow.join()
+        self.assertEqual(results, [([[f'v{i}']], {}) for i in range(32)])
+        stats = coalescer.stats()
+        self.assertEqual(stats['timeouts'] + stats['requests'], 33)
+        self.assertEqual(stats['batches'], stats['requests'])
+
+
+class TestThreadBudget(RealModelTestCase):
+    """Testes para o orçamento de threads da inferência."""
+
+    def test_cgroup_quota_and_budget(self):
+        """Quota do cgroup v2/v1 e núcleos divididos entre os workers."""
+        from src.inference.threads import cgroup_cpu_limit, thread_budget
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        paths = {name: os.path.join(directory, name) for name in ['cpu.max', 'quota', 'period']}
+        with open(paths['cpu.max'], 'w') as f:
+            f.write('250000 100000\n')
+        self.assertEqual(cgroup_cpu_limit(paths['cpu.max']), 2.5)
+        with open(paths['cpu.max'], 'w') as f:
+            f.write('max 100000\n')
+        self.assertIsNone(cgroup_cpu_limit(paths['cpu.max']))
+        for name, value in [('quota', '400000'), ('period', '100000')]:
+            with open(paths[name], 'w') as f:
+                f.write(value)
+        self.assertEqual(cgroup_cpu_limit(os.path.join(directory, 'ausente'), paths['quota'], paths['period']), 4.0)
+
+        self.assertEqual(thread_budget(workers=8, cpus=16), 2)
+        self.assertEqual(thread_budget(workers=32, cpus=16), 1)
+        self.assertEqual(thread_budget(workers=8, threads=3, cpus=16), 3)
+
+    def test_overrides_loaded_n_jobs(self):
+        """n_jobs do pipeline carregado (floresta e ColumnTransformer) passa a ser o orçamento."""
+        import copy
+        from src.inference.threads import set_n_jobs
+        model = copy.deepcopy(self.model)
+        model.steps[-1][1].n_jobs = -1
+        self.assertGreaterEqual(set_n_jobs(model, 2), 2)
+        self.assertEqual(model.steps[-1][1].n_jobs, 2)
+        self.assertEqual(model.named_steps['preprocessor'].n_jobs, 2)
+        np.testing.assert_allclose(model.predict_proba(self.reference_input()), self.model.predict_proba(self.reference_input()))
+
+
 if __name__ == '__main__':
     unittest.main()